@@ -1,7 +1,59 @@
 from abc import ABC, abstractmethod
+from agents.resilience import upstream
+from observability import span
+from tools.executor import run_blocking
+from tools.tool_registry import tool_registry
+
+class ToolFailure(Exception):
+    """A tool-built answer that is only an error message; the message is safe to show the user."""
+
 
 class BaseAgent(ABC):
+    # True when invoke_agent returns finished, tool-built output (no LLM prose),
+    # so ChatbotAgent can show it as is instead of re-synthesizing it. Such
+    # agents raise ToolFailure rather than returning a tool's error text.
+    deterministic_output = False
+    # True when the answer depends only on the question, system prompt and trip
+    # details, so ChatbotAgent may serve it from the shared LLM response cache.
+    cacheable_responses = False
+
     @abstractmethod
     def invoke_agent(self, messages, thread_id):
-        
+
         pass
+
+    async def ainvoke_agent(self, messages, thread_id):
+        """
+        Async entry point. Agents with native async I/O override this; the
+        default runs the blocking invoke_agent on the bounded executor.
+        """
+        return await run_blocking(self.invoke_agent, messages, thread_id)
+
+    # LLM calls go through these helpers so they are traced and share the
+    # per-upstream rate limits, adaptive concurrency limits and circuit breakers.
+    # Tools guard their own upstream fetches, so cached tool results skip the limits.
+
+    def call_llm(self, messages):
+        with span("llm", type(self).__name__):
+            return upstream("openai").call(lambda: self.llm.invoke(messages))
+
+    async def acall_llm(self, messages):
+        with span("llm", type(self).__name__):
+            return await upstream("openai").acall(lambda: self.llm.ainvoke(messages))
+
+    def stream_llm(self, messages):
+        with span("llm", type(self).__name__, streaming=True):
+            yield from upstream("openai").stream(lambda: self.llm.stream(messages))
+
+    async def astream_llm(self, messages):
+        with span("llm", type(self).__name__, streaming=True):
+            async for chunk in upstream("openai").astream(lambda: self.llm.astream(messages)):
+                yield chunk
+
+    def run_tool(self, name: str, tool_input):
+        with span("tool", name):
+            return tool_registry.invoke(name, tool_input)
+
+    async def arun_tool(self, name: str, tool_input):
+        with span("tool", name):
+            return await tool_registry.ainvoke(name, tool_input)
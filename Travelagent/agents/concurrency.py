@@ -0,0 +1,264 @@
+# agents/concurrency.py
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class AgentTimeout(Exception):
+    """Returned in place of a result when a task runs past its time budget."""
+
+
+def iter_fanout(tasks: List[Tuple[str, Callable[[], Any]]],
+                max_workers: int = 4,
+                timeout: float = 30.0) -> Iterator[Tuple[str, Any]]:
+    """
+    Run each (name, fn) pair concurrently on a bounded thread pool and yield
+    (name, result) pairs as they complete. A task that raises yields its
+    exception, and a task that runs longer than `timeout` seconds yields an
+    AgentTimeout. The timeout starts when the task starts running, so tasks
+    queued behind the concurrency cap are not penalized.
+    """
+    if not tasks:
+        return
+
+    started: Dict[str, float] = {}
+
+    def _run(name, fn):
+        started[name] = time.monotonic()
+        return fn()
+
+    workers = max(1, min(max_workers, len(tasks)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-fanout")
+    futures = {executor.submit(_run, name, fn): name for name, fn in tasks}
+    pending = set(futures)
+
+    try:
+        while pending:
+            now = time.monotonic()
+            for fut in [f for f in pending if futures[f] in started]:
+                name = futures[fut]
+                if not fut.done() and now - started[name] >= timeout:
+                    pending.discard(fut)
+                    yield name, AgentTimeout(f"{name} timed out after {timeout:.1f}s")
+            if not pending:
+                break
+
+            # Sleep until something finishes or the earliest running task expires.
+            deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else 0.05
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for fut in done:
+                err = fut.exception()
+                yield futures[fut], err if err is not None else fut.result()
+    finally:
+        # Don't block on timed-out threads; their results are simply dropped.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_fanout(tasks: List[Tuple[str, Callable[[], Any]]],
+               max_workers: int = 4,
+               timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Like iter_fanout(), but waits for everything and returns {name: result}
+    in the same order as `tasks`.
+    """
+    results = dict(iter_fanout(tasks, max_workers=max_workers, timeout=timeout))
+    return {name: results[name] for name, _ in tasks}
+
+
+async def aiter_fanout(tasks: List[Tuple[str, Callable[[], Awaitable[Any]]]],
+                       max_workers: int = 4,
+                       timeout: float = 30.0) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Async counterpart of iter_fanout(): each task is a zero-arg callable
+    returning an awaitable. At most `max_workers` run at once; a task that
+    runs past `timeout` (measured from when it starts) is cancelled and
+    yields an AgentTimeout.
+    """
+    if not tasks:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def _run(name, make):
+        async with semaphore:
+            try:
+                return name, await asyncio.wait_for(make(), timeout)
+            except asyncio.TimeoutError:
+                return name, AgentTimeout(f"{name} timed out after {timeout:.1f}s")
+            except Exception as e:
+                return name, e
+
+    pending = [asyncio.ensure_future(_run(name, make)) for name, make in tasks]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def arun_fanout(tasks: List[Tuple[str, Callable[[], Awaitable[Any]]]],
+                      max_workers: int = 4,
+                      timeout: float = 30.0) -> Dict[str, Any]:
+    """Async counterpart of run_fanout(): {name: result} in the same order as `tasks`."""
+    results = {}
+    async for name, result in aiter_fanout(tasks, max_workers=max_workers, timeout=timeout):
+        results[name] = result
+    return {name: results[name] for name, _ in tasks}
+
+
+class StagePlan:
+    """
+    A tiny dependency-aware executor. Each stage starts as soon as all of its
+    dependencies have finished, and receives their results as positional args.
+
+        plan = StagePlan()
+        plan.add("a", fetch_a, timeout=2.0)
+        plan.add("b", fetch_b)
+        plan.add("ab", combine, deps=("a", "b"), tolerant=True)
+        results, timings = plan.run(deadline=5.0)
+
+    A stage that raises maps to its exception in `results`; stages depending on
+    it are skipped and inherit the same exception, unless they are `tolerant`,
+    in which case they run and receive the exception in place of the result.
+    A stage that runs past its own `timeout`, or past the plan's `deadline`
+    (seconds from the start of the run), maps to an AgentTimeout.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...], Optional[float], bool]] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Tuple[str, ...] = (),
+            timeout: Optional[float] = None, tolerant: bool = False):
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = (fn, tuple(deps), timeout, tolerant)
+        return self
+
+    @staticmethod
+    def _blocked_by(deps, tolerant: bool, results: Dict[str, Any]) -> Optional[Exception]:
+        if tolerant:
+            return None
+        return next((results[d] for d in deps if isinstance(results[d], Exception)), None)
+
+    @staticmethod
+    def _expiry(now: float, timeout: Optional[float], plan_deadline: Optional[float]) -> Optional[float]:
+        limits = [t for t in (now + timeout if timeout is not None else None, plan_deadline) if t is not None]
+        return min(limits) if limits else None
+
+    def run(self, max_workers: int = 4,
+            deadline: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Execute the plan; returns (results, per-stage timings in seconds).
+        Threads can't be interrupted, so a stage that times out is abandoned:
+        its result is dropped and dependents see an AgentTimeout right away.
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        plan_start = time.monotonic()
+        plan_deadline = plan_start + deadline if deadline is not None else None
+
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="stage-plan")
+        running: Dict[Any, str] = {}
+        submitted: Dict[str, float] = {}
+        expires: Dict[Any, Optional[float]] = {}
+        try:
+            while len(results) < len(self.stages):
+                # Start (or skip) every stage whose dependencies are resolved.
+                now = time.monotonic()
+                for name, (fn, deps, timeout, tolerant) in self.stages.items():
+                    if name in results or name in submitted:
+                        continue
+                    if not all(dep in results for dep in deps):
+                        continue
+                    failed = self._blocked_by(deps, tolerant, results)
+                    if failed is not None:
+                        results[name] = failed
+                        continue
+                    if plan_deadline is not None and now >= plan_deadline:
+                        results[name] = AgentTimeout(f"{name} not started before the deadline")
+                        continue
+                    args = [results[d] for d in deps]
+                    fut = executor.submit(fn, *args)
+                    running[fut] = name
+                    submitted[name] = now
+                    expires[fut] = self._expiry(now, timeout, plan_deadline)
+                if not running:
+                    continue
+
+                # Sleep until a stage finishes or the earliest one expires.
+                expiries = [e for e in expires.values() if e is not None]
+                wait_for = max(0.0, min(expiries) - time.monotonic()) if expiries else None
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                for fut in done:
+                    name = running.pop(fut)
+                    expires.pop(fut)
+                    err = fut.exception()
+                    results[name] = err if err is not None else fut.result()
+                    timings[name] = round(now - submitted[name], 3)
+                for fut in [f for f, e in expires.items() if e is not None and now >= e]:
+                    name = running.pop(fut)
+                    expires.pop(fut)
+                    fut.cancel()
+                    results[name] = AgentTimeout(f"{name} timed out after {now - submitted[name]:.1f}s")
+                    timings[name] = round(now - submitted[name], 3)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        timings["total"] = round(time.monotonic() - plan_start, 3)
+        return results, timings
+
+    async def arun(self, deadline: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Async execution of the plan. A stage callable may be a coroutine
+        function or return an awaitable; plain sync callables run inline on
+        the event loop, so keep those cheap (e.g. formatting). A stage that
+        runs past its timeout or the plan deadline is cancelled.
+        """
+        timings: Dict[str, float] = {}
+        plan_start = time.monotonic()
+        plan_deadline = plan_start + deadline if deadline is not None else None
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def _invoke(fn, args):
+            result = fn(*args)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        async def _stage(name, fn, deps, timeout, tolerant):
+            results = {d: await tasks[d] for d in deps}
+            failed = self._blocked_by(deps, tolerant, results)
+            if failed is not None:
+                return failed
+            start = time.monotonic()
+            expiry = self._expiry(start, timeout, plan_deadline)
+            try:
+                if expiry is None:
+                    return await _invoke(fn, list(results.values()))
+                if expiry <= start:
+                    return AgentTimeout(f"{name} not started before the deadline")
+                return await asyncio.wait_for(_invoke(fn, list(results.values())), expiry - start)
+            except asyncio.TimeoutError:
+                return AgentTimeout(f"{name} timed out after {time.monotonic() - start:.1f}s")
+            except Exception as e:
+                return e
+            finally:
+                timings[name] = round(time.monotonic() - start, 3)
+
+        for name, (fn, deps, timeout, tolerant) in self.stages.items():
+            tasks[name] = asyncio.ensure_future(_stage(name, fn, deps, timeout, tolerant))
+        try:
+            results = {name: await task for name, task in tasks.items()}
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        timings["total"] = round(time.monotonic() - plan_start, 3)
+        return results, timings
@@ -1,306 +1,641 @@
 # multi_agents.py
 
+import os
 import re
-from typing import Dict, List
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, Iterator, Optional
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
-from agents.base.base_agent import BaseAgent
-from tools.tool_registry import tool_registry
-
-from tools.flights_finder import flights_finder, FlightsInput
-from tools.hotels_finder import hotels_finder, HotelsInput
-# Import the weather_finder tool you created
-from tools.weather_finder import weather_finder
-from memory import GLOBAL_MEMORY  
+from agents.base.base_agent import BaseAgent, ToolFailure
+from agents.concurrency import AgentTimeout, StagePlan, aiter_fanout, arun_fanout, iter_fanout, run_fanout
+from agents.resilience import UpstreamUnavailable
+from agents.response_cache import RESPONSE_CACHE, LLMResponseCache, trip_fields
+from agents.router import QUERY_ROUTER, QueryRouter
+from agents.trip_result import TripResult, flight_options, hotel_options
+from observability import METRICS, log_event, span
+
+from tools.flights_finder import FlightsInput
+from tools.hotels_finder import HotelsInput
+from tools.airport_index import AIRPORT_INDEX
+from tools.weather_forecast import FORECAST_DAYS, parse_date
+from memory import ConversationMemory, SESSIONS
+from memory_compaction import build_prompt_context
+from trip_templates import render_trip
 
 load_dotenv()
 
-class ConversationMemory:
-    def __init__(self):
-        self.history: List[str] = []
-        self.known_trip_data = {}  
+# Default end-to-end budget for /main-agent, in seconds, and each stage's share of it.
+# Flights start only after the IATA lookups, so 0.2 + 0.7 + 0.1 keeps the critical
+# path inside the budget; hotels run alongside and may use up to 0.9 of it.
+TRIP_TIME_BUDGET = float(os.environ.get("TRIP_TIME_BUDGET", "25"))
+STAGE_BUDGET_SHARES = {
+    "departure_iata": 0.2,
+    "arrival_iata": 0.2,
+    "flights": 0.7,
+    "hotels": 0.9,
+    "format": 0.1,
+}
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+# Words that end a city name in "weather in <city> <when>".
+MONTHS = ("january", "february", "march", "april", "may", "june", "july", "august", "september",
+          "october", "november", "december")
+DATE_WORDS = ("today", "tonight", "tomorrow", "on", "in", "this", "next", "during", "over", "for", "at",
+              "the", "weekend", "now", "around", "until", "when", "will", "be") + WEEKDAYS + MONTHS
+
+# weather_finder lines that carry no weather, only an error or a bad city.
+WEATHER_FAILURES = ("Error calling weather API", "Could not fetch weather for", "No weather forecast found for",
+                    "No city provided")
+
+# Organic results DestinationResearchAgent keeps from each of its searches.
+RESEARCH_RESULTS_PER_QUERY = 3
+
+# CHAT_SYNTHESIS=always restores the old behaviour of an extra LLM call on every chat turn.
+ALWAYS_SYNTHESIZE = os.environ.get("CHAT_SYNTHESIS", "auto").lower() == "always"
+CHAT_ASSEMBLY = METRICS.counter("chat_assembly_total", "Chat answers by how they were assembled.", ("mode",))
 
-    def add_user_message(self, message: str):
-        self.history.append(f"User: {message}")
 
-    def add_assistant_message(self, message: str):
-        self.history.append(f"Assistant: {message}")
+class TripPlannerAgent(BaseAgent):
+    deterministic_output = True
 
-    def update_trip_data(self, data: Dict[str, str]):
-        self.known_trip_data.update(data)
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
 
-    def get_trip_data_str(self) -> str:
-        """Return a single string describing known trip data."""
-        if not self.known_trip_data:
-            return ""
-        return " ".join(f"{k}:{v}" for k, v in self.known_trip_data.items())
-
-    def get_full_history(self) -> str:
-        return "\n".join(self.history)
+    def get_iata_code(self, city_name: str) -> str:
+        # Answer from the bundled airport index; only ask the LLM about places it doesn't know.
+        match = AIRPORT_INDEX.lookup(city_name)
+        if match:
+            return match.search_id
 
+        prompt = f"Please provide only the IATA airport code for the city: {city_name}."
+        response = self.call_llm([HumanMessage(content=prompt)])
+        answer = response.content.strip()
+        code = re.search(r"\b[A-Z]{3}\b", answer)
+        learned = AIRPORT_INDEX.learn(city_name, code.group(0)) if code else None
+        return learned.search_id if learned else answer
 
-class TripPlannerAgent(BaseAgent):
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+    async def aget_iata_code(self, city_name: str) -> str:
+        match = AIRPORT_INDEX.lookup(city_name)
+        if match:
+            return match.search_id
 
-    def get_iata_code(self, city_name: str) -> str:
         prompt = f"Please provide only the IATA airport code for the city: {city_name}."
-        response = self.llm.invoke([HumanMessage(content=prompt)])
-        return response.content.strip()
-
-    def format_flights_html(self, flight_data: list, departure_city: str, arrival_city: str) -> str:
-        """Build an HTML string with the top 3 flight options."""
-        if not flight_data:
-            return "<p>No flight data found.</p>"
-        
-        limited_flights = flight_data[:3]
-        html = f"<h2>Flights from {departure_city} to {arrival_city}</h2>"
-        for i, option in enumerate(limited_flights, start=1):
-            flight_list = option.get("flights", [])
-            if not flight_list:
-                continue
-            flight = flight_list[0]
-            airline = flight.get("airline", "Unknown Airline")
-            departure_time = flight["departure_airport"].get("time", "")
-            arrival_time = flight["arrival_airport"].get("time", "")
-            airplane = flight.get("airplane", "")
-            duration_minutes = flight.get("duration", 0)
-            hours = duration_minutes // 60
-            mins = duration_minutes % 60
-            duration_str = f"{hours}h {mins}m"
-            price = option.get("price", "N/A")
-            airline_logo = flight.get("airline_logo") or option.get("airline_logo", "")
-
-            html += f"""
-            <div style="border:1px solid #ddd; padding:10px; margin:10px 0;">
-              <h3>Option {i}: {airline}</h3>
-              <ul>
-                <li><strong>Departure:</strong> {departure_time}</li>
-                <li><strong>Arrival:</strong> {arrival_time}</li>
-                <li><strong>Duration:</strong> {duration_str}</li>
-                <li><strong>Aircraft:</strong> {airplane}</li>
-                <li><strong>Price:</strong> ${price}</li>
-                <li><strong>Airline Logo:</strong> 
-                    {f'<img src="{airline_logo}" alt="Airline Logo" width="60">' if airline_logo else 'N/A'}
-                </li>
-              </ul>
-            </div>
-            """
-        return html
-
-    def format_hotels_html(self, hotel_data: list, arrival_city: str) -> str:
-        """Build an HTML string with the top 3 hotel options."""
-        if not hotel_data:
-            return "<p>No hotel data found.</p>"
-        limited_hotels = hotel_data[:3]
-        html = f"<h2>Hotels in {arrival_city}</h2>"
-        for i, hotel in enumerate(limited_hotels, start=1):
-            name = hotel.get("name", "Unknown Hotel")
-            description = hotel.get("description", "")
-            rate_info = hotel.get("rate_per_night", {})
-            lowest_rate = rate_info.get("lowest", "N/A")
-            images = hotel.get("images", [])
-            thumbnail = images[0].get("thumbnail") if images else None
-
-            html += f"""
-            <div style="border:1px solid #ddd; padding:10px; margin:10px 0;">
-              <h3>Option {i}: {name}</h3>
-              <ul>
-                <li><strong>Description:</strong> {description}</li>
-                <li><strong>Rate per Night:</strong> {lowest_rate}</li>
-                <li><strong>Hotel Image:</strong> 
-                    {f'<img src="{thumbnail}" alt="Hotel Image" width="100">' if thumbnail else 'No image'}
-                </li>
-              </ul>
-            </div>
-            """
-        return html
+        response = await self.acall_llm([HumanMessage(content=prompt)])
+        answer = response.content.strip()
+        code = re.search(r"\b[A-Z]{3}\b", answer)
+        learned = AIRPORT_INDEX.learn(city_name, code.group(0)) if code else None
+        return learned.search_id if learned else answer
+
+    def _result(self, flight_results, hotel_results, departure_city: str, arrival_city: str) -> TripResult:
+        """Compact whichever sections arrived; a failed or late section is listed as missing."""
+        with span("render", "trip_result"):
+            missing = {}
+            sections = {}
+            for name, raw, compact in (("flights", flight_results, flight_options),
+                                       ("hotels", hotel_results, hotel_options)):
+                if isinstance(raw, AgentTimeout):
+                    missing[name] = "timeout"
+                elif isinstance(raw, Exception) or not isinstance(raw, list):
+                    # The tools report upstream failures as {"error": ...} rather than raising.
+                    missing[name] = "error"
+                else:
+                    sections[name] = compact(raw)
+            return TripResult(departure_city=departure_city, arrival_city=arrival_city,
+                              missing=missing, partial=bool(missing), **sections)
+
+    def _build_plan(self, departure_city: str, arrival_city: str, outbound_date: str,
+                    return_date: str, adults: int, children: int,
+                    run_tool, get_iata_code, time_budget: float) -> StagePlan:
+        """
+        The trip pipeline as a dependency-aware plan: both IATA lookups and the
+        hotel search start immediately, the flight search starts once both
+        codes are resolved, and the result is assembled last from whatever arrived.
+        Each stage gets STAGE_BUDGET_SHARES of `time_budget` seconds.
+        `run_tool` and `get_iata_code` are the sync or async variants.
+        """
+        def search_flights(departure_iata, arrival_iata):
+            return run_tool("flights_finder", {
+                "params": FlightsInput(
+                    departure_airport=departure_iata,
+                    arrival_airport=arrival_iata,
+                    outbound_date=outbound_date,
+                    return_date=return_date,
+                    adults=adults,
+                    children=children,
+                    infants_in_seat=0,
+                    infants_on_lap=0
+                )
+            })
+
+        def search_hotels():
+            return run_tool("hotels_finder", {
+                "params": HotelsInput(
+                    q=arrival_city,
+                    check_in_date=outbound_date,
+                    check_out_date=return_date,
+                    adults=adults,
+                    children=children,
+                    rooms=1,
+                    hotel_class=None
+                )
+            })
+
+        def format_results(flight_results, hotel_results):
+            return self._result(flight_results, hotel_results, departure_city, arrival_city)
+
+        share = {name: fraction * time_budget for name, fraction in STAGE_BUDGET_SHARES.items()}
+        plan = StagePlan()
+        plan.add("departure_iata", lambda: get_iata_code(departure_city), timeout=share["departure_iata"])
+        plan.add("arrival_iata", lambda: get_iata_code(arrival_city), timeout=share["arrival_iata"])
+        plan.add("hotels", search_hotels, timeout=share["hotels"])
+        plan.add("flights", search_flights, deps=("departure_iata", "arrival_iata"), timeout=share["flights"])
+        plan.add("format", format_results, deps=("flights", "hotels"), timeout=share["format"], tolerant=True)
+        return plan
+
+    def _plan_result(self, results: Dict, timings: Dict, departure_city: str, arrival_city: str) -> TripResult:
+        result = results["format"]
+        if isinstance(result, AgentTimeout):
+            # The deadline passed before formatting got its turn; it is cheap, so do it anyway.
+            result = self._result(results["flights"], results["hotels"], departure_city, arrival_city)
+        elif isinstance(result, Exception):
+            raise result
+        result.timings = timings
+        return result
+
+    def plan_trip(self, departure_city: str, arrival_city: str, outbound_date: str,
+                  return_date: str, adults: int = 1, children: int = 0,
+                  time_budget: Optional[float] = None) -> TripResult:
+        """
+        Run the trip pipeline within `time_budget` seconds (TRIP_TIME_BUDGET by
+        default). Sections not ready in time are listed in the result's `missing`.
+        """
+        time_budget = time_budget or TRIP_TIME_BUDGET
+        plan = self._build_plan(departure_city, arrival_city, outbound_date, return_date,
+                                adults, children, self.run_tool, self.get_iata_code, time_budget)
+        return self._plan_result(*plan.run(deadline=time_budget), departure_city, arrival_city)
+
+    async def aplan_trip(self, departure_city: str, arrival_city: str, outbound_date: str,
+                         return_date: str, adults: int = 1, children: int = 0,
+                         time_budget: Optional[float] = None) -> TripResult:
+        """Async variant of plan_trip(); stages that overrun their share are cancelled."""
+        time_budget = time_budget or TRIP_TIME_BUDGET
+        plan = self._build_plan(departure_city, arrival_city, outbound_date, return_date,
+                                adults, children, self.arun_tool, self.aget_iata_code, time_budget)
+        return self._plan_result(*await plan.arun(deadline=time_budget), departure_city, arrival_city)
+
+    @staticmethod
+    def _trip_args(thread_id) -> Dict:
+        # Retrieve trip details from the caller's session (thread_id is the session id).
+        with span("memory", "get_trip_data"):
+            trip = SESSIONS.get(thread_id).get_trip_data()
+        return dict(
+            departure_city=trip.get("departure_city", ""),
+            arrival_city=trip.get("arrival_city", ""),
+            outbound_date=trip.get("outbound_date", ""),
+            return_date=trip.get("return_date", ""),
+            adults=int(trip.get("adults", 1)),
+            children=int(trip.get("children", 0)),
+        )
+
+    @staticmethod
+    def _chat_answer(result: TripResult) -> str:
+        if {"flights", "hotels"} <= set(result.missing):
+            raise ToolFailure("Flight and hotel results are unavailable right now.")
+        return render_trip(result.model_dump())
 
     def invoke_agent(self, messages, thread_id):
-        # 1) Retrieve trip details from GLOBAL_MEMORY
-        departure_city = GLOBAL_MEMORY.known_trip_data.get("departure_city", "")
-        arrival_city = GLOBAL_MEMORY.known_trip_data.get("arrival_city", "")
-        outbound_date = GLOBAL_MEMORY.known_trip_data.get("outbound_date", "")
-        return_date = GLOBAL_MEMORY.known_trip_data.get("return_date", "")
-        adults = int(GLOBAL_MEMORY.known_trip_data.get("adults", 1))
-        children = int(GLOBAL_MEMORY.known_trip_data.get("children", 0))
-
-        # 2) Convert city names to IATA codes
-        departure_iata = self.get_iata_code(departure_city)
-        arrival_iata = self.get_iata_code(arrival_city)
-
-        # 3) Fetch flights and hotels using respective tools
-        flight_results = flights_finder({
-            "params": FlightsInput(
-                departure_airport=departure_iata,
-                arrival_airport=arrival_iata,
-                outbound_date=outbound_date,
-                return_date=return_date,
-                adults=adults,
-                children=children,
-                infants_in_seat=0,
-                infants_on_lap=0
-            )
-        })
-
-        hotel_results = hotels_finder({
-            "params": HotelsInput(
-                q=arrival_city,
-                check_in_date=outbound_date,
-                check_out_date=return_date,
-                adults=adults,
-                children=children,
-                rooms=1,
-                hotel_class=None
-            )
-        })
-
-        # 4) Format the results in HTML
-        flights_html = self.format_flights_html(flight_results, departure_city, arrival_city)
-        hotels_html = self.format_hotels_html(hotel_results, arrival_city)
-        final_html = f"<div>{flights_html}{hotels_html}</div>"
-        return final_html
+        return self._chat_answer(self.plan_trip(**self._trip_args(thread_id)))
+
+    async def ainvoke_agent(self, messages, thread_id):
+        return self._chat_answer(await self.aplan_trip(**self._trip_args(thread_id)))
 
 
 class DestinationResearchAgent(BaseAgent):
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+    cacheable_responses = True
+    system_prompt = ("You are the Destination Research Agent. Provide in-depth info if asked, "
+                     "using the web search results when they are relevant.")
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+
+    @staticmethod
+    def _search_input(messages, thread_id) -> Dict:
+        """The question and the destination's top attractions, searched together in one batch."""
+        question = messages[-1].content.rsplit("User:", 1)[-1].strip()
+        with span("memory", "get_trip_data"):
+            city = SESSIONS.get(thread_id).get_trip_data().get("arrival_city", "")
+        queries = [f"{question} {city}".strip()]
+        if city:
+            queries.append(f"top attractions in {city}")
+        return {"queries": queries, "max_results_per_query": RESEARCH_RESULTS_PER_QUERY}
+
+    def _system_message(self, batch: Dict) -> SystemMessage:
+        # search_internet_batch already dropped URLs found by more than one query.
+        found = [f"- {r['title']} ({r['link']}): {r['snippet']}" for r in batch.get("results", [])]
+        if not found:
+            return SystemMessage(content=self.system_prompt)
+        return SystemMessage(content=self.system_prompt + "\n\nWeb search results:\n" + "\n".join(found))
 
     def invoke_agent(self, messages, thread_id):
-        system_msg = SystemMessage(content="You are the Destination Research Agent. Provide in-depth info if asked.")
-        all_msgs = [system_msg] + messages
-        response = self.llm.invoke(all_msgs)
+        batch = self.run_tool("search_internet_batch", self._search_input(messages, thread_id))
+        all_msgs = [self._system_message(batch)] + messages
+        response = self.call_llm(all_msgs)
+        return response.content
+
+    async def ainvoke_agent(self, messages, thread_id):
+        batch = await self.arun_tool("search_internet_batch", self._search_input(messages, thread_id))
+        response = await self.acall_llm([self._system_message(batch)] + messages)
         return response.content
 
 
 class AccommodationAgent(BaseAgent):
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+    cacheable_responses = True
+    system_prompt = "You are the Accommodation Agent. Provide advanced hotel info if asked."
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
 
     def invoke_agent(self, messages, thread_id):
-        system_msg = SystemMessage(content="You are the Accommodation Agent. Provide advanced hotel info if asked.")
+        system_msg = SystemMessage(content=self.system_prompt)
         all_msgs = [system_msg] + messages
-        response = self.llm.invoke(all_msgs)
+        response = self.call_llm(all_msgs)
+        return response.content
+
+    async def ainvoke_agent(self, messages, thread_id):
+        system_msg = SystemMessage(content=self.system_prompt)
+        response = await self.acall_llm([system_msg] + messages)
         return response.content
 
 
 class TransportationAgent(BaseAgent):
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+    cacheable_responses = True
+    system_prompt = "You are the Transportation Agent. Provide local transport or flight details."
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
 
     def invoke_agent(self, messages, thread_id):
-        system_msg = SystemMessage(content="You are the Transportation Agent. Provide local transport or flight details.")
+        system_msg = SystemMessage(content=self.system_prompt)
         all_msgs = [system_msg] + messages
-        response = self.llm.invoke(all_msgs)
+        response = self.call_llm(all_msgs)
+        return response.content
+
+    async def ainvoke_agent(self, messages, thread_id):
+        system_msg = SystemMessage(content=self.system_prompt)
+        response = await self.acall_llm([system_msg] + messages)
         return response.content
 
 
 class WeatherAgent(BaseAgent):
-    def __init__(self):
+    deterministic_output = True
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
         # The LLM is still available for formatting if needed.
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
 
-    def invoke_agent(self, messages, thread_id):
+    @staticmethod
+    def _resolve_cities(user_query: str, trip: Dict[str, str]) -> str:
+        """Cities named after "weather ... in", ';'-separated for weather_finder; else the arrival city."""
+        city_match = re.search(r"weather.*?\bin\s+([a-z\s,&]+)", user_query)
+        if city_match:
+            # "in paris and london tomorrow" -> ["paris", "london"]
+            names = re.split(r"\b(?:%s)\b" % "|".join(DATE_WORDS), city_match.group(1))[0]
+            cities = [c.strip().title() for c in re.split(r",|&|\band\b", names) if c.strip()]
+            if cities:
+                return "; ".join(cities)
+        return trip.get("arrival_city", "")
+
+    @staticmethod
+    def _resolve_date(user_query: str, trip: Dict[str, str], today: Optional[date] = None) -> str:
         """
-        Parse the user query and known trip data to determine the city (and date if needed),
-        then call weather_finder to fetch real weather data.
-        Store the fetched weather info in memory for follow-up queries.
+        The day asked about, as YYYY-MM-DD: an explicit date, today/tomorrow,
+        a weekday or the weekend; otherwise the trip's outbound date if the
+        forecast reaches it. An empty string means current conditions.
         """
-        user_query = messages[-1].content.lower()
-        # Use arrival_city as fallback
-        arrival_city = GLOBAL_MEMORY.known_trip_data.get("arrival_city", "")
-        import re
-        city_match = re.search(r"weather.*in\s+([a-zA-Z\s]+)", user_query)
-        if city_match:
-            city = city_match.group(1).strip().title()
-        else:
-            city = arrival_city
+        today = today or date.today()
+        iso = re.search(r"\b\d{4}-\d{2}-\d{2}\b", user_query)
+        if iso:
+            return iso.group(0)
+        if "day after tomorrow" in user_query:
+            return (today + timedelta(days=2)).isoformat()
+        if "tomorrow" in user_query:
+            return (today + timedelta(days=1)).isoformat()
+        if re.search(r"\b(today|tonight|now|currently)\b", user_query):
+            return ""
+        for i, day in enumerate(WEEKDAYS):
+            if re.search(rf"\b{day}\b", user_query):
+                return (today + timedelta(days=(i - today.weekday()) % 7)).isoformat()
+        if "weekend" in user_query:
+            return (today + timedelta(days=(5 - today.weekday()) % 7)).isoformat()
+        outbound = parse_date(trip.get("outbound_date", ""))
+        if outbound and 0 <= (outbound - today).days < FORECAST_DAYS:
+            return outbound.isoformat()
+        return ""
+
+    def _tool_input(self, messages, memory: ConversationMemory) -> Dict[str, str]:
+        # ChatbotAgent sends "<context>\nUser: <question>"; only the question names the city and day.
+        user_query = messages[-1].content.rsplit("User:", 1)[-1].lower()
+        with span("memory", "get_trip_data"):
+            trip = memory.get_trip_data()
+        return {"city": self._resolve_cities(user_query, trip), "date_str": self._resolve_date(user_query, trip)}
+
+    @staticmethod
+    def _checked(weather_info: str) -> str:
+        """The answer, unless every line of it is an error (then ToolFailure)."""
+        lines = [line for line in str(weather_info).splitlines() if line.strip()]
+        if not lines or all(line.startswith(WEATHER_FAILURES) for line in lines):
+            raise ToolFailure(str(weather_info).strip() or "No weather information is available.")
+        return weather_info
 
-        # For this example, we ignore specific date queries.
-        weather_info = weather_finder(city)
+    def invoke_agent(self, messages, thread_id):
+        """
+        Parse the user query and known trip data to determine the cities and
+        the date, then answer from weather_finder's cached forecasts.
+        Store the weather info in memory for follow-up queries.
+        """
+        memory = SESSIONS.get(thread_id)
+        weather_info = self._checked(self.run_tool("weather_finder", self._tool_input(messages, memory)))
         # Store the weather info in memory for follow-ups
-        GLOBAL_MEMORY.update_trip_data({"weather_info": weather_info})
+        with span("memory", "update_trip_data"):
+            memory.update_trip_data({"weather_info": weather_info})
+        return weather_info
+
+    async def ainvoke_agent(self, messages, thread_id):
+        memory = SESSIONS.get(thread_id)
+        weather_info = self._checked(await self.arun_tool("weather_finder", self._tool_input(messages, memory)))
+        with span("memory", "update_trip_data"):
+            memory.update_trip_data({"weather_info": weather_info})
         return weather_info
 
 
 class ItineraryPlannerAgent(BaseAgent):
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+    cacheable_responses = True
+    system_prompt = "You are the Itinerary Planner Agent. Create day-by-day plans if asked."
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
 
     def invoke_agent(self, messages, thread_id):
-        system_msg = SystemMessage(content="You are the Itinerary Planner Agent. Create day-by-day plans if asked.")
+        system_msg = SystemMessage(content=self.system_prompt)
         all_msgs = [system_msg] + messages
-        response = self.llm.invoke(all_msgs)
+        response = self.call_llm(all_msgs)
+        return response.content
+
+    async def ainvoke_agent(self, messages, thread_id):
+        system_msg = SystemMessage(content=self.system_prompt)
+        response = await self.acall_llm([system_msg] + messages)
         return response.content
 
 
 class BudgetAnalystAgent(BaseAgent):
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
+    cacheable_responses = True
+    system_prompt = "You are the Budget Analyst Agent. Provide cost breakdowns if asked."
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=200)
 
     def invoke_agent(self, messages, thread_id):
-        system_msg = SystemMessage(content="You are the Budget Analyst Agent. Provide cost breakdowns if asked.")
+        system_msg = SystemMessage(content=self.system_prompt)
         all_msgs = [system_msg] + messages
-        response = self.llm.invoke(all_msgs)
+        response = self.call_llm(all_msgs)
+        return response.content
+
+    async def ainvoke_agent(self, messages, thread_id):
+        system_msg = SystemMessage(content=self.system_prompt)
+        response = await self.acall_llm([system_msg] + messages)
         return response.content
 
 
 class ChatbotAgent(BaseAgent):
-    def __init__(self, agents: Dict[str, BaseAgent], memory: ConversationMemory):
+    def __init__(self, agents: Dict[str, BaseAgent], memory: ConversationMemory,
+                 max_concurrency: int = 4, agent_timeout: float = 30.0,
+                 llm: Optional[ChatOpenAI] = None, prompt_token_budget: int = 800,
+                 router: Optional[QueryRouter] = None, always_synthesize: bool = ALWAYS_SYNTHESIZE,
+                 response_cache: Optional[LLMResponseCache] = None):
         self.agents = agents
+        self.response_cache = response_cache if response_cache is not None else RESPONSE_CACHE
+        self.always_synthesize = always_synthesize
         self.memory = memory
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=400)
+        self.max_concurrency = max_concurrency
+        self.agent_timeout = agent_timeout
+        self.prompt_token_budget = prompt_token_budget
+        self.router = router or QUERY_ROUTER
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=400)
 
     def decide_which_agents(self, user_query: str):
-        q_lower = user_query.lower()
-        chosen = []
-        if any(x in q_lower for x in ["flight", "plane", "airfare", "tickets"]):
-            chosen.append("TripPlanner")
-        if any(x in q_lower for x in ["weather", "umbrella", "rain"]):
-            chosen.append("Weather")
-        if any(x in q_lower for x in ["destination", "culture", "attractions"]):
-            chosen.append("DestinationResearch")
-        if any(x in q_lower for x in ["hotel", "accommodation"]):
-            chosen.append("Accommodation")
-        if any(x in q_lower for x in ["transport", "car rental", "train"]):
-            chosen.append("Transportation")
-        if "itinerary" in q_lower:
-            chosen.append("ItineraryPlanner")
-        if any(x in q_lower for x in ["budget", "cost", "price"]):
-            chosen.append("BudgetAnalyst")
-        if not chosen:
-            chosen = ["TripPlanner"]
-        return list(set(chosen))
-
-    def invoke_agent(self, messages, thread_id):
-        user_input = messages[-1].content
-        self.memory.add_user_message(user_input)
-
-        chosen_agents = self.decide_which_agents(user_input)
-        responses = {}
-
+        decision = self.router.route(user_query)
+        log_event("router.decision", agents=list(decision.agents), scores=decision.scores,
+                  fallback=decision.fallback)
+        return list(decision.agents)
+
+    def _start_turn(self, user_input: str):
+        """Record the user turn and pick the specialists; returns (context, chosen, agent messages)."""
+        # Token-budgeted context (trip data, summary of older turns, recent turns),
+        # taken before this turn is recorded so the question isn't repeated.
+        with span("memory", "get_prompt_context"):
+            context = self.memory.get_prompt_context(self.prompt_token_budget)
+        with span("memory", "add_message"):
+            self.memory.add_user_message(user_input)
+
+        with span("router", "decide_which_agents"):
+            chosen_agents = self.decide_which_agents(user_input)
+        combined_msg = f"{context}\nUser: {user_input}"
+        return context, chosen_agents, [HumanMessage(content=combined_msg)]
+
+    def _tasks(self, chosen_agents, agent_messages, thread_id, user_input: str, use_async: bool = False):
+        tasks = []
+        trip = None
+        shared_messages = None
         for name in chosen_agents:
             agent = self.agents.get(name)
             if not agent:
-                responses[name] = f"{name} Agent not found."
                 continue
-            combined_msg = f"Known trip data: {self.memory.get_trip_data_str()}\nUser: {user_input}"
-            try:
-                resp = agent.invoke_agent([HumanMessage(content=combined_msg)], thread_id)
-                responses[name] = f"{name} says:\n{resp}"
-            except Exception as e:
-                responses[name] = f"Error in {name}: {e}"
+            call = agent.ainvoke_agent if use_async else agent.invoke_agent
+            request = None
+            if agent.cacheable_responses:
+                if trip is None:
+                    with span("memory", "get_trip_data"):
+                        trip = self.memory.get_trip_data()
+                    # Without the session's history, the answer depends only on what the
+                    # cache key holds, so other sessions can reuse it.
+                    trip_context = build_prompt_context(trip_fields(trip), "", [], self.prompt_token_budget)
+                    shared_messages = [HumanMessage(content=f"{trip_context}\nUser: {user_input}")]
+                request = self.response_cache.prepare(name, agent.system_prompt, user_input, trip)
+            if request is None:
+                tasks.append((name, lambda call=call: call(agent_messages, thread_id)))
+                continue
+            with span("cache", "llm_response"):
+                cached = self.response_cache.get(request)
+            tasks.append((name, self._cached_task(call, shared_messages, thread_id, request, cached, use_async)))
+        return tasks
+
+    def _cached_task(self, call, agent_messages, thread_id, request, cached, use_async: bool):
+        """A fan-out task that answers from the cache, or calls the agent and stores its answer."""
+        def store(answer):
+            if isinstance(answer, str) and answer.strip():
+                self.response_cache.put(request, answer)
+            return answer
+
+        if use_async:
+            async def run():
+                return cached if cached is not None else store(await call(agent_messages, thread_id))
+        else:
+            def run():
+                return cached if cached is not None else store(call(agent_messages, thread_id))
+        return run
+
+    @staticmethod
+    def _describe(name: str, resp) -> str:
+        if isinstance(resp, AgentTimeout):
+            return f"{name} did not respond in time."
+        if isinstance(resp, UpstreamUnavailable):
+            return f"{name} is temporarily unavailable ({resp})."
+        if isinstance(resp, ToolFailure):
+            return f"{name}: {resp}"
+        if isinstance(resp, Exception):
+            return f"Error in {name}: {resp}"
+        return f"{name} says:\n{resp}"
+
+    def _collect(self, chosen_agents, results) -> Dict[str, str]:
+        responses = {}
+        for name in chosen_agents:
+            if name not in results:
+                responses[name] = f"{name} Agent not found."
+            else:
+                responses[name] = self._describe(name, results[name])
+        return responses
 
+    @staticmethod
+    def _synthesis_prompt(user_input: str, responses: Dict[str, str], context: str) -> str:
         combined = "\n".join(responses.values())
-        final_prompt = (
+        return (
             f"User asked: {user_input}\n"
             f"Here are the agent outputs:\n{combined}\n"
-            f"Use known trip data: {self.memory.get_trip_data_str()}\n"
+            f"Use this context:\n{context}\n"
             "Combine them into a single helpful answer."
         )
-        final_response = self.llm.invoke([HumanMessage(content=final_prompt)])
-        answer = final_response.content
 
-        self.memory.add_assistant_message(answer)
+    def _assemble(self, user_input: str, chosen_agents, results, context: str):
+        """
+        Decide how to turn the specialist outputs into the answer. Returns
+        (answer, None) when no LLM is needed, or (None, synthesis prompt):
+          - nothing succeeded: the failure notes, as is
+          - one output: passed through, with notes for any that failed
+          - only deterministic outputs (weather, trip plan): one section each
+          - anything else (outputs that may overlap or disagree): synthesized
+        """
+        ok = {name: results[name].strip() for name in chosen_agents
+              if isinstance(results.get(name), str) and results[name].strip()}
+        notes = [self._describe(name, results[name]) if name in results else f"{name} Agent not found."
+                 for name in chosen_agents if name not in ok]
+
+        if self.always_synthesize and ok:
+            mode = "synthesized"
+        elif not ok:
+            mode = "failed"
+        elif len(ok) == 1:
+            mode = "passthrough"
+        elif all(getattr(self.agents.get(name), "deterministic_output", False) for name in ok):
+            mode = "template"
+        else:
+            mode = "synthesized"
+        CHAT_ASSEMBLY.inc(mode=mode)
+
+        if mode == "synthesized":
+            return None, self._synthesis_prompt(user_input, self._collect(chosen_agents, results), context)
+        if mode == "template":
+            sections = [f"**{name}**\n{text}" for name, text in ok.items()]
+        else:
+            sections = list(ok.values())
+        return "\n\n".join(sections + notes), None
+
+    def invoke_agent(self, messages, thread_id):
+        user_input = messages[-1].content
+        context, chosen_agents, agent_messages = self._start_turn(user_input)
+
+        # Fan out to the specialists concurrently; latency tracks the slowest one.
+        tasks = self._tasks(chosen_agents, agent_messages, thread_id, user_input)
+        results = run_fanout(tasks, max_workers=self.max_concurrency, timeout=self.agent_timeout)
+
+        answer, final_prompt = self._assemble(user_input, chosen_agents, results, context)
+        if final_prompt is not None:
+            answer = self.call_llm([HumanMessage(content=final_prompt)]).content
+
+        with span("memory", "add_message"):
+            self.memory.add_assistant_message(answer)
         return answer
+
+    async def ainvoke_agent(self, messages, thread_id):
+        user_input = messages[-1].content
+        context, chosen_agents, agent_messages = self._start_turn(user_input)
+
+        tasks = self._tasks(chosen_agents, agent_messages, thread_id, user_input, use_async=True)
+        results = await arun_fanout(tasks, max_workers=self.max_concurrency, timeout=self.agent_timeout)
+
+        answer, final_prompt = self._assemble(user_input, chosen_agents, results, context)
+        if final_prompt is not None:
+            answer = (await self.acall_llm([HumanMessage(content=final_prompt)])).content
+
+        with span("memory", "add_message"):
+            self.memory.add_assistant_message(answer)
+        return answer
+
+    def stream_agent(self, messages, thread_id) -> Iterator[Dict]:
+        """
+        Same flow as invoke_agent(), but yields events as work completes:
+          {"event": "agent", "data": {"agent": name, "output": text}}  per specialist
+          {"event": "token", "data": {"text": chunk}}                   per answer chunk
+          {"event": "done",  "data": {"answer": full_answer}}
+        """
+        user_input = messages[-1].content
+        context, chosen_agents, agent_messages = self._start_turn(user_input)
+
+        results = {}
+        tasks = self._tasks(chosen_agents, agent_messages, thread_id, user_input)
+        for name, resp in iter_fanout(tasks, max_workers=self.max_concurrency, timeout=self.agent_timeout):
+            results[name] = resp
+            yield {"event": "agent", "data": {"agent": name, "output": self._describe(name, resp)}}
+
+        answer, final_prompt = self._assemble(user_input, chosen_agents, results, context)
+        if final_prompt is None:
+            # Assembled without an LLM: the whole answer is one chunk.
+            yield {"event": "token", "data": {"text": answer}}
+        else:
+            chunks = []
+            for chunk in self.stream_llm([HumanMessage(content=final_prompt)]):
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield {"event": "token", "data": {"text": chunk.content}}
+            answer = "".join(chunks)
+
+        with span("memory", "add_message"):
+            self.memory.add_assistant_message(answer)
+        yield {"event": "done", "data": {"answer": answer}}
+
+    async def astream_agent(self, messages, thread_id) -> AsyncIterator[Dict]:
+        """Async variant of stream_agent(), yielding the same events."""
+        user_input = messages[-1].content
+        context, chosen_agents, agent_messages = self._start_turn(user_input)
+
+        results = {}
+        tasks = self._tasks(chosen_agents, agent_messages, thread_id, user_input, use_async=True)
+        async for name, resp in aiter_fanout(tasks, max_workers=self.max_concurrency, timeout=self.agent_timeout):
+            results[name] = resp
+            yield {"event": "agent", "data": {"agent": name, "output": self._describe(name, resp)}}
+
+        answer, final_prompt = self._assemble(user_input, chosen_agents, results, context)
+        if final_prompt is None:
+            # Assembled without an LLM: the whole answer is one chunk.
+            yield {"event": "token", "data": {"text": answer}}
+        else:
+            chunks = []
+            async for chunk in self.astream_llm([HumanMessage(content=final_prompt)]):
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield {"event": "token", "data": {"text": chunk.content}}
+            answer = "".join(chunks)
+
+        with span("memory", "add_message"):
+            self.memory.add_assistant_message(answer)
+        yield {"event": "done", "data": {"answer": answer}}
@@ -0,0 +1,67 @@
+# agents/registry.py
+
+import threading
+from typing import Callable, Dict, Optional
+from langchain_openai import ChatOpenAI
+from agents.base.base_agent import BaseAgent
+from agents.multi_agents import (
+    TripPlannerAgent,
+    DestinationResearchAgent,
+    AccommodationAgent,
+    TransportationAgent,
+    WeatherAgent,
+    ItineraryPlannerAgent,
+    BudgetAnalystAgent,
+    ChatbotAgent,
+)
+from memory import ConversationMemory
+
+
+def default_llm_factory(model: str, temperature: float, max_tokens: int) -> ChatOpenAI:
+    return ChatOpenAI(model=model, temperature=temperature, max_tokens=max_tokens)
+
+
+class AgentRegistry:
+    """
+    Application-scoped agents and LLM clients, built once at startup.
+
+    The specialist agents hold no per-request state, so a single instance of
+    each (and a single ChatOpenAI client per configuration, with its HTTP
+    connection pool) is shared by every concurrent request. Per-request state
+    lives only in the lightweight ChatbotAgent returned by chatbot().
+    """
+
+    def __init__(self, llm_factory: Optional[Callable[[str, float, int], ChatOpenAI]] = None,
+                 model: str = "gpt-4o-mini"):
+        self.model = model
+        self._llm_factory = llm_factory or default_llm_factory
+        self._llms: Dict[tuple, ChatOpenAI] = {}
+        self._lock = threading.Lock()
+
+        specialist_llm = self.llm(temperature=0.7, max_tokens=200)
+        self.chat_llm = self.llm(temperature=0.7, max_tokens=400)
+        self.agents: Dict[str, BaseAgent] = {
+            "TripPlanner": TripPlannerAgent(llm=specialist_llm),
+            "DestinationResearch": DestinationResearchAgent(llm=specialist_llm),
+            "Accommodation": AccommodationAgent(llm=specialist_llm),
+            "Transportation": TransportationAgent(llm=specialist_llm),
+            "Weather": WeatherAgent(llm=specialist_llm),
+            "ItineraryPlanner": ItineraryPlannerAgent(llm=specialist_llm),
+            "BudgetAnalyst": BudgetAnalystAgent(llm=specialist_llm),
+        }
+
+    def llm(self, temperature: float = 0.7, max_tokens: int = 200) -> ChatOpenAI:
+        """Return the shared client for this configuration, creating it on first use."""
+        key = (self.model, temperature, max_tokens)
+        with self._lock:
+            if key not in self._llms:
+                self._llms[key] = self._llm_factory(self.model, temperature, max_tokens)
+            return self._llms[key]
+
+    @property
+    def trip_planner(self) -> TripPlannerAgent:
+        return self.agents["TripPlanner"]
+
+    def chatbot(self, memory: ConversationMemory) -> ChatbotAgent:
+        """Per-request chatbot bound to the caller's memory, reusing the shared agents and client."""
+        return ChatbotAgent(agents=self.agents, memory=memory, llm=self.chat_llm)
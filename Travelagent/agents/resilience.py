@@ -0,0 +1,377 @@
+# agents/resilience.py
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream that is rate limited, saturated or down."""
+
+
+class RateLimited(UpstreamUnavailable):
+    pass
+
+
+class Overloaded(UpstreamUnavailable):
+    pass
+
+
+class CircuitOpen(UpstreamUnavailable):
+    pass
+
+
+class TokenBucket:
+    """`rate` tokens per second, bursting up to `burst`. rate <= 0 disables limiting."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token if one is available; otherwise return how long until the next one."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, max_wait: float) -> bool:
+        if self.rate <= 0:
+            return True
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._reserve()
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait: float) -> bool:
+        if self.rate <= 0:
+            return True
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._reserve()
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: grows by one per window of fast successes and is
+    cut multiplicatively when latency exceeds `target_latency` or a call fails.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int,
+                 target_latency: float, backoff: float = 0.7):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, max_wait: float) -> bool:
+        deadline = time.monotonic() + max_wait
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    async def aacquire(self, max_wait: float) -> bool:
+        # Slots are shared with threads, so poll rather than wait on a loop-bound primitive.
+        deadline = time.monotonic() + max_wait
+        delay = 0.005
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        return True
+
+    def release(self, latency: Optional[float], ok: bool):
+        """Free a slot; `latency` is None when the call was cancelled and says nothing about the upstream."""
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if latency is not None:
+                if not ok or latency > self.target_latency:
+                    # At most one cut per target interval, so a burst of slow replies counts once.
+                    if now - self._last_decrease >= self.target_latency:
+                        self.limit = max(self.min_limit, self.limit * self.backoff)
+                        self._last_decrease = now
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify()
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half_open after `reset_timeout` seconds, letting one probe through;
+    the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.state = "closed"
+                self.failures = 0
+            else:
+                self.failures += 1
+                if self.state == "half_open" or self.failures >= self.failure_threshold:
+                    self.state = "open"
+                    self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self):
+        """A cancelled probe tells us nothing; let the next caller probe instead."""
+        with self._lock:
+            self._probing = False
+
+
+class Upstream:
+    """
+    Rate limit, adaptive concurrency limit and circuit breaker for one
+    upstream service. call()/acall() fail fast with an UpstreamUnavailable
+    subclass instead of queueing behind an upstream that can't keep up.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int,
+                 min_concurrency: int, target_latency: float, failure_threshold: int,
+                 reset_timeout: float, max_wait: float):
+        self.name = name
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(initial=max_concurrency, min_limit=min_concurrency,
+                                       max_limit=max_concurrency, target_latency=target_latency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.counts = {"calls": 0, "ok": 0, "errors": 0, "rate_limited": 0,
+                       "overloaded": 0, "short_circuited": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _admit(self):
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpen(f"{self.name} circuit is open")
+
+    @staticmethod
+    def _judge(result: Any, failed: Optional[Callable[[Any], bool]]) -> bool:
+        return not (failed is not None and failed(result))
+
+    def _finish(self, start: Optional[float], ok: Optional[bool]):
+        """ok=None means cancelled: free the slot without judging the upstream."""
+        if ok is None:
+            self.limiter.release(None, True)
+            self.breaker.release_probe()
+            return
+        self.limiter.release(time.monotonic() - start, ok)
+        self.breaker.record(ok)
+        self._count("ok" if ok else "errors")
+
+    def _rejected(self, key: str, error: UpstreamUnavailable):
+        self.breaker.release_probe()
+        self._count(key)
+        raise error
+
+    def call(self, fn: Callable[[], Any], failed: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Run fn() under the limits. `failed(result)` marks a returned value as
+        an upstream failure, for tools that report errors instead of raising;
+        the value is still returned to the caller.
+        """
+        self._admit()
+        if not self.bucket.acquire(self.max_wait):
+            self._rejected("rate_limited", RateLimited(f"{self.name} rate limit exceeded"))
+        if not self.limiter.acquire(self.max_wait):
+            self._rejected("overloaded", Overloaded(f"{self.name} concurrency limit reached"))
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception:
+            self._finish(start, False)
+            raise
+        except BaseException:
+            self._finish(start, None)
+            raise
+        self._finish(start, self._judge(result, failed))
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]],
+                    failed: Optional[Callable[[Any], bool]] = None) -> Any:
+        self._admit()
+        if not await self.bucket.aacquire(self.max_wait):
+            self._rejected("rate_limited", RateLimited(f"{self.name} rate limit exceeded"))
+        if not await self.limiter.aacquire(self.max_wait):
+            self._rejected("overloaded", Overloaded(f"{self.name} concurrency limit reached"))
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except Exception:
+            self._finish(start, False)
+            raise
+        except BaseException:
+            # Cancellation (e.g. an agent timeout) isn't the upstream's fault.
+            self._finish(start, None)
+            raise
+        self._finish(start, self._judge(result, failed))
+        return result
+
+    def stream(self, fn: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """Like call(), for a streaming response; the slot is held until the stream ends."""
+        self._admit()
+        if not self.bucket.acquire(self.max_wait):
+            self._rejected("rate_limited", RateLimited(f"{self.name} rate limit exceeded"))
+        if not self.limiter.acquire(self.max_wait):
+            self._rejected("overloaded", Overloaded(f"{self.name} concurrency limit reached"))
+        start = time.monotonic()
+        ok = None
+        try:
+            yield from fn()
+            ok = True
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self._finish(start, ok)
+
+    async def astream(self, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        self._admit()
+        if not await self.bucket.aacquire(self.max_wait):
+            self._rejected("rate_limited", RateLimited(f"{self.name} rate limit exceeded"))
+        if not await self.limiter.aacquire(self.max_wait):
+            self._rejected("overloaded", Overloaded(f"{self.name} concurrency limit reached"))
+        start = time.monotonic()
+        ok = None
+        try:
+            async for item in fn():
+                yield item
+            ok = True
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self._finish(start, ok)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            "rate_per_second": self.bucket.rate,
+            "tokens": round(self.bucket.tokens, 2),
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            **counts,
+        }
+
+
+# Defaults per upstream; every field can be overridden with
+# RESILIENCE_<UPSTREAM>_<FIELD>, e.g. RESILIENCE_SERPAPI_RATE=2.
+UPSTREAM_DEFAULTS: Dict[str, Dict[str, float]] = {
+    "openai":      {"rate": 50, "burst": 20, "max_concurrency": 32, "target_latency": 8.0},
+    "serpapi":     {"rate": 5,  "burst": 10, "max_concurrency": 8,  "target_latency": 6.0},
+    "openweather": {"rate": 10, "burst": 10, "max_concurrency": 8,  "target_latency": 2.0},
+    "serper":      {"rate": 5,  "burst": 10, "max_concurrency": 8,  "target_latency": 3.0},
+    "browser":     {"rate": 2,  "burst": 4,  "max_concurrency": 4,  "target_latency": 10.0},
+}
+COMMON_DEFAULTS: Dict[str, float] = {
+    "min_concurrency": 1,
+    "failure_threshold": 5,
+    "reset_timeout": 30.0,
+    "max_wait": 2.0,   # Longest a caller queues for a token or a slot before failing fast
+}
+
+
+def _config(name: str) -> Dict[str, float]:
+    config = {**COMMON_DEFAULTS, "rate": 0, "burst": 1, "max_concurrency": 16, "target_latency": 5.0,
+              **UPSTREAM_DEFAULTS.get(name, {})}
+    for field in config:
+        value = os.environ.get(f"RESILIENCE_{name.upper()}_{field.upper()}")
+        if value is not None:
+            config[field] = float(value)
+    return config
+
+
+class UpstreamRegistry:
+    def __init__(self):
+        self._upstreams: Dict[str, Upstream] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Upstream:
+        with self._lock:
+            if name not in self._upstreams:
+                c = _config(name)
+                self._upstreams[name] = Upstream(
+                    name, rate=c["rate"], burst=int(c["burst"]),
+                    max_concurrency=int(c["max_concurrency"]), min_concurrency=int(c["min_concurrency"]),
+                    target_latency=c["target_latency"], failure_threshold=int(c["failure_threshold"]),
+                    reset_timeout=c["reset_timeout"], max_wait=c["max_wait"],
+                )
+            return self._upstreams[name]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            upstreams = dict(self._upstreams)
+        return {name: upstream.snapshot() for name, upstream in upstreams.items()}
+
+
+UPSTREAMS = UpstreamRegistry()
+
+
+def upstream(name: str) -> Upstream:
+    return UPSTREAMS.get(name)
+
@@ -0,0 +1,233 @@
+# agents/response_cache.py
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Trip fields that can change a specialist's answer. Everything else in the
+# session (history, weather_info, ...) is left out of the key.
+CONTEXT_FIELDS = ("departure_city", "arrival_city", "outbound_date", "return_date",
+                  "adults", "children", "additional_info")
+
+# Questions whose answer depends on the moment or on the conversation so far
+# are never served from (or written to) the cache.
+BYPASS_PATTERNS = (
+    r"\b(today|tonight|tomorrow|yesterday|now|currently|right now|this (week|weekend|morning|evening))\b",
+    r"\b(latest|current|live|open now|real[- ]time|up to date|breaking)\b",
+    r"\b(you (said|mentioned|suggested|recommended)|above|earlier|previous|last (one|answer)|that one|"
+    r"the (first|second|third|last) (one|option))\b",
+    r"\b(my|mine|our|ours)\s+(name|wife|husband|partner|kids?|children|son|daughter|mom|dad|family|"
+    r"allerg\w*|diet|disabilit\w*|wheelchair|preferences?)\b",
+    r"\b(i am|i'm|we are|we're)\s+(allergic|vegan|vegetarian|pregnant|disabled|celiac)\b",
+)
+
+STOPWORDS = frozenset(
+    "a an the and or of in on at to for from with about is are be can could would should will "
+    "do does what which who how where when me i you please some any tell give show find".split()
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_MERSENNE = (1 << 61) - 1
+
+
+def trip_fields(context: Dict[str, Any]) -> Dict[str, str]:
+    """The CONTEXT_FIELDS a session has set; all a cacheable agent is told about the trip."""
+    return {k: str(context[k]).strip() for k in CONTEXT_FIELDS if str(context.get(k) or "").strip()}
+
+
+def normalize_question(text: str) -> str:
+    """Case-folded words only, so punctuation and spacing don't change the key."""
+    return " ".join(_WORD.findall(text.casefold()))
+
+
+def _shingles(normalized: str) -> Set[str]:
+    # Content words plus adjacent pairs: word order matters a little, filler words not at all.
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+             for w in normalized.split() if w not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class MinHasher:
+    """
+    MinHash signatures over shingle sets, banded for LSH lookup: two sets
+    with Jaccard similarity s share at least one band with probability
+    1 - (1 - s^rows)^bands.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)]
+
+    def signature(self, shingles: Set[str]) -> Tuple[int, ...]:
+        if not shingles:
+            return ()
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+                  for s in shingles]
+        return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms)
+
+    def band_keys(self, scope: str, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [(scope, i, signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)] if signature else []
+
+    @staticmethod
+    def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        if not a or not b:
+            return 0.0
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+@dataclass(frozen=True)
+class CacheRequest:
+    """A prepared lookup: `scope` is agent + system prompt + trip, `key` adds the question."""
+    scope: str
+    key: str
+    signature: Tuple[int, ...]
+
+
+class LLMResponseCache:
+    """
+    Specialist answers keyed on (agent, system prompt, trip fields,
+    normalized question), with a TTL and an LRU bound on entries. Callers
+    must send a cacheable agent nothing else (no conversation history), so
+    one session's answer is safe to serve to another.
+
+    With `similarity` > 0, a miss on the exact key falls back to the most
+    similar cached question in the same scope whose estimated Jaccard
+    similarity (MinHash over content-word shingles) is at least `similarity`.
+    Questions matching BYPASS_PATTERNS skip the cache entirely.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 6 * 3600, similarity: float = 0.0,
+                 enabled: bool = True, bypass_patterns=BYPASS_PATTERNS, hasher: Optional[MinHasher] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.enabled = enabled
+        self.hasher = hasher or MinHasher()
+        self._bypass = re.compile("|".join(f"(?:{p})" for p in bypass_patterns), re.IGNORECASE)
+        # key -> (value, stored_at, request)
+        self._entries: "OrderedDict[str, Tuple[Any, float, CacheRequest]]" = OrderedDict()
+        self._bands: Dict[Tuple, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def prepare(self, agent: str, system_prompt: str, question: str,
+                context: Dict[str, Any]) -> Optional[CacheRequest]:
+        """Build the lookup for a question, or None when the cache must not be used for it."""
+        if not self.enabled:
+            return None
+        if self._bypass.search(question):
+            with self._lock:
+                self.bypassed += 1
+            return None
+        trip = {k: v.casefold() for k, v in trip_fields(context).items()}
+        scope = hashlib.sha1(json.dumps([agent, system_prompt, trip], sort_keys=True).encode("utf-8")).hexdigest()
+        normalized = normalize_question(question)
+        key = hashlib.sha1(f"{scope}\n{normalized}".encode("utf-8")).hexdigest()
+        signature = self.hasher.signature(_shingles(normalized)) if self.similarity > 0 else ()
+        return CacheRequest(scope, key, signature)
+
+    def get(self, request: CacheRequest) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._live(request.key, now)
+            if entry is not None:
+                self._entries.move_to_end(request.key)
+                self.hits += 1
+                return entry[0]
+            best, best_score = None, self.similarity
+            for band in self.hasher.band_keys(request.scope, request.signature):
+                for key in self._bands.get(band, ()):
+                    candidate = self._live(key, now)
+                    if candidate is None:
+                        continue
+                    score = self.hasher.similarity(request.signature, candidate[2].signature)
+                    if score >= best_score:
+                        best, best_score = key, score
+            if best is not None:
+                self._entries.move_to_end(best)
+                self.near_hits += 1
+                return self._entries[best][0]
+            self.misses += 1
+            return None
+
+    def put(self, request: CacheRequest, value: Any):
+        with self._lock:
+            self._remove(request.key)
+            self._entries[request.key] = (value, time.time(), request)
+            for band in self.hasher.band_keys(request.scope, request.signature):
+                self._bands.setdefault(band, set()).add(request.key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def _live(self, key: str, now: float):
+        # Caller holds the lock. Expired entries are dropped on sight.
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[1] > self.ttl:
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in self.hasher.band_keys(entry[2].scope, entry[2].signature):
+            keys = self._bands.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[band]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "name": "llm_responses",
+            "entries": len(self),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+def _build_cache() -> LLMResponseCache:
+    # LLM_CACHE_ENABLED      1 (default) | 0
+    # LLM_CACHE_MAX_ENTRIES  LRU bound
+    # LLM_CACHE_TTL          freshness window in seconds
+    # LLM_CACHE_SIMILARITY   0 = exact matches only; e.g. 0.8 to serve near-duplicate questions
+    return LLMResponseCache(
+        max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.environ.get("LLM_CACHE_TTL", str(6 * 3600))),
+        similarity=float(os.environ.get("LLM_CACHE_SIMILARITY", "0")),
+        enabled=os.environ.get("LLM_CACHE_ENABLED", "1") != "0",
+    )
+
+
+RESPONSE_CACHE = _build_cache()
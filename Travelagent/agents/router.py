@@ -0,0 +1,229 @@
+# agents/router.py
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# The intent table: for each agent, weighted keywords and a few example queries.
+#   keywords  term -> weight. Terms match whole words, and also their plurals
+#             ("hotel" matches "hotels"); hyphens count as spaces, and "#"
+#             matches any number ("# day" matches "3 days" and "3-day").
+#   examples  training sentences for the naive-Bayes fallback classifier.
+# Order matters: chosen agents are returned in table order.
+DEFAULT_INTENTS: Dict[str, Dict] = {
+    "TripPlanner": {
+        "keywords": {"flight": 1.0, "plane": 1.0, "airfare": 1.0, "ticket": 0.8, "fly": 0.8, "flying": 0.8,
+                     "airline": 1.0, "layover": 1.0, "nonstop": 1.0, "non stop": 1.0, "direct flight": 1.0,
+                     "departure": 0.6, "return flight": 1.0, "book a trip": 0.6},
+        "examples": ["find me flights from new york to london", "are there cheaper flights",
+                     "what time does the plane leave", "show earlier departures",
+                     "book airline tickets for two adults", "any nonstop options to tokyo"],
+    },
+    "Weather": {
+        "keywords": {"weather": 1.0, "umbrella": 1.0, "rain": 1.0, "rainy": 1.0, "forecast": 1.0,
+                     "temperature": 1.0, "sunny": 0.8, "snow": 0.8, "humid": 0.8, "climate": 0.8,
+                     "degrees": 0.6, "cold": 0.5, "hot": 0.4, "jacket": 0.6},
+        "examples": ["what is the weather like there", "will it rain during my trip",
+                     "should i bring a jacket", "how hot is it in july",
+                     "what temperature should i expect", "is it going to snow"],
+    },
+    "DestinationResearch": {
+        "keywords": {"destination": 1.0, "culture": 1.0, "attraction": 1.0, "sightseeing": 1.0,
+                     "sights": 1.0, "landmark": 1.0, "museum": 0.8, "things to do": 1.0, "history": 0.7,
+                     "local food": 0.8, "cuisine": 0.8, "neighborhood": 0.7, "safe": 0.5, "visa": 0.7,
+                     "language": 0.6, "customs": 0.7},
+        "examples": ["what are the must see places", "tell me about the local culture",
+                     "what should i visit in rome", "best things to do at night",
+                     "is the old town worth seeing", "what food is the city known for"],
+    },
+    "Accommodation": {
+        "keywords": {"hotel": 1.0, "accommodation": 1.0, "hostel": 1.0, "airbnb": 1.0, "lodging": 1.0,
+                     "resort": 1.0, "bnb": 1.0, "place to stay": 1.0, "where to stay": 1.0, "room": 0.6,
+                     "check in": 0.6, "suite": 0.7, "stay": 0.4},
+        "examples": ["where should we stay", "find a cheaper hotel near the center",
+                     "is breakfast included in the room", "suggest a family friendly place to sleep",
+                     "what time is check in", "any boutique stays with a pool"],
+    },
+    "Transportation": {
+        "keywords": {"transport": 1.0, "transportation": 1.0, "car rental": 1.0, "rent a car": 1.0,
+                     "rental car": 1.0, "train": 1.0, "bus": 0.8, "metro": 0.8, "subway": 0.8, "taxi": 0.8,
+                     "uber": 0.8, "ferry": 0.8, "transfer": 0.6, "getting around": 1.0, "get around": 1.0,
+                     "shuttle": 0.8, "drive": 0.5},
+        "examples": ["how do i get from the airport to the city", "is public transit easy to use",
+                     "should we rent a car", "how do i get around downtown",
+                     "is there a shuttle to the hotel", "how long is the ride to the station"],
+    },
+    "ItineraryPlanner": {
+        "keywords": {"itinerary": 1.0, "day by day": 1.0, "schedule": 0.7,
+                     "day trip": 0.8, "plan my": 0.6, "agenda": 0.8, "# day": 0.7,
+                     "weekend": 0.5},
+        "examples": ["plan three days in paris", "make me a schedule for the trip",
+                     "what should we do each day", "organize our week with museums and parks",
+                     "suggest a 2 day plan", "how should i split my time between cities"],
+    },
+    "BudgetAnalyst": {
+        "keywords": {"budget": 1.0, "cost": 1.0, "price": 0.8, "how much": 1.0, "expensive": 0.8,
+                     "cheap": 0.7, "cheaper": 0.7, "afford": 1.0, "spend": 0.8, "money": 0.7,
+                     "currency": 0.7, "total": 0.4, "fee": 0.5},
+        "examples": ["how much will the whole trip cost", "can we do this for under 2000 dollars",
+                     "break down our expenses", "is it expensive to eat out",
+                     "what is the total for flights and hotel", "how much cash should i bring"],
+    },
+}
+
+DEFAULT_AGENT = "TripPlanner"
+
+
+WORD = re.compile(r"[a-z0-9]+")
+# Keyword terms may also use "#" as a placeholder for any number.
+TERM_WORD = re.compile(r"[a-z0-9]+|#")
+
+
+def _stem(token: str) -> str:
+    if token.isdigit():
+        return "#"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("es") and token[-3] in "sxz":
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _tokens(text: str, pattern: re.Pattern = WORD) -> List[str]:
+    return [_stem(t) for t in pattern.findall(text.lower())]
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes over stemmed word tokens, with add-one smoothing."""
+
+    def __init__(self, examples: Dict[str, List[str]]):
+        self.labels = list(examples)
+        counts = {label: Counter(t for text in texts for t in _tokens(text)) for label, texts in examples.items()}
+        self.vocab = set().union(*counts.values()) if counts else set()
+        total_docs = sum(len(texts) for texts in examples.values()) or 1
+        self.log_priors = {label: math.log(max(1, len(texts)) / total_docs) for label, texts in examples.items()}
+        # Precomputed log P(token | label) for the whole vocabulary, so prediction is only lookups.
+        size = len(self.vocab) or 1
+        self.log_likelihood = {}
+        for label, c in counts.items():
+            denom = math.log(sum(c.values()) + size)
+            self.log_likelihood[label] = {t: math.log(c[t] + 1) - denom for t in self.vocab}
+
+    def predict(self, tokens: List[str]) -> Dict[str, float]:
+        """Posterior per label for stemmed `tokens`; the priors when no known words appear."""
+        tokens = [t for t in tokens if t in self.vocab]
+        logp = {label: self.log_priors[label] + sum(self.log_likelihood[label][t] for t in tokens)
+                for label in self.labels}
+        top = max(logp.values(), default=0.0)
+        exp = {label: math.exp(v - top) for label, v in logp.items()}
+        norm = sum(exp.values())
+        return {label: v / norm for label, v in exp.items()}
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    agents: Tuple[str, ...]
+    scores: Dict[str, float]          # Confidence per agent, 0..1
+    matched: Dict[str, Tuple[str, ...]]  # Keyword hits per agent
+    fallback: bool                    # True when nothing cleared the threshold
+
+
+class QueryRouter:
+    """
+    Picks the specialist agents for a chat query.
+
+    All keywords of all intents are compiled into one phrase table keyed by
+    stemmed tokens, so a query is tokenized and scanned once regardless of
+    table size. Keyword evidence per agent (1 - e^-sum(weights)) is combined
+    with a naive-Bayes classifier trained on the table's examples, which catches
+    phrasings with no keyword at all. Agents whose confidence clears
+    `threshold` are chosen (at most `max_agents`, highest first); when none
+    do, the best agent is used if it reaches `min_fallback`, otherwise
+    `default_agent`.
+    """
+
+    def __init__(self, intents: Optional[Dict[str, Dict]] = None, threshold: float = 0.5,
+                 max_agents: int = 3, classifier_weight: float = 0.6, min_fallback: float = 0.15,
+                 default_agent: str = DEFAULT_AGENT):
+        self.intents = intents or DEFAULT_INTENTS
+        self.threshold = threshold
+        self.max_agents = max_agents
+        self.classifier_weight = classifier_weight
+        self.min_fallback = min_fallback
+        self.default_agent = default_agent
+        self.order = list(self.intents)
+
+        # Stemmed token tuple -> [(agent, term, weight)]; a phrase may count for several agents.
+        self._phrases: Dict[Tuple[str, ...], List[Tuple[str, str, float]]] = {}
+        for agent, spec in self.intents.items():
+            for term, weight in spec.get("keywords", {}).items():
+                self._phrases.setdefault(tuple(_tokens(term, TERM_WORD)), []).append((agent, term, float(weight)))
+        self._longest = max((len(p) for p in self._phrases), default=0)
+        self._classifier = NaiveBayes({a: s.get("examples", []) for a, s in self.intents.items() if s.get("examples")})
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "QueryRouter":
+        """Load an intent table (same shape as DEFAULT_INTENTS) from JSON."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def _keyword_hits(self, tokens: List[str]) -> Dict[str, Dict[str, float]]:
+        # One left-to-right pass over the tokens, taking the longest phrase at each position.
+        hits: Dict[str, Dict[str, float]] = {}
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self._longest, len(tokens) - i), 0, -1):
+                entries = self._phrases.get(tuple(tokens[i:i + n]))
+                if entries:
+                    for agent, term, weight in entries:
+                        hits.setdefault(agent, {})[term] = weight
+                    i += n
+                    break
+            else:
+                i += 1
+        return hits
+
+    def route(self, query: str) -> RouteDecision:
+        tokens = _tokens(query)
+        hits = self._keyword_hits(tokens)
+        posterior = self._classifier.predict(tokens)
+        # With no known words the posterior is just the prior; don't let it pick an agent.
+        uniform = 1.0 / max(1, len(posterior))
+        scores = {}
+        for agent in self.order:
+            keyword = 1.0 - math.exp(-sum(hits.get(agent, {}).values()))
+            learned = max(0.0, posterior.get(agent, 0.0) - uniform) / (1.0 - uniform) if posterior else 0.0
+            scores[agent] = round(1.0 - (1.0 - keyword) * (1.0 - self.classifier_weight * learned), 4)
+
+        ranked = sorted((a for a in self.order if scores[a] >= self.threshold), key=lambda a: -scores[a])
+        chosen = set(ranked[:self.max_agents])
+        fallback = not chosen
+        if fallback:
+            best = max(self.order, key=lambda a: scores[a])
+            chosen = {best if scores[best] >= self.min_fallback else self.default_agent}
+        return RouteDecision(
+            agents=tuple(a for a in self.order if a in chosen) or (self.default_agent,),
+            scores=scores,
+            matched={agent: tuple(terms) for agent, terms in hits.items()},
+            fallback=fallback,
+        )
+
+
+def _build_router() -> QueryRouter:
+    # ROUTER_INTENTS_PATH points at a JSON intent table to use instead of DEFAULT_INTENTS.
+    path = os.environ.get("ROUTER_INTENTS_PATH")
+    kwargs = dict(
+        threshold=float(os.environ.get("ROUTER_THRESHOLD", "0.5")),
+        max_agents=int(os.environ.get("ROUTER_MAX_AGENTS", "3")),
+        default_agent=os.environ.get("ROUTER_DEFAULT_AGENT", DEFAULT_AGENT),
+    )
+    return QueryRouter.from_file(path, **kwargs) if path else QueryRouter(**kwargs)
+
+
+QUERY_ROUTER = _build_router()
@@ -0,0 +1,106 @@
+# agents/trip_result.py
+
+import math
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from tools.flight_table import FlightTable
+
+TOP_OPTIONS = 3  # Flight and hotel options returned per trip
+
+
+class FlightOption(BaseModel):
+    airline: str
+    airline_logo: Optional[str] = None
+    departure_time: str = ""
+    arrival_time: str = ""
+    duration: Optional[int] = Field(None, description="Total minutes, layovers included")
+    stops: int = 0
+    airplane: Optional[str] = None
+    price: Optional[float] = None
+    carbon_kg: Optional[float] = None
+    pareto: bool = Field(False, description="No other option is both cheaper and faster")
+
+
+class HotelOption(BaseModel):
+    name: str
+    description: str = ""
+    rate_per_night: Optional[str] = Field(None, description="As displayed by the provider, e.g. '$120'")
+    price_per_night: Optional[float] = None
+    thumbnail: Optional[str] = None
+    link: Optional[str] = None
+
+
+class TripResult(BaseModel):
+    """
+    Everything /main-agent returns for a trip. Rendering is left to the
+    client (trip_templates.render_trip); sections that failed or ran out of
+    time are empty and listed in `missing` as "timeout" or "error".
+    """
+    departure_city: str
+    arrival_city: str
+    flights: List[FlightOption] = []
+    hotels: List[HotelOption] = []
+    missing: Dict[str, str] = {}
+    partial: bool = False
+    timings: Dict[str, float] = {}
+
+    def summary(self) -> str:
+        """Plain-text digest of the options, kept in conversation memory for follow-up questions."""
+        lines = [f"Trip options from {self.departure_city} to {self.arrival_city}:"]
+        for f in self.flights:
+            duration = f" ({f.duration // 60}h {f.duration % 60}m)" if f.duration else ""
+            lines.append(f"- Flight: {f.airline}, departs {f.departure_time}, arrives {f.arrival_time}"
+                         f"{duration}, {f.stops} stop(s), ${f.price if f.price is not None else 'N/A'}")
+        for h in self.hotels:
+            lines.append(f"- Hotel: {h.name}, {h.rate_per_night or 'N/A'} per night")
+        for section, reason in self.missing.items():
+            lines.append(f"- {section.capitalize()} unavailable ({reason})")
+        return "\n".join(lines)
+
+
+def _value(x) -> Optional[float]:
+    return None if math.isnan(x) else float(x)  # NaN marks a value SerpAPI left out
+
+
+def flight_options(raw: list, limit: int = TOP_OPTIONS, weights: Optional[Dict[str, float]] = None) -> List[FlightOption]:
+    """
+    The `limit` best-scoring of all SerpAPI flight options (see
+    FlightTable.score), each flagged if it is on the price/duration frontier.
+    """
+    table = FlightTable.from_options(raw)
+    frontier = table.pareto()
+    options = []
+    for row in table.order(weights)[:limit]:
+        option = table.options[row]
+        first = option["flights"][0]
+        options.append(FlightOption(
+            airline=first.get("airline", "Unknown Airline"),
+            airline_logo=first.get("airline_logo") or option.get("airline_logo"),
+            departure_time=first.get("departure_airport", {}).get("time", ""),
+            arrival_time=option["flights"][-1].get("arrival_airport", {}).get("time", ""),
+            duration=int(table.duration[row]) if _value(table.duration[row]) is not None else None,
+            stops=int(table.stops[row]),
+            airplane=first.get("airplane"),
+            price=_value(table.price[row]),
+            carbon_kg=round(table.carbon[row] / 1000, 1) if _value(table.carbon[row]) is not None else None,
+            pareto=bool(frontier[row]),
+        ))
+    return options
+
+
+def hotel_options(raw: list, limit: int = TOP_OPTIONS) -> List[HotelOption]:
+    options = []
+    for hotel in raw[:limit]:
+        rate = hotel.get("rate_per_night") or {}
+        images = hotel.get("images") or []
+        options.append(HotelOption(
+            name=hotel.get("name", "Unknown Hotel"),
+            description=hotel.get("description", ""),
+            rate_per_night=rate.get("lowest"),
+            price_per_night=rate.get("extracted_lowest"),
+            thumbnail=images[0].get("thumbnail") if images else None,
+            link=hotel.get("link"),
+        ))
+    return options
@@ -1,26 +1,98 @@
 # api.py
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import json
+import re
+import time
 import uuid
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage
-from agents.multi_agents import (
-    TripPlannerAgent,
-    DestinationResearchAgent,
-    AccommodationAgent,
-    TransportationAgent,
-    WeatherAgent,
-    ItineraryPlannerAgent,
-    BudgetAnalystAgent,
-    ChatbotAgent,
-    ConversationMemory 
-)
+from agents.registry import AgentRegistry
+from agents.resilience import UPSTREAMS
+from agents.response_cache import RESPONSE_CACHE
+from observability import METRICS, TRACE_ID, record_span
+from tools.browser_tools import BROWSER_SUMMARIZER
+from tools.http_client import aclose_async_client, http_client
+from tools.search_tools import search_stats
+from tools.serpapi_client import SERPAPI_CACHE
+from tools.tool_registry import tool_registry
+from tools.weather_forecast import WEATHER
 from dotenv import load_dotenv
 from typing import Optional
-from memory import GLOBAL_MEMORY  
+from memory import SESSIONS
 
 load_dotenv()
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the agents and their LLM clients once; every request shares them.
+    # A registry installed before startup (e.g. by the benchmark harness) is kept.
+    if getattr(app.state, "agents", None) is None:
+        app.state.agents = AgentRegistry()
+    yield
+    await aclose_async_client()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Gauges read from the caches, pools and upstream guards on every /metrics scrape.
+METRICS.register_stats("serpapi_cache", SERPAPI_CACHE.stats)
+METRICS.register_stats("llm_cache", RESPONSE_CACHE.stats)
+METRICS.register_stats("weather_cache", WEATHER.stats)
+METRICS.register_stats("browser_cache", BROWSER_SUMMARIZER.stats)
+METRICS.register_stats("search_cache", search_stats)
+METRICS.register_stats("tool_singleflight", tool_registry.stats)
+METRICS.register_stats("sessions", SESSIONS.stats)
+METRICS.register_stats("upstream", UPSTREAMS.snapshot, label="upstream")
+METRICS.register_stats("http_pool", lambda: http_client.stats()["hosts"], label="host")
+HTTP_REQUESTS = METRICS.counter("http_requests_total", "API requests by route and status.", ("route", "status"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Tag everything done for this request with one trace id, and time it per route."""
+    trace_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    token = TRACE_ID.set(trace_id)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[REQUEST_ID_HEADER] = trace_id
+        return response
+    finally:
+        # Label by route template rather than raw path, so unknown URLs can't blow up cardinality.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        record_span("http", route, time.perf_counter() - start)
+        HTTP_REQUESTS.inc(route=route, status=status)
+        TRACE_ID.reset(token)
+
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "session_id"
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def resolve_session_id(request: Request, response: Response) -> str:
+    """Take the session id from the header or cookie, or start a new session."""
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if not session_id or not _SESSION_ID_RE.match(session_id):
+        session_id = SESSIONS.new_session_id()
+    attach_session(response, session_id)
+    return session_id
+
+
+def attach_session(response: Response, session_id: str):
+    response.headers[SESSION_HEADER] = session_id
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 class TravelRequest(BaseModel):
@@ -31,15 +103,20 @@ class TravelRequest(BaseModel):
     adults: int
     children: int
     additional_info: Optional[str] = None
+    # Seconds the caller is willing to wait; sections not ready by then come back flagged as missing.
+    time_budget: Optional[float] = Field(default=None, gt=0, le=120)
 
 @app.get("/")
 async def welcome():
     return {"message": "Welcome to AI Travel Agent API with Chatbot and Multi-Agents!"}
 
 @app.post("/main-agent")
-async def main_agent(req: TravelRequest):
+async def main_agent(req: TravelRequest, request: Request, response: Response):
+    session_id = resolve_session_id(request, response)
+    memory = SESSIONS.get(session_id)
+
     # Update memory with the trip data
-    GLOBAL_MEMORY.update_trip_data({
+    memory.update_trip_data({
         "departure_city": req.departure_airport,
         "arrival_city": req.arrival_airport,
         "outbound_date": req.outbound_date,
@@ -48,46 +125,65 @@ async def main_agent(req: TravelRequest):
         "children": str(req.children),
     })
     if req.additional_info:
-        GLOBAL_MEMORY.update_trip_data({"additional_info": req.additional_info})
-
-    prompt = (
-        f"Departure city: {req.departure_airport}, "
-        f"Arrival city: {req.arrival_airport}, "
-        f"Outbound: {req.outbound_date}, Return: {req.return_date}, "
-        f"Adults: {req.adults}, Children: {req.children}. "
-        f"Additional: {req.additional_info or ''}"
-    )
-    thread_id = str(uuid.uuid4())
-    messages = [HumanMessage(content=prompt)]
+        memory.update_trip_data({"additional_info": req.additional_info})
 
     # For the main "get flight/hotel" logic, call TripPlannerAgent directly:
-    agent = TripPlannerAgent()
-    result = agent.invoke_agent(messages, thread_id)
+    agent = request.app.state.agents.trip_planner
+    plan = await agent.aplan_trip(
+        departure_city=req.departure_airport,
+        arrival_city=req.arrival_airport,
+        outbound_date=req.outbound_date,
+        return_date=req.return_date,
+        adults=req.adults,
+        children=req.children,
+        time_budget=req.time_budget,
+    )
 
-    # Also store the assistant's reply in memory
-    GLOBAL_MEMORY.add_assistant_message(result)
-    return {"result": result}
+    # Memory keeps a plain-text digest for follow-up questions; the client renders the options.
+    memory.add_assistant_message(plan.summary())
+    return {"result": plan.model_dump(exclude_none=True), "session_id": session_id}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text format: span latencies and errors, request counts, cache/pool/upstream gauges."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/upstreams")
+async def upstream_health():
+    """Rate limiter, concurrency limit and circuit state for each upstream called so far."""
+    return UPSTREAMS.snapshot()
 
 class ChatRequest(BaseModel):
     query: str
 
 @app.post("/chat")
-async def chat_with_agent(req: ChatRequest):
-    thread_id = str(uuid.uuid4())
+async def chat_with_agent(req: ChatRequest, request: Request, response: Response):
+    # The session id doubles as the agents' thread_id, so they read this caller's memory.
+    session_id = resolve_session_id(request, response)
     user_msg = HumanMessage(content=req.query)
 
-    # Build the specialized agents
-    agents_dict = {
-        "TripPlanner": TripPlannerAgent(),
-        "DestinationResearch": DestinationResearchAgent(),
-        "Accommodation": AccommodationAgent(),
-        "Transportation": TransportationAgent(),
-        "Weather": WeatherAgent(),
-        "ItineraryPlanner": ItineraryPlannerAgent(),
-        "BudgetAnalyst": BudgetAnalystAgent()
-    }
-
-    # Pass the global memory to ChatbotAgent
-    chatbot_agent = ChatbotAgent(agents=agents_dict, memory=GLOBAL_MEMORY)
-    response = chatbot_agent.invoke_agent([user_msg], thread_id)
-    return {"result": response}
+    # The specialists are shared; only the chatbot bound to this request's memory is new.
+    chatbot_agent = request.app.state.agents.chatbot(SESSIONS.get(session_id))
+    answer = await chatbot_agent.ainvoke_agent([user_msg], session_id)
+    return {"result": answer, "session_id": session_id}
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request, response: Response):
+    """
+    Streaming variant of /chat (Server-Sent Events): an "agent" event as each
+    specialist finishes, "token" events while the answer is generated, then "done".
+    """
+    session_id = resolve_session_id(request, response)
+    chatbot_agent = request.app.state.agents.chatbot(SESSIONS.get(session_id))
+
+    async def events():
+        try:
+            async for item in chatbot_agent.astream_agent([HumanMessage(content=req.query)], session_id):
+                yield sse_event(item["event"], item["data"])
+        except Exception as e:
+            yield sse_event("error", {"message": str(e)})
+
+    stream = StreamingResponse(events(), media_type="text/event-stream",
+                               headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    attach_session(stream, session_id)
+    return stream
@@ -1,11 +1,13 @@
 import base64
-import re
 import json
+import uuid
 import requests
 import streamlit as st
+from trip_templates import render_trip
 
 MAIN_AGENT_URL = "http://localhost:8000/main-agent"
 CHAT_AGENT_URL = "http://localhost:8000/chat"
+CHAT_STREAM_URL = "http://localhost:8000/chat/stream"
 
 def set_background_image(image_file: str, overlay_opacity: float = 0.1):
     """Set a background image in the Streamlit app."""
@@ -58,73 +60,47 @@ def show_floating_chat_button():
         unsafe_allow_html=True
     )
 
-def build_flights_html(flight_data, departure_city, arrival_city):
-    """Convert up to 3 flights from the JSON into a nicely formatted HTML block."""
-    if not flight_data:
-        return "<p>No flight data found.</p>"
-
-    limited_flights = flight_data[:3]
-    html = f"<h2>Flights from {departure_city} to {arrival_city}</h2>"
-
-    for i, flight_option in enumerate(limited_flights, start=1):
-        # Each flight_option is typically a dict with "flights": [ {...} ], "price", etc.
-        flights_list = flight_option.get("flights", [])
-        if not flights_list:
-            continue
-
-        # We'll just use the first flight segment
-        flight = flights_list[0]
-        airline = flight.get("airline", "Unknown Airline")
-        departure_time = flight["departure_airport"].get("time", "")
-        arrival_time = flight["arrival_airport"].get("time", "")
-        price = flight_option.get("price", "N/A")
-        airline_logo = flight.get("airline_logo", "")
-
-        html += f"""
-        <div style="border:1px solid #ddd; padding:10px; margin:10px 0;">
-          <h3>Option {i}: {airline}</h3>
-          <ul>
-            <li><strong>Departure:</strong> {departure_time}</li>
-            <li><strong>Arrival:</strong> {arrival_time}</li>
-            <li><strong>Price:</strong> ${price}</li>
-            <li><strong>Airline Logo:</strong> 
-                {f'<img src="{airline_logo}" alt="Airline Logo" width="60">' if airline_logo else 'N/A'}
-            </li>
-          </ul>
-        </div>
-        """
-    return html
-
-def build_hotels_html(hotel_data, arrival_city):
-    """Convert up to 3 hotels from the JSON into a nicely formatted HTML block."""
-    if not hotel_data:
-        return "<p>No hotel data found.</p>"
-
-    limited_hotels = hotel_data[:3]
-    html = f"<h2>Hotels in {arrival_city}</h2>"
-
-    for i, hotel in enumerate(limited_hotels, start=1):
-        name = hotel.get("name", "Unknown Hotel")
-        description = hotel.get("description", "")
-        rate_info = hotel.get("rate_per_night", {})
-        lowest_rate = rate_info.get("lowest", "N/A")
-        images = hotel.get("images", [])
-        # Use the first image if available
-        thumbnail = images[0].get("thumbnail") if images else None
-
-        html += f"""
-        <div style="border:1px solid #ddd; padding:10px; margin:10px 0;">
-          <h3>Option {i}: {name}</h3>
-          <ul>
-            <li><strong>Description:</strong> {description}</li>
-            <li><strong>Rate per Night:</strong> {lowest_rate}</li>
-            <li><strong>Hotel Image:</strong> 
-                {f'<img src="{thumbnail}" alt="Hotel Image" width="100">' if thumbnail else 'No image'}
-            </li>
-          </ul>
-        </div>
-        """
-    return html
+def iter_sse(resp):
+    """
+    Yield (event, data) pairs from a Server-Sent Events response. An event
+    ends at a blank line; its data lines are joined with newlines and parsed
+    as one JSON value.
+    """
+    event, data = "message", []
+    for line in resp.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            value = line[len("data:"):]
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield event, json.loads("\n".join(data))
+
+def stream_chat_reply(user_query, headers):
+    """Render the /chat/stream reply as it arrives: agent progress first, then the answer."""
+    status = st.empty()
+    answer_box = st.empty()
+    finished_agents = []
+    answer = ""
+    with requests.post(CHAT_STREAM_URL, json={"query": user_query}, headers=headers, stream=True) as resp:
+        if resp.status_code != 200:
+            st.error("⚠️ Failed to process your query.")
+            return
+        for event, data in iter_sse(resp):
+            if event == "agent":
+                finished_agents.append(data["agent"])
+                status.caption("✅ " + ", ".join(finished_agents) + " done")
+            elif event == "token":
+                answer += data["text"]
+                answer_box.markdown(answer + "▌", unsafe_allow_html=True)
+            elif event == "done":
+                answer_box.markdown(data["answer"], unsafe_allow_html=True)
+            elif event == "error":
+                st.error(f"⚠️ {data['message']}")
 
 def main():
     st.set_page_config(page_title="AI Travel Agent", layout="centered")
@@ -132,6 +108,10 @@ def main():
 
     if "recommendations_done" not in st.session_state:
         st.session_state["recommendations_done"] = False
+    # One API session per browser session, so /chat sees the trip saved by /main-agent.
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    session_headers = {"X-Session-ID": st.session_state["session_id"]}
 
     st.title("AI Travel Agent")
 
@@ -162,40 +142,17 @@ def main():
                 "additional_info": additional_info
             }
             with st.spinner("Fetching recommendations..."):
-                resp = requests.post(MAIN_AGENT_URL, json=payload)
+                resp = requests.post(MAIN_AGENT_URL, json=payload, headers=session_headers)
             
             if resp.status_code == 200:
-                data = resp.json()
-                raw_result = data.get("result", "")
-
-                # The agent typically returns a string like:
-                # "Here are your flight and hotel options: { 'flights': [...], 'hotels': [...] }"
-                # We'll parse out the JSON portion.
-                pattern = r"Here are your flight.*options:\s*(\{.*\})"
-                match = re.search(pattern, raw_result, re.DOTALL)
-                if match:
-                    json_str = match.group(1)
-                    try:
-                        result_dict = json.loads(json_str)
-                        flight_data = result_dict.get("flights", [])
-                        hotel_data = result_dict.get("hotels", [])
-
-                        # Build the user-friendly HTML
-                        flights_html = build_flights_html(flight_data, departure_airport, arrival_airport)
-                        hotels_html = build_hotels_html(hotel_data, arrival_airport)
-                        final_html = f"<div>{flights_html}{hotels_html}</div>"
-
-                        st.success("✅ Here are your flight & hotel recommendations!")
-                        st.markdown(final_html, unsafe_allow_html=True)
-                        st.session_state["recommendations_done"] = True
-                    except json.JSONDecodeError:
-                        # If JSON parsing fails, fallback to raw HTML
-                        st.markdown(raw_result, unsafe_allow_html=True)
-                        st.session_state["recommendations_done"] = True
+                # The API returns the options as data; they are rendered here, once.
+                result = resp.json()["result"]
+                if result.get("partial"):
+                    st.warning("Some results are missing; see the notes below.")
                 else:
-                    # If the agent returns HTML directly, just show it
-                    st.markdown(raw_result, unsafe_allow_html=True)
-                    st.session_state["recommendations_done"] = True
+                    st.success("✅ Here are your flight & hotel recommendations!")
+                st.markdown(render_trip(result), unsafe_allow_html=True)
+                st.session_state["recommendations_done"] = True
             else:
                 st.error("⚠️ Failed to retrieve recommendations.")
 
@@ -211,14 +168,8 @@ def main():
         
         if st.button("Send Chat"):
             if user_query.strip():
-                with st.spinner("Assistant is thinking..."):
-                    resp = requests.post(CHAT_AGENT_URL, json={"query": user_query})
-                if resp.status_code == 200:
-                    data = resp.json()
-                    st.success("Assistant's Reply")
-                    st.markdown(data.get("result", "No data returned."), unsafe_allow_html=True)
-                else:
-                    st.error("⚠️ Failed to process your query.")
+                st.success("Assistant's Reply")
+                stream_chat_reply(user_query, session_headers)
             else:
                 st.error("Please enter your question.")
 
@@ -0,0 +1,375 @@
+# benchmarks/cassette.py
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+# Never written to a cassette or used in a match key.
+SECRET_PARAMS = {"api_key", "appid", "key", "token"}
+SECRET_HEADERS = {"x-api-key", "authorization", "cookie"}
+# Response headers worth keeping (revalidation and content type); the rest are dropped.
+KEPT_HEADERS = {"content-type", "etag", "last-modified", "cache-control", "retry-after"}
+
+
+class CassetteMiss(Exception):
+    """Replay found no recording for a request, and no recording of the same kind to fall back on."""
+
+
+def open_jsonl(path: str, mode: str):
+    return gzip.open(path, mode + "t", encoding="utf-8") if path.endswith(".gz") else open(path, mode, encoding="utf-8")
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _scrub(mapping: Optional[Dict]) -> Dict:
+    return {k: v for k, v in (mapping or {}).items() if str(k).lower() not in SECRET_PARAMS | SECRET_HEADERS}
+
+
+class Cassette:
+    """
+    Recorded upstream exchanges, one JSON object per line (gzip if the path
+    ends in .gz). Each entry has a `key` (exact request), a `group` (the kind
+    of request, e.g. "serpapi:google_flights") used as a fallback when the
+    exact request wasn't recorded, the response, and the recorded latency.
+    """
+
+    def __init__(self, path: str, strict: bool = False):
+        self.path = path
+        self.strict = strict
+        self.entries: Dict[str, List[Dict]] = defaultdict(list)
+        self.groups: Dict[str, List[Dict]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._out = None
+        self.hits = self.fallbacks = self.recorded = 0
+
+    @classmethod
+    def load(cls, path: str, strict: bool = False) -> "Cassette":
+        cassette = cls(path, strict)
+        with open_jsonl(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    cassette._index(json.loads(line))
+        return cassette
+
+    def _index(self, entry: Dict):
+        self.entries[entry["key"]].append(entry)
+        self.groups[entry["group"]].append(entry)
+
+    def record(self, key: str, group: str, request: Dict, response: Any, latency: float, **extra):
+        entry = {"key": key, "group": group, "request": request, "response": response,
+                 "latency": round(latency, 4), **extra}
+        with self._lock:
+            if self._out is None:
+                self._out = open_jsonl(self.path, "a")
+            self._out.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+            self._out.flush()
+            self.recorded += 1
+
+    def lookup(self, key: str, group: str) -> Dict:
+        """
+        The recording for `key`, cycling through repeats in recorded order.
+        Otherwise (unless strict) fall back to a recording from the same
+        group, picked deterministically from the key.
+        """
+        with self._lock:
+            if key in self.entries:
+                options = self.entries[key]
+                entry = options[self._cursor[key] % len(options)]
+                self._cursor[key] += 1
+                self.hits += 1
+                return entry
+            options = None if self.strict else self.groups.get(group)
+            if not options:
+                raise CassetteMiss(f"nothing recorded for {group} (key {key[:12]})")
+            self.fallbacks += 1
+            return options[int(key[:8], 16) % len(options)]
+
+    def close(self):
+        with self._lock:
+            if self._out is not None:
+                self._out.close()
+                self._out = None
+
+
+# --- HTTP (tools/http_client.py) ------------------------------------------------
+
+def _http_request(method: str, url: str, kwargs: Dict) -> Dict:
+    parts = urlsplit(url)
+    body = kwargs.get("json")
+    if body is None:
+        raw = kwargs.get("data") or kwargs.get("content")
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", "replace")
+        try:
+            body = json.loads(raw) if raw else None
+        except (TypeError, ValueError):
+            body = raw
+    return {
+        "method": method.upper(),
+        "url": f"{parts.scheme}://{parts.netloc}{parts.path}",
+        "params": _scrub(kwargs.get("params")),
+        "body": _scrub(body) if isinstance(body, dict) else body,
+    }
+
+
+def _http_response(status: int, headers, text: str) -> Dict:
+    try:
+        body = {"json": json.loads(text)}
+    except ValueError:
+        body = {"text": text}
+    return {"status": status, "headers": {k.lower(): v for k, v in headers.items() if k.lower() in KEPT_HEADERS},
+            **body}
+
+
+def _body_bytes(response: Dict) -> bytes:
+    if "json" in response:
+        return json.dumps(response["json"]).encode("utf-8")
+    return response.get("text", "").encode("utf-8")
+
+
+def _http_group(request: Dict) -> str:
+    return f"http:{request['method']} {request['url']}"
+
+
+def record_http(client, cassette: Cassette):
+    """Wrap an HttpClient instance so every request/response is written to `cassette`."""
+    sync_request, async_request = client.request, client.arequest
+
+    def request(method, url, **kwargs):
+        start = time.perf_counter()
+        response = sync_request(method, url, **kwargs)
+        req = _http_request(method, url, kwargs)
+        cassette.record(_digest(req), _http_group(req), req,
+                        _http_response(response.status_code, response.headers, response.text),
+                        time.perf_counter() - start)
+        return response
+
+    async def arequest(method, url, **kwargs):
+        start = time.perf_counter()
+        response = await async_request(method, url, **kwargs)
+        req = _http_request(method, url, kwargs)
+        cassette.record(_digest(req), _http_group(req), req,
+                        _http_response(response.status_code, response.headers, response.text),
+                        time.perf_counter() - start)
+        return response
+
+    real_astream = client.astream
+
+    @asynccontextmanager
+    async def astream(method, url, **kwargs):
+        start = time.perf_counter()
+        async with real_astream(method, url, **kwargs) as response:
+            # Read the whole body so it can be recorded; the caller still iterates it.
+            await response.aread()
+            req = _http_request(method, url, kwargs)
+            cassette.record(_digest(req), _http_group(req), req,
+                            _http_response(response.status_code, response.headers, response.text),
+                            time.perf_counter() - start)
+            yield response
+
+    client.request, client.arequest, client.astream = request, arequest, astream
+
+
+def replay_http(client, cassette: Cassette, latency_scale: float = 1.0):
+    """Serve an HttpClient's requests from `cassette` instead of the network."""
+    import httpx
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    def lookup(method, url, kwargs):
+        req = _http_request(method, url, kwargs)
+        return cassette.lookup(_digest(req), _http_group(req))
+
+    def request(method, url, **kwargs):
+        entry = lookup(method, url, kwargs)
+        time.sleep(entry["latency"] * latency_scale)
+        response = requests.Response()
+        response.status_code = entry["response"]["status"]
+        response.headers = CaseInsensitiveDict(entry["response"]["headers"])
+        response._content = _body_bytes(entry["response"])
+        response.encoding = "utf-8"
+        response.url = url
+        return response
+
+    async def arequest(method, url, **kwargs):
+        entry = lookup(method, url, kwargs)
+        await asyncio.sleep(entry["latency"] * latency_scale)
+        return httpx.Response(entry["response"]["status"], headers=entry["response"]["headers"],
+                              content=_body_bytes(entry["response"]), request=httpx.Request(method, url))
+
+    @asynccontextmanager
+    async def astream(method, url, **kwargs):
+        yield await arequest(method, url, **kwargs)
+
+    client.request, client.arequest, client.astream = request, arequest, astream
+
+
+# --- SerpAPI (tools/serpapi_client.py) ------------------------------------------
+
+def _serpapi_group(params: Dict) -> str:
+    return f"serpapi:{params.get('engine', '')}"
+
+
+def record_serpapi(cassette: Cassette):
+    import tools.serpapi_client as serpapi_client
+    real = serpapi_client.GoogleSearch
+
+    class RecordingGoogleSearch:
+        def __init__(self, params):
+            self.params = params
+
+        def get_dict(self):
+            start = time.perf_counter()
+            result = real(self.params).get_dict()
+            params = _scrub(self.params)
+            cassette.record(_digest(params), _serpapi_group(params), params, result, time.perf_counter() - start)
+            return result
+
+    serpapi_client.GoogleSearch = RecordingGoogleSearch
+
+
+def replay_serpapi(cassette: Cassette, latency_scale: float = 1.0):
+    import tools.serpapi_client as serpapi_client
+
+    class ReplayGoogleSearch:
+        def __init__(self, params):
+            self.params = _scrub(params)
+
+        def get_dict(self):
+            entry = cassette.lookup(_digest(self.params), _serpapi_group(self.params))
+            time.sleep(entry["latency"] * latency_scale)
+            return entry["response"]
+
+    serpapi_client.GoogleSearch = ReplayGoogleSearch
+
+
+# --- ChatOpenAI -------------------------------------------------------------------
+
+def _llm_request(messages, max_tokens: int) -> Dict:
+    if isinstance(messages, str):
+        messages = [("human", messages)]
+    else:
+        messages = [(getattr(m, "type", "human"), str(getattr(m, "content", m))) for m in messages]
+    return {"max_tokens": max_tokens, "messages": messages}
+
+
+def _llm_group(request: Dict) -> str:
+    # Group by the agent's system prompt, so a fallback reply comes from the same agent.
+    system = next((content for role, content in request["messages"] if role == "system"), "")
+    return f"llm:{request['max_tokens']}:{system[:60]}"
+
+
+class RecordingChatModel:
+    """Wraps a real chat model; records prompt, reply, latency and (for streams) the chunk count."""
+
+    def __init__(self, inner, cassette: Cassette, max_tokens: int):
+        self.inner = inner
+        self.cassette = cassette
+        self.max_tokens = max_tokens
+
+    def _record(self, messages, content: str, latency: float, chunks: int = 0, first_chunk: float = 0.0):
+        req = _llm_request(messages, self.max_tokens)
+        self.cassette.record(_digest(req), _llm_group(req), req, content, latency,
+                             chunks=chunks, first_chunk=round(first_chunk, 4))
+
+    def invoke(self, messages, **kwargs):
+        start = time.perf_counter()
+        response = self.inner.invoke(messages, **kwargs)
+        self._record(messages, response.content, time.perf_counter() - start)
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        start = time.perf_counter()
+        response = await self.inner.ainvoke(messages, **kwargs)
+        self._record(messages, response.content, time.perf_counter() - start)
+        return response
+
+    def stream(self, messages, **kwargs):
+        start, first, parts = time.perf_counter(), 0.0, []
+        for chunk in self.inner.stream(messages, **kwargs):
+            first = first or time.perf_counter() - start
+            parts.append(chunk.content)
+            yield chunk
+        self._record(messages, "".join(parts), time.perf_counter() - start, len(parts), first)
+
+    async def astream(self, messages, **kwargs):
+        start, first, parts = time.perf_counter(), 0.0, []
+        async for chunk in self.inner.astream(messages, **kwargs):
+            first = first or time.perf_counter() - start
+            parts.append(chunk.content)
+            yield chunk
+        self._record(messages, "".join(parts), time.perf_counter() - start, len(parts), first)
+
+
+class ReplayChatModel:
+    """Serves recorded replies, streaming them in the recorded number of chunks over the recorded time."""
+
+    def __init__(self, cassette: Cassette, max_tokens: int, latency_scale: float = 1.0):
+        self.cassette = cassette
+        self.max_tokens = max_tokens
+        self.latency_scale = latency_scale
+
+    def _entry(self, messages) -> Dict:
+        req = _llm_request(messages, self.max_tokens)
+        return self.cassette.lookup(_digest(req), _llm_group(req))
+
+    def _chunks(self, entry: Dict):
+        content = entry["response"]
+        count = max(1, entry.get("chunks") or 1)
+        size = max(1, -(-len(content) // count))
+        pieces = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+        first = (entry.get("first_chunk") or entry["latency"]) * self.latency_scale
+        gap = max(0.0, entry["latency"] * self.latency_scale - first) / len(pieces)
+        return pieces, first, gap
+
+    def invoke(self, messages, **kwargs):
+        entry = self._entry(messages)
+        time.sleep(entry["latency"] * self.latency_scale)
+        return AIMessage(content=entry["response"])
+
+    async def ainvoke(self, messages, **kwargs):
+        entry = self._entry(messages)
+        await asyncio.sleep(entry["latency"] * self.latency_scale)
+        return AIMessage(content=entry["response"])
+
+    def stream(self, messages, **kwargs):
+        pieces, first, gap = self._chunks(self._entry(messages))
+        time.sleep(first)
+        for piece in pieces:
+            yield AIMessageChunk(content=piece)
+            time.sleep(gap)
+
+    async def astream(self, messages, **kwargs):
+        pieces, first, gap = self._chunks(self._entry(messages))
+        await asyncio.sleep(first)
+        for piece in pieces:
+            yield AIMessageChunk(content=piece)
+            await asyncio.sleep(gap)
+
+
+def recording_llm_factory(cassette: Cassette, inner_factory=None):
+    """AgentRegistry llm_factory that records every call made through the real client."""
+    if inner_factory is None:
+        from agents.registry import default_llm_factory as inner_factory
+
+    def factory(model: str, temperature: float, max_tokens: int):
+        return RecordingChatModel(inner_factory(model, temperature, max_tokens), cassette, max_tokens)
+    return factory
+
+
+def replay_llm_factory(cassette: Cassette, latency_scale: float = 1.0):
+    def factory(model: str, temperature: float, max_tokens: int):
+        return ReplayChatModel(cassette, max_tokens, latency_scale)
+    return factory
@@ -0,0 +1,73 @@
+# benchmarks/compare.py
+"""
+Compare two benchmark result files written by benchmarks.load.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+Exits non-zero if any endpoint's p50/p95/p99 got slower, or its throughput
+dropped, by more than --threshold percent.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+LATENCY_KEYS = ("p50", "p95", "p99")
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100.0 if old else 0.0
+
+
+def compare(base: Dict, head: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Returns (report lines, regressions)."""
+    lines, regressions = [], []
+    for endpoint, levels in head["results"].items():
+        for level, result in levels.items():
+            old = base["results"].get(endpoint, {}).get(level)
+            if old is None:
+                continue
+            rows = [("endpoint", old["endpoint"], result["endpoint"])]
+            rows += [(f"stage {name}", old["stages"][name], stats)
+                     for name, stats in result["stages"].items() if name in old["stages"]]
+            for name, before, after in rows:
+                cells = []
+                for key in LATENCY_KEYS:
+                    delta = _change(before[key], after[key])
+                    cells.append(f"{key} {before[key] * 1000:7.1f}->{after[key] * 1000:7.1f}ms ({delta:+5.1f}%)")
+                    if name == "endpoint" and delta > threshold:
+                        regressions.append(f"{endpoint} c={level} {key} {delta:+.1f}%")
+                if "throughput_rps" in after:
+                    delta = _change(before["throughput_rps"], after["throughput_rps"])
+                    cells.append(f"rps {before['throughput_rps']:.1f}->{after['throughput_rps']:.1f} ({delta:+5.1f}%)")
+                    if delta < -threshold:
+                        regressions.append(f"{endpoint} c={level} throughput {delta:+.1f}%")
+                lines.append(f"{endpoint:<11} c={level:<4} {name:<22} " + "  ".join(cells))
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"{base['label']} -> {head['label']}")
+    lines, regressions = compare(base, head, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print("\nRegressions over threshold:")
+        print("\n".join(f"  {r}" for r in regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
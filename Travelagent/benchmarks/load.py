@@ -0,0 +1,237 @@
+# benchmarks/load.py
+"""
+Offline load test for /main-agent and /chat against stub upstreams.
+
+    cd Travelagent
+    python -m benchmarks.load --concurrency 1,4,16 --requests 100
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+Runs the FastAPI app in-process (httpx ASGI transport) with StubChatModel,
+StubGoogleSearch and a local StubHTTPServer, so no API quota is used.
+Reports throughput and p50/p95/p99 latency per endpoint, per /main-agent
+stage and per traced span, at each concurrency level, and writes them to
+benchmarks/results/<git sha>.json.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.stubs import LatencyModel, StubHTTPServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+TRIPS = [
+    ("New York", "London"), ("Paris", "Tokyo"), ("San Francisco", "Chicago"), ("Berlin", "Rome"),
+    ("Sydney", "Singapore"), ("Toronto", "Mexico City"), ("Dubai", "Mumbai"), ("Madrid", "Lisbon"),
+    ("Seoul", "Bangkok"), ("Boston", "Miami"), ("Amsterdam", "Istanbul"), ("Los Angeles", "Honolulu"),
+]
+
+CHAT_QUERIES = [
+    "What's the weather in Paris next week?",
+    "Can you find me a cheaper hotel near the center?",
+    "Suggest a 3 day itinerary with museums.",
+    "How much will this trip cost in total?",
+    "What are the main attractions and local culture?",
+    "How do I get from the airport to the city by train?",
+    "Are there any earlier flights?",
+    "Should I pack an umbrella?",
+]
+
+UPSTREAMS = ("openai", "serpapi", "openweather", "serper", "browser")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: List[float], elapsed: float = 0.0, errors: int = 0) -> Dict[str, float]:
+    summary = {
+        "count": len(samples),
+        "p50": round(percentile(samples, 50), 4),
+        "p95": round(percentile(samples, 95), 4),
+        "p99": round(percentile(samples, 99), 4),
+        "mean": round(sum(samples) / len(samples), 4) if samples else 0.0,
+    }
+    if elapsed:
+        summary["throughput_rps"] = round(len(samples) / elapsed, 2)
+        summary["errors"] = errors
+    return summary
+
+
+def git_label() -> str:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"]) != 0
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("%Y%m%d-%H%M%S")
+
+
+def setup(args):
+    """Start the stubs and import the app wired to them. Env must be set before the tools are imported."""
+    server = StubHTTPServer({
+        "weather": LatencyModel.parse(args.weather_latency, args.seed),
+        "search": LatencyModel.parse(args.search_latency, args.seed),
+    }).start()
+    os.environ.update(server.env_overrides())
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0")
+    if not args.keep_limits:
+        # The stubs have no quota; measure the code, not the production rate limits.
+        for name in UPSTREAMS:
+            os.environ.setdefault(f"RESILIENCE_{name.upper()}_RATE", "0")
+            os.environ.setdefault(f"RESILIENCE_{name.upper()}_MAX_CONCURRENCY", "10000")
+
+    from benchmarks.stubs import install_serpapi_stub, stub_llm_factory
+    install_serpapi_stub(LatencyModel.parse(args.serpapi_latency, args.seed))
+
+    import api
+    from agents.registry import AgentRegistry
+    from tools.browser_tools import BROWSER_SUMMARIZER
+    llm_factory = stub_llm_factory(LatencyModel.parse(args.llm_latency, args.seed))
+    api.app.state.agents = AgentRegistry(llm_factory=llm_factory)
+    BROWSER_SUMMARIZER.llm = llm_factory("gpt-4o-mini", 0.3, 300)
+    return api.app, server
+
+
+def request_for(endpoint: str, i: int, distinct: int):
+    if endpoint == "main-agent":
+        departure, arrival = TRIPS[i % len(TRIPS)]
+        day = 1 + (i % max(1, distinct)) // len(TRIPS) % 28
+        return "/main-agent", {
+            "departure_airport": departure,
+            "arrival_airport": arrival,
+            "outbound_date": f"2026-11-{day:02d}",
+            "return_date": f"2026-12-{day:02d}",
+            "adults": 1 + i % 2,
+            "children": 0,
+        }
+    return "/chat", {"query": CHAT_QUERIES[i % len(CHAT_QUERIES)]}
+
+
+async def run_level(client, endpoint: str, concurrency: int, total: int, distinct: int) -> Dict:
+    from observability import SPAN_LISTENERS
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = defaultdict(list)
+    spans: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    counter = iter(range(total))
+
+    def on_span(kind, name, seconds):
+        spans[f"{kind}:{name}"].append(seconds)
+
+    async def worker(n: int):
+        nonlocal errors
+        headers = {"X-Session-ID": f"bench-{n:04d}-{uuid.uuid4().hex[:8]}"}
+        for i in counter:
+            path, body = request_for(endpoint, i, distinct)
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body, headers=headers)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+                continue
+            for stage, seconds in response.json().get("result", {}).get("timings", {}).items():
+                stages[stage].append(seconds)
+
+    SPAN_LISTENERS.append(on_span)
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    finally:
+        SPAN_LISTENERS.remove(on_span)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "endpoint": summarize(latencies, elapsed, errors),
+        "stages": {name: summarize(samples) for name, samples in sorted(stages.items())},
+        "spans": {name: summarize(samples) for name, samples in sorted(spans.items()) if not name.startswith("http:")},
+    }
+
+
+async def run(args, app) -> Dict:
+    import httpx
+    from tools.serpapi_client import SERPAPI_CACHE
+
+    results: Dict[str, Dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for endpoint in args.endpoints.split(","):
+            results[endpoint] = {}
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                if not args.warm_cache:
+                    SERPAPI_CACHE.backend.clear()
+                level = await run_level(client, endpoint, concurrency, args.requests, args.distinct)
+                results[endpoint][str(concurrency)] = level
+                e = level["endpoint"]
+                print(f"{endpoint:<11} c={concurrency:<4} {e['throughput_rps']:>8.2f} req/s  "
+                      f"p50={e['p50'] * 1000:8.1f}ms  p95={e['p95'] * 1000:8.1f}ms  "
+                      f"p99={e['p99'] * 1000:8.1f}ms  errors={e['errors']}")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default="main-agent,chat")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint and level")
+    parser.add_argument("--distinct", type=int, default=48,
+                        help="distinct /main-agent trips; fewer means more SerpAPI cache hits")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the SerpAPI cache between levels")
+    parser.add_argument("--keep-limits", action="store_true", help="keep production rate/concurrency limits")
+    # Latency specs are 'median[,spread[,error_rate]]' in seconds.
+    parser.add_argument("--llm-latency", default="0.6,0.4,0")
+    parser.add_argument("--serpapi-latency", default="0.8,0.4,0")
+    parser.add_argument("--weather-latency", default="0.15,0.3,0")
+    parser.add_argument("--search-latency", default="0.4,0.3,0")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None, help="results file name (default: git sha)")
+    parser.add_argument("--no-save", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app, server = setup(args)
+    try:
+        results = asyncio.run(run(args, app))
+    finally:
+        server.stop()
+
+    report = {
+        "label": args.label or git_label(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "results": results,
+    }
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{report['label']}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved {path}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
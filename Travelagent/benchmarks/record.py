@@ -0,0 +1,128 @@
+# benchmarks/record.py
+"""
+Serve the API against the real upstreams while recording everything.
+
+    cd Travelagent
+    python -m benchmarks.record --cassette benchmarks/cassettes/today.jsonl.gz \
+                                --traffic benchmarks/cassettes/today.traffic.jsonl
+
+Every tool HTTP call, SerpAPI search and ChatOpenAI call is appended to the
+cassette, and every /main-agent and /chat request to the traffic log.
+benchmarks.replay serves both back offline.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from benchmarks.cassette import Cassette, open_jsonl, record_http, record_serpapi, recording_llm_factory
+
+RECORDED_PATHS = ("/main-agent", "/chat")
+
+
+class TrafficRecorder:
+    """
+    ASGI middleware appending each recorded request to a JSON-lines log:
+    arrival offset, session id, path, body, status and latency. Bodies are
+    captured as they stream past, so the app reads them as usual.
+    """
+
+    def __init__(self, app, path: str, paths=RECORDED_PATHS):
+        self.app = app
+        self.paths = paths
+        self._out = open_jsonl(path, "a")
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        arrived = time.monotonic()
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        body = bytearray()
+        response = {"status": None, "session": headers.get("x-session-id")}
+
+        async def recv():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def snd(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for k, v in message.get("headers", []):
+                    if k.decode("latin-1").lower() == "x-session-id":
+                        response["session"] = v.decode("latin-1")
+            await send(message)
+
+        try:
+            await self.app(scope, recv, snd)
+        finally:
+            self._write({
+                "t": round(arrived - self._started, 4),
+                "session": response["session"],
+                "path": scope["path"],
+                "body": self._decode(bytes(body)),
+                "status": response["status"],
+                "latency": round(time.monotonic() - arrived, 4),
+            })
+
+    @staticmethod
+    def _decode(body: bytes):
+        try:
+            return json.loads(body) if body else None
+        except ValueError:
+            return body.decode("utf-8", "replace")
+
+    def _write(self, entry):
+        with self._lock:
+            self._out.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._out.flush()
+
+
+def install_recording(cassette_path: str, traffic_path: Optional[str] = None):
+    """Patch the upstream clients to record into `cassette_path`; returns (app, cassette)."""
+    from tools.http_client import http_client
+
+    cassette = Cassette(cassette_path)
+    record_http(http_client, cassette)
+    record_serpapi(cassette)
+
+    import api
+    from agents.registry import AgentRegistry
+    from tools.browser_tools import BROWSER_SUMMARIZER
+    llm_factory = recording_llm_factory(cassette)
+    api.app.state.agents = AgentRegistry(llm_factory=llm_factory)
+    BROWSER_SUMMARIZER.llm = llm_factory("gpt-4o-mini", 0.3, 300)
+    app = TrafficRecorder(api.app, traffic_path) if traffic_path else api.app
+    return app, cassette
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    parser.add_argument("--cassette", default=os.path.join("benchmarks", "cassettes", f"{stamp}.jsonl.gz"))
+    parser.add_argument("--traffic", default=os.path.join("benchmarks", "cassettes", f"{stamp}.traffic.jsonl"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    for path in (args.cassette, args.traffic):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    app, cassette = install_recording(args.cassette, args.traffic)
+    try:
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        cassette.close()
+        print(f"recorded {cassette.recorded} upstream calls to {args.cassette}")
+
+
+if __name__ == "__main__":
+    main()
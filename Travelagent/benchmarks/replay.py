@@ -0,0 +1,140 @@
+# benchmarks/replay.py
+"""
+Replay recorded traffic against the API with recorded upstream responses.
+
+    cd Travelagent
+    python -m benchmarks.replay --cassette benchmarks/cassettes/today.jsonl.gz \
+                                --traffic benchmarks/cassettes/today.traffic.jsonl --speed 2
+
+Upstream calls are answered from the cassette after the recorded latency
+times --latency-scale (0 = instant, to profile our own code). Requests are
+sent in recorded order within each session. With --speed > 0, arrivals keep
+the recorded spacing compressed by that factor; with --speed 0, sessions
+run back to back, up to --concurrency at once.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.cassette import Cassette, open_jsonl, replay_http, replay_llm_factory, replay_serpapi
+from benchmarks.load import RESULTS_DIR, git_label, summarize
+
+
+def load_traffic(path: str) -> Dict[str, List[Dict]]:
+    """Recorded requests grouped by session, each list in arrival order."""
+    sessions: Dict[str, List[Dict]] = defaultdict(list)
+    with open_jsonl(path, "r") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                sessions[entry.get("session") or uuid.uuid4().hex].append(entry)
+    for entries in sessions.values():
+        entries.sort(key=lambda e: e["t"])
+    return sessions
+
+
+def install_replay(cassette: Cassette, latency_scale: float):
+    from tools.http_client import http_client
+
+    replay_http(http_client, cassette, latency_scale)
+    replay_serpapi(cassette, latency_scale)
+
+    import api
+    from agents.registry import AgentRegistry
+    from tools.browser_tools import BROWSER_SUMMARIZER
+    llm_factory = replay_llm_factory(cassette, latency_scale)
+    api.app.state.agents = AgentRegistry(llm_factory=llm_factory)
+    BROWSER_SUMMARIZER.llm = llm_factory("gpt-4o-mini", 0.3, 300)
+    return api.app
+
+
+async def drive(app, sessions: Dict[str, List[Dict]], speed: float, concurrency: int) -> Dict:
+    import httpx
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    run_id = uuid.uuid4().hex[:6]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def play(session: str, entries: List[Dict], client, t0: float):
+        # Fresh session ids, so a persistent memory backend doesn't carry state between runs.
+        headers = {"X-Session-ID": f"replay-{run_id}-{session}"[:64]}
+        for entry in entries:
+            if speed > 0:
+                await asyncio.sleep(max(0.0, t0 + entry["t"] / speed - time.perf_counter()))
+            start = time.perf_counter()
+            try:
+                response = await client.post(entry["path"], json=entry["body"], headers=headers)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies[entry["path"]].append(time.perf_counter() - start)
+            if not ok:
+                errors[entry["path"]] += 1
+
+    async def bounded(session, entries, client, t0):
+        if speed > 0:
+            return await play(session, entries, client, t0)
+        async with semaphore:
+            return await play(session, entries, client, t0)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=300) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(bounded(s, e, client, t0) for s, e in sessions.items()))
+        elapsed = time.perf_counter() - t0
+
+    # Same shape as benchmarks.load results, so benchmarks.compare works on replays too.
+    return {path: {"replay": {"endpoint": summarize(samples, elapsed, errors[path]), "stages": {}}}
+            for path, samples in latencies.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--traffic", required=True)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier on recorded upstream latency")
+    parser.add_argument("--speed", type=float, default=1.0, help="arrival-time compression; 0 = back to back")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel sessions when --speed 0")
+    parser.add_argument("--strict", action="store_true", help="fail on unrecorded requests instead of falling back")
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0")
+    cassette = Cassette.load(args.cassette, strict=args.strict)
+    app = install_replay(cassette, args.latency_scale)
+    sessions = load_traffic(args.traffic)
+    results = asyncio.run(drive(app, sessions, args.speed, args.concurrency))
+
+    for path, levels in results.items():
+        stats = levels["replay"]["endpoint"]
+        print(f"{path:<12} {stats['count']:>5} req  {stats['throughput_rps']:>8.2f} req/s  "
+              f"p50={stats['p50'] * 1000:8.1f}ms  p95={stats['p95'] * 1000:8.1f}ms  "
+              f"p99={stats['p99'] * 1000:8.1f}ms  errors={stats['errors']}")
+    print(f"cassette: {cassette.hits} exact matches, {cassette.fallbacks} fallbacks")
+
+    report = {
+        "label": args.label or f"replay-{git_label()}",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "cassette": {"hits": cassette.hits, "fallbacks": cassette.fallbacks},
+        "results": results,
+    }
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{report['label']}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved {path}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/router_bench.py
+"""
+Compare the chat router against the old substring scan on labelled queries.
+
+    cd Travelagent
+    python -m benchmarks.router_bench --repeat 2000
+
+For each router, prints the mean and p99 time per query, how many queries
+got exactly the labelled specialists, and how many specialist calls were
+wasted (chosen but not needed) or missed (needed but not chosen). Wasted
+TripPlanner calls are counted separately, since each one costs SerpAPI
+searches on top of the LLM call.
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from agents.router import QueryRouter
+from benchmarks.load import percentile
+
+# (query, specialists that should answer it). Held out: none of these are
+# (or closely paraphrase) the classifier's training examples in DEFAULT_INTENTS.
+LABELLED: List[Tuple[str, Tuple[str, ...]]] = [
+    ("Is there a later departure on Friday?", ("TripPlanner",)),
+    ("Find me a cheaper airfare to Rome", ("TripPlanner", "BudgetAnalyst")),
+    ("Can we avoid a layover in Frankfurt?", ("TripPlanner",)),
+    ("Which airlines fly this route?", ("TripPlanner",)),
+    ("What's the weather in Paris next week?", ("Weather",)),
+    ("Should I pack an umbrella?", ("Weather",)),
+    ("Will it be rainy or sunny in Lisbon?", ("Weather",)),
+    ("How many degrees does it get at night in March?", ("Weather",)),
+    ("Do I need a warm coat, or is it mild there?", ("Weather",)),
+    ("What are the main attractions and local culture?", ("DestinationResearch",)),
+    ("Which museums and landmarks are worth a visit?", ("DestinationResearch",)),
+    ("What is the best day to visit the Louvre?", ("DestinationResearch",)),
+    ("Which local dishes and cuisine should we try?", ("DestinationResearch",)),
+    ("Is a cheaper room available closer to the beach?", ("Accommodation", "BudgetAnalyst")),
+    ("Any lodging that welcomes kids and pets?", ("Accommodation",)),
+    ("Any hostels or Airbnbs close to the old town?", ("Accommodation",)),
+    ("How many days should I stay?", ("Accommodation",)),
+    ("Is there a train between the two cities?", ("Transportation",)),
+    ("Is it easy to drive and park downtown?", ("Transportation",)),
+    ("Is the metro easy for getting around?", ("Transportation",)),
+    ("How much is a taxi from the station?", ("Transportation", "BudgetAnalyst")),
+    ("Suggest a 4 day itinerary with museums.", ("ItineraryPlanner", "DestinationResearch")),
+    ("Plan our days in Rome day by day", ("ItineraryPlanner",)),
+    ("Put together an agenda for our 5-day visit", ("ItineraryPlanner",)),
+    ("What would all of this cost per person?", ("BudgetAnalyst",)),
+    ("Can we afford this on a 2000 dollar budget?", ("BudgetAnalyst",)),
+    ("How much money should we set aside for food?", ("BudgetAnalyst",)),
+    ("What are typical prices for dinner?", ("BudgetAnalyst",)),
+    ("Check the weather and find hotels for those dates", ("Weather", "Accommodation")),
+    ("Flights and a hotel under our budget please", ("TripPlanner", "Accommodation", "BudgetAnalyst")),
+]
+
+def legacy_route(user_query: str) -> List[str]:
+    """ChatbotAgent.decide_which_agents before the compiled router, kept for comparison."""
+    q_lower = user_query.lower()
+    chosen = []
+    if any(x in q_lower for x in ["flight", "plane", "airfare", "tickets"]):
+        chosen.append("TripPlanner")
+    if any(x in q_lower for x in ["weather", "umbrella", "rain"]):
+        chosen.append("Weather")
+    if any(x in q_lower for x in ["destination", "culture", "attractions"]):
+        chosen.append("DestinationResearch")
+    if any(x in q_lower for x in ["hotel", "accommodation"]):
+        chosen.append("Accommodation")
+    if any(x in q_lower for x in ["transport", "car rental", "train"]):
+        chosen.append("Transportation")
+    if "itinerary" in q_lower:
+        chosen.append("ItineraryPlanner")
+    if any(x in q_lower for x in ["budget", "cost", "price"]):
+        chosen.append("BudgetAnalyst")
+    if not chosen:
+        chosen = ["TripPlanner"]
+    return list(dict.fromkeys(chosen))
+
+
+def evaluate(route: Callable[[str], Sequence[str]], labelled, repeat: int) -> Dict:
+    exact = wasted = missed = wasted_trip = calls = 0
+    for query, expected in labelled:
+        chosen = set(route(query))
+        calls += len(chosen)
+        exact += chosen == set(expected)
+        wasted += len(chosen - set(expected))
+        missed += len(set(expected) - chosen)
+        wasted_trip += "TripPlanner" in chosen and "TripPlanner" not in expected
+
+    samples = []
+    for _ in range(repeat):
+        for query, _ in labelled:
+            start = time.perf_counter()
+            route(query)
+            samples.append(time.perf_counter() - start)
+    return {
+        "mean_us": sum(samples) / len(samples) * 1e6 if samples else 0.0,
+        "p99_us": percentile(samples, 99) * 1e6,
+        "queries": len(labelled),
+        "exact": exact,
+        "calls": calls,
+        "wasted": wasted,
+        "wasted_trip_planner": wasted_trip,
+        "missed": missed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1000, help="timing passes over the labelled queries")
+    parser.add_argument("--intents", default=None, help="JSON intent table to benchmark instead of the default")
+    args = parser.parse_args(argv)
+
+    router = QueryRouter.from_file(args.intents) if args.intents else QueryRouter()
+    results = {
+        "legacy": evaluate(legacy_route, LABELLED, args.repeat),
+        "compiled": evaluate(lambda q: router.route(q).agents, LABELLED, args.repeat),
+    }
+    for name, r in results.items():
+        print(f"{name:<9} mean={r['mean_us']:7.1f}us  p99={r['p99_us']:7.1f}us  "
+              f"exact={r['exact']}/{r['queries']}  calls={r['calls']}  wasted={r['wasted']} "
+              f"(TripPlanner {r['wasted_trip_planner']})  missed={r['missed']}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
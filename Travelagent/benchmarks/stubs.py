@@ -0,0 +1,299 @@
+# benchmarks/stubs.py
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+class StubError(Exception):
+    """Injected upstream failure."""
+
+
+class LatencyModel:
+    """
+    Log-normal latency around `median` seconds plus an injected error rate.
+    Seeded, so a given run replays the same sequence of delays and failures.
+    """
+
+    def __init__(self, median: float = 0.1, spread: float = 0.3, error_rate: float = 0.0,
+                 seed: int = 0):
+        self.median = median
+        self.spread = spread
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> Tuple[float, bool]:
+        """(delay in seconds, whether this call should fail)."""
+        with self._lock:
+            delay = self.median * self._rng.lognormvariate(0, self.spread) if self.median > 0 else 0.0
+            return delay, self._rng.random() < self.error_rate
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 0) -> "LatencyModel":
+        """'median[,spread[,error_rate]]', e.g. '0.8,0.4,0.02'."""
+        parts = [float(p) for p in spec.split(",")] if spec else []
+        return cls(*parts, seed=seed)
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+# --- ChatOpenAI stand-in -------------------------------------------------------
+
+class StubChatModel:
+    """
+    Drop-in for the parts of ChatOpenAI the agents use (invoke, ainvoke,
+    stream, astream). Replies are deterministic for a given prompt and about
+    `max_tokens` words long; streaming emits one chunk per word after the
+    first-token delay.
+    """
+
+    def __init__(self, latency: LatencyModel, max_tokens: int = 200, token_delay: float = 0.002):
+        self.latency = latency
+        self.max_tokens = max_tokens
+        self.token_delay = token_delay
+        self.calls = 0
+
+    def _prompt(self, messages) -> str:
+        if isinstance(messages, str):
+            return messages
+        return "\n".join(str(getattr(m, "content", m)) for m in messages)
+
+    def _reply(self, prompt: str) -> str:
+        if "IATA airport code" in prompt:
+            city = prompt.rsplit(":", 1)[-1].strip(" .")
+            return (city[:3] or "XXX").upper()
+        words = ["lorem", "ipsum", "dolor", "sit", "amet", "travel", "hotel", "flight", "city", "tour"]
+        seed = _digest(prompt)
+        count = max(8, self.max_tokens // 2)
+        return " ".join(words[(seed + i * 7) % len(words)] for i in range(count)) + "."
+
+    def _begin(self) -> float:
+        self.calls += 1
+        delay, fail = self.latency.sample()
+        if fail:
+            raise StubError("stub LLM error")
+        return delay
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        time.sleep(self._begin())
+        return AIMessage(content=self._reply(self._prompt(messages)))
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        await asyncio.sleep(self._begin())
+        return AIMessage(content=self._reply(self._prompt(messages)))
+
+    def stream(self, messages, **kwargs) -> Iterator[AIMessageChunk]:
+        time.sleep(self._begin())
+        for word in self._reply(self._prompt(messages)).split(" "):
+            time.sleep(self.token_delay)
+            yield AIMessageChunk(content=word + " ")
+
+    async def astream(self, messages, **kwargs):
+        await asyncio.sleep(self._begin())
+        for word in self._reply(self._prompt(messages)).split(" "):
+            await asyncio.sleep(self.token_delay)
+            yield AIMessageChunk(content=word + " ")
+
+
+def stub_llm_factory(latency: LatencyModel):
+    """An AgentRegistry llm_factory that builds StubChatModels sharing one latency model."""
+    def factory(model: str, temperature: float, max_tokens: int) -> StubChatModel:
+        return StubChatModel(latency, max_tokens=max_tokens)
+    return factory
+
+
+# --- SerpAPI GoogleSearch stand-in ---------------------------------------------
+
+def _flight_option(rng: random.Random, dep: str, arr: str, date: str) -> Dict:
+    legs = rng.choice([1, 1, 2])
+    flights = []
+    for i in range(legs):
+        flights.append({
+            "departure_airport": {"name": f"{dep} Airport", "id": dep.split(",")[0], "time": f"{date} {8 + i * 4:02d}:15"},
+            "arrival_airport": {"name": f"{arr} Airport", "id": arr.split(",")[0], "time": f"{date} {11 + i * 4:02d}:40"},
+            "duration": rng.randint(60, 600),
+            "airplane": rng.choice(["Boeing 737", "Airbus A320", "Boeing 787", "Airbus A350"]),
+            "airline": rng.choice(["United", "Delta", "Lufthansa", "Air France", "ANA"]),
+            "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/UA.png",
+            "travel_class": "Economy",
+            "flight_number": f"UA {rng.randint(100, 9999)}",
+            "legroom": "31 in",
+            "extensions": ["Average legroom (31 in)", "Wi-Fi for a fee", "In-seat power & USB outlets"],
+        })
+    return {
+        "flights": flights,
+        "layovers": [{"duration": rng.randint(45, 240), "name": "Hub Airport", "id": "HUB"}] if legs > 1 else [],
+        "total_duration": sum(f["duration"] for f in flights),
+        "carbon_emissions": {"this_flight": rng.randint(200, 900) * 1000, "typical_for_this_route": 500000},
+        "price": rng.randint(150, 2000),
+        "type": "Round trip",
+        "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/multi.png",
+        "departure_token": hashlib.sha1(f"{dep}{arr}{rng.random()}".encode()).hexdigest() * 4,
+    }
+
+
+def _hotel(rng: random.Random, city: str, i: int) -> Dict:
+    return {
+        "type": "hotel",
+        "name": f"{city} Stub Hotel {i}",
+        "description": f"A comfortable hotel in central {city}. " * 3,
+        "link": f"https://example.com/hotels/{i}",
+        "gps_coordinates": {"latitude": rng.uniform(-60, 60), "longitude": rng.uniform(-180, 180)},
+        "check_in_time": "3:00 PM",
+        "check_out_time": "11:00 AM",
+        "rate_per_night": {"lowest": f"${rng.randint(60, 600)}", "extracted_lowest": rng.randint(60, 600)},
+        "total_rate": {"lowest": f"${rng.randint(300, 3000)}"},
+        "hotel_class": f"{rng.randint(2, 5)}-star hotel",
+        "overall_rating": round(rng.uniform(3, 5), 1),
+        "reviews": rng.randint(10, 5000),
+        "amenities": ["Free Wi-Fi", "Breakfast", "Pool", "Gym", "Air conditioning", "Restaurant"],
+        "images": [{"thumbnail": f"https://example.com/img/{i}-{n}.jpg",
+                    "original_image": f"https://example.com/img/{i}-{n}-full.jpg"} for n in range(6)],
+    }
+
+
+class StubGoogleSearch:
+    """
+    Stand-in for serpapi.GoogleSearch returning payloads shaped (and roughly
+    sized) like real google_flights / google_hotels responses. Install with
+    install_serpapi_stub(), which patches tools.serpapi_client.GoogleSearch.
+    """
+
+    latency = LatencyModel(0.8, 0.4)
+
+    def __init__(self, params: Dict):
+        self.params = params
+
+    def get_dict(self) -> Dict:
+        delay, fail = self.latency.sample()
+        time.sleep(delay)
+        if fail:
+            raise StubError("stub SerpAPI error")
+        rng = random.Random(_digest(json.dumps(self.params, sort_keys=True, default=str)))
+        engine = self.params.get("engine")
+        if engine == "google_flights":
+            dep, arr = str(self.params.get("departure_id")), str(self.params.get("arrival_id"))
+            date = str(self.params.get("outbound_date"))
+            return {
+                "search_metadata": {"status": "Success"},
+                "best_flights": [_flight_option(rng, dep, arr, date) for _ in range(rng.randint(2, 4))],
+                "other_flights": [_flight_option(rng, dep, arr, date) for _ in range(rng.randint(8, 20))],
+                "price_insights": {"lowest_price": rng.randint(150, 600), "price_level": "typical"},
+            }
+        if engine == "google_hotels":
+            city = str(self.params.get("q"))
+            return {
+                "search_metadata": {"status": "Success"},
+                "properties": [_hotel(rng, city, i) for i in range(20)],
+            }
+        return {"error": f"Unsupported engine: {engine}"}
+
+
+def install_serpapi_stub(latency: LatencyModel):
+    import tools.serpapi_client as serpapi_client
+    StubGoogleSearch.latency = latency
+    serpapi_client.GoogleSearch = StubGoogleSearch
+
+
+# --- OpenWeather / Serper / browser content server --------------------------------
+
+class StubHTTPServer:
+    """
+    Local HTTP stand-in for OpenWeatherMap (/forecast), Serper (/search) and
+    the browser content service (/content), each with its own latency model.
+    Point the tools at it with env_overrides() before importing them.
+    """
+
+    def __init__(self, latencies: Optional[Dict[str, LatencyModel]] = None, port: int = 0):
+        self.latencies = {"weather": LatencyModel(0.15, 0.3), "search": LatencyModel(0.4, 0.3),
+                          "content": LatencyModel(0.5, 0.3), **(latencies or {})}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, route: str, body: Dict, content_type: str = "application/json"):
+                delay, fail = server.latencies[route].sample()
+                time.sleep(delay)
+                status = 503 if fail else 200
+                payload = (json.dumps({"error": "stub failure"}) if fail else
+                           body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == "/forecast":
+                    city = parse_qs(url.query).get("q", [""])[0]
+                    rng = random.Random(_digest(city))
+                    start = int(time.time()) // 10800 * 10800
+                    # 5 days of 3-hour slots, like OpenWeather's /data/2.5/forecast.
+                    self._reply("weather", {
+                        "city": {"name": city, "timezone": 0},
+                        "list": [{
+                            "dt": start + i * 10800,
+                            "weather": [{"main": "Clouds",
+                                         "description": rng.choice(["clear sky", "light rain", "few clouds"])}],
+                            "main": {"temp": round(rng.uniform(-5, 35), 1), "humidity": rng.randint(20, 90)},
+                            "pop": round(rng.random(), 2),
+                        } for i in range(40)],
+                    })
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/search":
+                    query = str(body.get("q", ""))
+                    self._reply("search", {"organic": [
+                        {"title": f"{query} result {i}", "link": f"https://example.com/{_digest(query)}/{i}",
+                         "snippet": f"Everything about {query}. " * 4}
+                        for i in range(10)
+                    ]})
+                elif self.path == "/content":
+                    paragraphs = "".join(f"<p>Paragraph {i} about {body.get('url')}.</p>" for i in range(200))
+                    self._reply("content", f"<html><body>{paragraphs}</body></html>", "text/html")
+                else:
+                    self.send_error(404)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def env_overrides(self) -> Dict[str, str]:
+        return {
+            "OPENWEATHER_URL": f"{self.base_url}/forecast",
+            "SERPER_URL": f"{self.base_url}/search",
+            "BROWSER_CONTENT_URL": f"{self.base_url}/content",
+        }
+
+    def start(self) -> "StubHTTPServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
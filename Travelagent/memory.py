@@ -1,29 +1,172 @@
 # memory.py
 
+import os
+import threading
+import time
+import uuid
 from typing import Dict, List
+from memory_backends import InProcessBackend, MemoryBackend, SQLiteBackend
+from memory_compaction import build_prompt_context, fold_into_summary
+
+# Striped locks so concurrent turns in one session don't lose summary updates.
+_FOLD_LOCKS = [threading.Lock() for _ in range(64)]
+
 
 class ConversationMemory:
-    def __init__(self):
-        self.history: List[str] = []
-        self.known_trip_data = {}
+    """
+    One session's chat history and trip data, stored in a MemoryBackend.
+    History is capped by entry count and by total bytes; the oldest turns
+    are dropped first.
+
+    With compaction on (`compact_window` > 0), only the newest
+    `compact_window` turns are kept verbatim; older turns are folded into a
+    running summary of at most `summary_tokens` tokens.
+    """
+
+    def __init__(self, session_id: str, backend: MemoryBackend,
+                 max_history: int = 50, max_history_bytes: int = 64_000,
+                 compact_window: int = 0, summary_tokens: int = 300):
+        self.session_id = session_id
+        self.backend = backend
+        self.max_history = max_history
+        self.max_history_bytes = max_history_bytes
+        self.compact_window = compact_window
+        self.summary_tokens = summary_tokens
+
+    def _append(self, entry: str):
+        # A single oversized entry is truncated rather than evicting everything else.
+        if len(entry.encode("utf-8")) > self.max_history_bytes:
+            entry = entry.encode("utf-8")[:self.max_history_bytes].decode("utf-8", "ignore")
+        self.backend.append_history(self.session_id, entry, self.max_history, self.max_history_bytes)
+        if self.compact_window > 0:
+            self._compact()
+
+    def _compact(self):
+        with _FOLD_LOCKS[hash(self.session_id) % len(_FOLD_LOCKS)]:
+            older = self.backend.pop_history(self.session_id, self.compact_window)
+            if older:
+                summary = fold_into_summary(self.backend.get_summary(self.session_id), older,
+                                            self.summary_tokens)
+                self.backend.set_summary(self.session_id, summary)
 
     def add_user_message(self, message: str):
-        self.history.append(f"User: {message}")
+        self._append(f"User: {message}")
 
     def add_assistant_message(self, message: str):
-        self.history.append(f"Assistant: {message}")
+        self._append(f"Assistant: {message}")
 
     def update_trip_data(self, data: Dict[str, str]):
-        self.known_trip_data.update(data)
+        self.backend.update_trip_data(self.session_id, {k: str(v) for k, v in data.items()})
+
+    def get_trip_data(self) -> Dict[str, str]:
+        """Return a snapshot of the known trip data."""
+        return self.backend.get_trip_data(self.session_id)
+
+    @property
+    def known_trip_data(self) -> Dict[str, str]:
+        return self.get_trip_data()
+
+    @property
+    def history(self) -> List[str]:
+        return self.backend.get_history(self.session_id)
 
     def get_trip_data_str(self) -> str:
         """Return a single string describing known trip data."""
-        if not self.known_trip_data:
+        trip = self.get_trip_data()
+        if not trip:
             return ""
-        return " ".join(f"{k}:{v}" for k, v in self.known_trip_data.items())
+        return " ".join(f"{k}:{v}" for k, v in trip.items())
 
     def get_full_history(self) -> str:
         return "\n".join(self.history)
 
-# ✅ Create global memory instance here to avoid circular imports
-GLOBAL_MEMORY = ConversationMemory()
+    def get_summary(self) -> str:
+        """Summary of the turns that have left the recent window."""
+        return self.backend.get_summary(self.session_id)
+
+    def get_prompt_context(self, budget_tokens: int = 1000) -> str:
+        """
+        Trip data, the summary of older turns and the newest turns that fit,
+        kept within ~`budget_tokens` tokens however long the session runs.
+        """
+        return build_prompt_context(self.get_trip_data(), self.get_summary(),
+                                    self.history, budget_tokens)
+
+    def size_bytes(self) -> int:
+        return self.backend.size_bytes(self.session_id)
+
+
+class SessionStore:
+    """
+    Session id -> ConversationMemory, bounded by an LRU cap on the number of
+    sessions and an idle TTL. Eviction sweeps run at most every
+    `sweep_interval` seconds. Safe to use from concurrent requests, and with
+    a shared backend, from several worker processes.
+    """
+
+    def __init__(self, backend: MemoryBackend = None, max_sessions: int = 1000, idle_ttl: float = 3600,
+                 max_history: int = 50, max_history_bytes: int = 64_000, sweep_interval: float = 30,
+                 compact_window: int = 0, summary_tokens: int = 300):
+        self.backend = backend or InProcessBackend()
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_history = max_history
+        self.max_history_bytes = max_history_bytes
+        self.sweep_interval = sweep_interval
+        self.compact_window = compact_window
+        self.summary_tokens = summary_tokens
+        self.evictions = 0
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def get(self, session_id: str) -> ConversationMemory:
+        """Return the session's memory, creating it if needed."""
+        # Touch first: the session is then the most recent, and the sweep keeps the cap exact.
+        self.backend.touch(session_id)
+        self._maybe_sweep()
+        return ConversationMemory(session_id, self.backend, self.max_history, self.max_history_bytes,
+                                  self.compact_window, self.summary_tokens)
+
+    def drop(self, session_id: str):
+        self.backend.delete_session(session_id)
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval and self.backend.session_count() <= self.max_sessions:
+                return
+            self._last_sweep = now
+        self.evictions += self.backend.evict(self.max_sessions, self.idle_ttl)
+
+    def __len__(self):
+        return self.backend.session_count()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": self.backend.session_count(),
+            "evictions": self.evictions,
+            "bytes": self.backend.size_bytes(),
+        }
+
+
+def _build_backend() -> MemoryBackend:
+    # MEMORY_BACKEND=sqlite lets several uvicorn workers share sessions.
+    if os.environ.get("MEMORY_BACKEND", "memory").lower() == "sqlite":
+        return SQLiteBackend(os.environ.get("MEMORY_DB_PATH", "memory.sqlite3"))
+    return InProcessBackend()
+
+
+# ✅ Create the session store here to avoid circular imports
+SESSIONS = SessionStore(
+    backend=_build_backend(),
+    max_sessions=int(os.environ.get("SESSION_MAX_COUNT", "1000")),
+    idle_ttl=float(os.environ.get("SESSION_IDLE_TTL", "3600")),
+    max_history=int(os.environ.get("SESSION_MAX_HISTORY", "50")),
+    max_history_bytes=int(os.environ.get("SESSION_MAX_HISTORY_BYTES", "64000")),
+    compact_window=int(os.environ.get("SESSION_COMPACT_WINDOW", "8")),
+    summary_tokens=int(os.environ.get("SESSION_SUMMARY_TOKENS", "300")),
+)
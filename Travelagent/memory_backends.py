@@ -0,0 +1,339 @@
+# memory_backends.py
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+
+class MemoryBackend(ABC):
+    """
+    Storage behind ConversationMemory. History is append-only (trimmed from
+    the front to the caps) and trip data is written key by key, so no call
+    ever rewrites a whole session.
+    """
+
+    @abstractmethod
+    def append_history(self, session_id: str, entry: str, max_entries: int, max_bytes: int):
+        pass
+
+    @abstractmethod
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[str]:
+        """Return the session's history, oldest first; `limit` keeps only the newest entries."""
+        pass
+
+    @abstractmethod
+    def pop_history(self, session_id: str, keep: int) -> List[str]:
+        """Remove and return every entry older than the newest `keep`, oldest first."""
+        pass
+
+    @abstractmethod
+    def get_summary(self, session_id: str) -> str:
+        pass
+
+    @abstractmethod
+    def set_summary(self, session_id: str, summary: str):
+        pass
+
+    @abstractmethod
+    def update_trip_data(self, session_id: str, data: Dict[str, str]):
+        pass
+
+    @abstractmethod
+    def get_trip_data(self, session_id: str) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    def touch(self, session_id: str):
+        """Create the session if needed and mark it as just used."""
+        pass
+
+    @abstractmethod
+    def evict(self, max_sessions: int, idle_ttl: float) -> int:
+        """Drop idle sessions and the least recently used ones over the cap; returns how many."""
+        pass
+
+    @abstractmethod
+    def delete_session(self, session_id: str):
+        pass
+
+    @abstractmethod
+    def session_count(self) -> int:
+        pass
+
+    @abstractmethod
+    def size_bytes(self, session_id: Optional[str] = None) -> int:
+        """Approximate bytes held for one session, or for all sessions."""
+        pass
+
+
+class _Session:
+    def __init__(self):
+        self.history = deque()
+        self.history_bytes = 0
+        self.trip: Dict[str, str] = {}
+        self.summary = ""
+        self.last_access = time.time()
+
+
+class InProcessBackend(MemoryBackend):
+    """Sessions held in this process only; fastest, but not shared between workers."""
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _session(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+        return session
+
+    def append_history(self, session_id, entry, max_entries, max_bytes):
+        with self._lock:
+            session = self._session(session_id)
+            session.history.append(entry)
+            session.history_bytes += len(entry.encode("utf-8"))
+            while session.history and (len(session.history) > max_entries
+                                       or session.history_bytes > max_bytes):
+                session.history_bytes -= len(session.history.popleft().encode("utf-8"))
+
+    def get_history(self, session_id, limit=None):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            history = list(session.history)
+        return history[-limit:] if limit else history
+
+    def pop_history(self, session_id, keep):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            popped = []
+            while session and len(session.history) > keep:
+                entry = session.history.popleft()
+                session.history_bytes -= len(entry.encode("utf-8"))
+                popped.append(entry)
+            return popped
+
+    def get_summary(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.summary if session else ""
+
+    def set_summary(self, session_id, summary):
+        with self._lock:
+            self._session(session_id).summary = summary
+
+    def update_trip_data(self, session_id, data):
+        with self._lock:
+            self._session(session_id).trip.update(data)
+
+    def get_trip_data(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return dict(session.trip) if session else {}
+
+    def touch(self, session_id):
+        with self._lock:
+            self._session(session_id).last_access = time.time()
+            self._sessions.move_to_end(session_id)
+
+    def evict(self, max_sessions, idle_ttl):
+        evicted = 0
+        cutoff = time.time() - idle_ttl
+        with self._lock:
+            # Sessions are kept in access order, so idle ones are at the front.
+            while self._sessions and (len(self._sessions) > max_sessions
+                                      or next(iter(self._sessions.values())).last_access < cutoff):
+                self._sessions.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete_session(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def session_count(self):
+        return len(self._sessions)
+
+    def size_bytes(self, session_id=None):
+        with self._lock:
+            if session_id is None:
+                sessions = list(self._sessions.values())
+            else:
+                sessions = [self._sessions[session_id]] if session_id in self._sessions else []
+            return sum(s.history_bytes + len(s.summary) + sum(len(k) + len(v) for k, v in s.trip.items())
+                       for s in sessions)
+
+
+class SQLiteBackend(MemoryBackend):
+    """
+    Sessions in a SQLite database in WAL mode, so several uvicorn workers can
+    share them: readers never block the single writer, and each write touches
+    only the rows it changes (one history row, or one trip-data key).
+    """
+
+    def __init__(self, path: str = "memory.sqlite3", busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        with self._tx() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions(last_access)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,"
+                " entry TEXT NOT NULL, bytes INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS history_session ON history(session_id, id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS trip_data ("
+                " session_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " PRIMARY KEY (session_id, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " session_id TEXT PRIMARY KEY, summary TEXT NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections shouldn't be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _tx(self):
+        return _Transaction(self._conn())
+
+    def append_history(self, session_id, entry, max_entries, max_bytes):
+        with self._tx() as conn:
+            conn.execute("INSERT INTO history (session_id, entry, bytes) VALUES (?, ?, ?)",
+                         (session_id, entry, len(entry.encode("utf-8"))))
+            # Walk back from the newest row until a cap is hit; delete everything older.
+            rows = conn.execute(
+                "SELECT id, bytes FROM history WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, max_entries + 1),
+            ).fetchall()
+            total, cutoff = 0, None
+            for i, (row_id, size) in enumerate(rows):
+                total += size
+                if i >= max_entries or (total > max_bytes and i > 0):
+                    cutoff = row_id
+                    break
+            if cutoff is not None:
+                conn.execute("DELETE FROM history WHERE session_id = ? AND id <= ?", (session_id, cutoff))
+
+    def get_history(self, session_id, limit=None):
+        rows = self._conn().execute(
+            "SELECT entry FROM history WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit or -1),
+        ).fetchall()
+        return [r[0] for r in reversed(rows)]
+
+    def pop_history(self, session_id, keep):
+        with self._tx() as conn:
+            rows = conn.execute(
+                "SELECT id, entry FROM history WHERE session_id = ? ORDER BY id DESC LIMIT -1 OFFSET ?",
+                (session_id, keep),
+            ).fetchall()
+            if rows:
+                conn.execute("DELETE FROM history WHERE session_id = ? AND id <= ?", (session_id, rows[0][0]))
+        return [entry for _, entry in reversed(rows)]
+
+    def get_summary(self, session_id):
+        row = self._conn().execute(
+            "SELECT summary FROM summaries WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else ""
+
+    def set_summary(self, session_id, summary):
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT INTO summaries (session_id, summary) VALUES (?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary",
+                (session_id, summary),
+            )
+
+    def update_trip_data(self, session_id, data):
+        if not data:
+            return
+        with self._tx() as conn:
+            conn.executemany(
+                "INSERT INTO trip_data (session_id, key, value) VALUES (?, ?, ?)"
+                " ON CONFLICT(session_id, key) DO UPDATE SET value = excluded.value",
+                [(session_id, k, str(v)) for k, v in data.items()],
+            )
+
+    def get_trip_data(self, session_id):
+        rows = self._conn().execute(
+            "SELECT key, value FROM trip_data WHERE session_id = ? ORDER BY rowid", (session_id,)).fetchall()
+        return dict(rows)
+
+    def touch(self, session_id):
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, last_access) VALUES (?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access",
+                (session_id, time.time()),
+            )
+
+    def evict(self, max_sessions, idle_ttl):
+        with self._tx() as conn:
+            stale = [r[0] for r in conn.execute(
+                "SELECT session_id FROM sessions WHERE last_access < ?", (time.time() - idle_ttl,))]
+            overflow = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - len(stale) - max_sessions
+            if overflow > 0:
+                stale += [r[0] for r in conn.execute(
+                    "SELECT session_id FROM sessions WHERE last_access >= ?"
+                    " ORDER BY last_access LIMIT ?", (time.time() - idle_ttl, overflow))]
+            for session_id in stale:
+                self._delete(conn, session_id)
+        return len(stale)
+
+    @staticmethod
+    def _delete(conn, session_id):
+        conn.execute("DELETE FROM history WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM trip_data WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM summaries WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def delete_session(self, session_id):
+        with self._tx() as conn:
+            self._delete(conn, session_id)
+
+    def session_count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def size_bytes(self, session_id=None):
+        where, args = ("WHERE session_id = ?", (session_id,)) if session_id else ("", ())
+        conn = self._conn()
+        history = conn.execute(f"SELECT COALESCE(SUM(bytes), 0) FROM history {where}", args).fetchone()[0]
+        trip = conn.execute(
+            f"SELECT COALESCE(SUM(LENGTH(key) + LENGTH(value)), 0) FROM trip_data {where}", args).fetchone()[0]
+        summary = conn.execute(
+            f"SELECT COALESCE(SUM(LENGTH(summary)), 0) FROM summaries {where}", args).fetchone()[0]
+        return history + trip + summary
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block of writes."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,97 @@
+# memory_compaction.py
+
+import re
+from typing import Dict, List
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\S+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def approx_tokens(text: str) -> int:
+    """
+    Cheap local token estimate for English prompts: the larger of ~4 chars per
+    token and ~0.75 words per token. Good enough for budgeting prompts without
+    pulling in a tokenizer.
+    """
+    if not text:
+        return 0
+    words = len(_WORD_RE.findall(text))
+    return max(1, round(len(text) / 4), round(words * 4 / 3))
+
+
+def plain_text(text: str) -> str:
+    """Drop HTML tags and collapse whitespace (assistant turns may carry HTML)."""
+    return _WS_RE.sub(" ", _TAG_RE.sub(" ", text or "")).strip()
+
+
+def clip_to_tokens(text: str, budget: int) -> str:
+    """Trim `text` to roughly `budget` tokens, marking the cut with an ellipsis."""
+    if budget <= 0:
+        return ""
+    if approx_tokens(text) <= budget:
+        return text
+    clipped = text[:budget * 4]
+    words = clipped.split(" ")
+    if len(words) > budget * 3 // 4:
+        clipped = " ".join(words[:budget * 3 // 4])
+    return clipped.rstrip() + "…"
+
+
+def compress_turn(entry: str, max_tokens: int = 40) -> str:
+    """Reduce one history entry to its first sentence, clipped to `max_tokens`."""
+    speaker, _, body = entry.partition(": ")
+    body = plain_text(body)
+    first = _SENTENCE_END_RE.split(body, maxsplit=1)[0]
+    return f"{speaker}: {clip_to_tokens(first, max_tokens)}"
+
+
+def fold_into_summary(summary: str, entries: List[str], max_tokens: int) -> str:
+    """
+    Incrementally extend the running summary with turns that just left the
+    recent window, dropping the oldest summary lines once it exceeds
+    `max_tokens`.
+    """
+    lines = [line for line in summary.split("\n") if line] if summary else []
+    lines.extend(compress_turn(e) for e in entries)
+    while len(lines) > 1 and approx_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def build_prompt_context(trip_data: Dict[str, str], summary: str, recent: List[str],
+                         budget_tokens: int) -> str:
+    """
+    Assemble trip data, the summary of older turns and as many recent turns as
+    fit (newest first) into a block of at most ~`budget_tokens` tokens.
+    Trip data and the summary may each use up to a quarter of the budget.
+    """
+    parts = []
+    remaining = budget_tokens
+
+    if trip_data:
+        trip_str = " ".join(f"{k}:{plain_text(str(v))}" for k, v in trip_data.items())
+        trip_str = clip_to_tokens(trip_str, budget_tokens // 4)
+        parts.append(f"Known trip data: {trip_str}")
+        remaining -= approx_tokens(parts[-1])
+
+    if summary:
+        summary_str = clip_to_tokens(summary, budget_tokens // 4)
+        parts.append(f"Earlier conversation (summary):\n{summary_str}")
+        remaining -= approx_tokens(parts[-1])
+
+    turns = []
+    for entry in reversed(recent):
+        turn = plain_text(entry)
+        cost = approx_tokens(turn)
+        if cost > remaining:
+            if not turns and remaining > 20:
+                turns.append(clip_to_tokens(turn, remaining))
+            break
+        turns.append(turn)
+        remaining -= cost
+    if turns:
+        parts.append("Recent conversation:\n" + "\n".join(reversed(turns)))
+
+    return "\n".join(parts)
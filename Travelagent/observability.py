@@ -0,0 +1,215 @@
+# observability.py
+
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("travelagent")
+if not logger.handlers:
+    # Structured events are already JSON, so emit them as-is.
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+# Fraction of routine events (and spans) written to the structured log; errors are always logged.
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.1"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Set per HTTP request by the API middleware so log lines from one request can be joined up.
+TRACE_ID: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="")
+
+
+def _label_str(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            row = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, row in sorted(self._values.items()):
+                bounds = [str(b) for b in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, row):
+                    labels = _label_str(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _label_str(self.labelnames, key)
+                lines.append(f"{self.name}_count{labels} {row[-2]}")
+                lines.append(f"{self.name}_sum{labels} {round(row[-1], 6)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms recorded on the hot path, plus gauges read at
+    scrape time from the stats() of caches, pools and upstream guards.
+    render() produces the Prometheus text exposition format.
+    """
+
+    def __init__(self, namespace: str = "travelagent"):
+        self.namespace = namespace
+        self._metrics: List[Any] = []
+        self._collectors: List[Tuple[str, Optional[str], Callable[[], Dict]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(f"{self.namespace}_{name}", help_text, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        metric = Histogram(f"{self.namespace}_{name}", help_text, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, stats_fn: Callable[[], Dict], label: Optional[str] = None):
+        """
+        Export the numeric fields of stats_fn() as gauges named <namespace>_<prefix>_<field>.
+        With `label`, stats_fn() returns {label_value: {field: value}} instead.
+        """
+        with self._lock:
+            self._collectors.append((prefix, label, stats_fn))
+
+    def _render_collector(self, prefix: str, label: Optional[str], stats_fn) -> List[str]:
+        try:
+            stats = stats_fn()
+        except Exception as e:
+            logger.warning("metrics collector %s failed: %s", prefix, e)
+            return []
+        rows = stats.items() if label else [(None, stats)]
+        series: Dict[str, List[str]] = {}
+        for label_value, fields in rows:
+            for field, value in fields.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.namespace}_{prefix}_{field}"
+                labels = _label_str((label,), (label_value,)) if label else ""
+                series.setdefault(name, []).append(f"{name}{labels} {value}")
+        lines = []
+        for name, samples in series.items():
+            lines += [f"# TYPE {name} gauge", *samples]
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines += metric.render()
+        for prefix, label, stats_fn in collectors:
+            lines += self._render_collector(prefix, label, stats_fn)
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+SPAN_SECONDS = METRICS.histogram("span_seconds", "Duration of instrumented operations.", ("kind", "name"))
+SPAN_ERRORS = METRICS.counter("span_errors_total", "Instrumented operations that raised.", ("kind", "name"))
+
+
+def log_event(event: str, sample_rate: Optional[float] = None, level: int = logging.INFO, **fields):
+    """Write one JSON log line for `event`, keeping only a `sample_rate` fraction of them."""
+    rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate < 1.0 and random.random() >= rate:
+        return
+    if not logger.isEnabledFor(level):
+        return
+    record = {"event": event, "ts": round(time.time(), 3), **fields}
+    trace_id = TRACE_ID.get()
+    if trace_id:
+        record["trace_id"] = trace_id
+    logger.log(level, json.dumps(record, default=str))
+
+
+# Callbacks receiving (kind, name, seconds) for every span, e.g. the benchmark driver's sample sink.
+SPAN_LISTENERS: List[Callable[[str, str, float], None]] = []
+
+
+def record_span(kind: str, name: str, seconds: float, error: Optional[BaseException] = None, **fields):
+    """Record a finished span; span() calls this, and so can code that times itself."""
+    SPAN_SECONDS.observe(seconds, kind=kind, name=name)
+    for listener in SPAN_LISTENERS:
+        listener(kind, name, seconds)
+    if error is not None:
+        SPAN_ERRORS.inc(kind=kind, name=name)
+        log_event("span", sample_rate=1.0, level=logging.WARNING, kind=kind, name=name,
+                  seconds=round(seconds, 4), error=repr(error), **fields)
+    else:
+        log_event("span", kind=kind, name=name, seconds=round(seconds, 4), **fields)
+
+
+@contextmanager
+def span(kind: str, name: str, **fields) -> Iterator[None]:
+    """
+    Time a block as one span: its duration goes to the span_seconds histogram
+    under (kind, name), failures to span_errors_total, and a sampled share of
+    spans (every failed one) to the structured log.
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        record_span(kind, name, time.perf_counter() - start, error, **fields)
@@ -0,0 +1,15 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+# Modules import each other as top-level packages (tools, agents, ...), as when run from Travelagent/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# tools.search_tools reads st.secrets at import, which raises when no secrets.toml exists.
+from streamlit import config  # noqa: E402
+
+_secrets = tempfile.NamedTemporaryFile(suffix=".toml", delete=False)
+_secrets.close()
+config.set_option("secrets.files", [_secrets.name])
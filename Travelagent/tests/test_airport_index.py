@@ -0,0 +1,56 @@
+# tests/test_airport_index.py
+
+import difflib
+from types import SimpleNamespace
+
+from agents import multi_agents
+from tools.airport_index import AirportIndex
+
+
+def test_learned_codes_are_capped_and_exact_only():
+    index = AirportIndex(learned_max_entries=2)
+    size = len(index)
+    index.learn("Smalltown Alpha", "AAA")
+    index.learn("Smalltown Beta", "BBB")
+    assert index.lookup("smalltown alpha").code == "AAA"  # refreshes Alpha
+    index.learn("Smalltown Gamma", "CCC")
+
+    assert index.lookup("Smalltown Beta") is None  # least recently used, evicted
+    assert index.lookup("Smalltown Alpha").match_type == "learned"
+    assert index.lookup("Smalltown Gamma").code == "CCC"
+    assert index.lookup("Smalltown Gam") is None  # no prefix matches on learned keys
+    assert len(index) == size
+
+
+def test_prefixes_must_name_one_place():
+    index = AirportIndex()
+    assert index.lookup("san fran").code == "SFO"
+    lond = index.lookup("Lond")  # London and its airports' names: the metro area covers them all
+    assert (lond.code, lond.match_type) == ("LON", "prefix")
+    assert index.lookup("san j") is None  # San Jose or San Juan
+
+
+def test_ambiguous_places_fall_through_to_the_llm(monkeypatch):
+    asked = []
+
+    class StubLLM:
+        def invoke(self, messages):
+            asked.append(messages[0].content)
+            return SimpleNamespace(content="SJC")
+
+    monkeypatch.setattr(multi_agents, "AIRPORT_INDEX", AirportIndex())
+    agent = multi_agents.TripPlannerAgent(llm=StubLLM())
+    assert agent.get_iata_code("San Fran") == "SFO"
+    assert agent.get_iata_code("San J") == "SJC"
+    assert agent.get_iata_code("san j") == "SJC"  # learned, not asked again
+    assert asked == ["Please provide only the IATA airport code for the city: San J."]
+
+
+def test_fuzzy_matching_skips_only_keys_that_cannot_reach_the_cutoff():
+    for cutoff in (0.6, 0.8, 0.9):
+        index = AirportIndex(fuzzy_cutoff=cutoff)
+        for query in ("heathrw", "barcelna", "sydeny", "sao paolo", "los angles", "xyzzy"):
+            everything = difflib.get_close_matches(query, index._sorted_keys, n=1, cutoff=cutoff)
+            assert difflib.get_close_matches(query, index._fuzzy_candidates(query), n=1, cutoff=cutoff) == everything
+        assert len(index._fuzzy_candidates("heathrw")) < len(index)
+    assert AirportIndex().lookup("Heathrw").code == "LHR"
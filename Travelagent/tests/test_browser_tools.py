@@ -0,0 +1,105 @@
+# tests/test_browser_tools.py
+
+import asyncio
+import io
+import threading
+import time
+from types import SimpleNamespace
+
+import requests
+
+import tools.browser_tools as browser_tools
+from tools.browser_tools import BrowserTool, PageSummarizer, aiter_page_chunks, iter_page_chunks
+
+PAGE = ("<html><head><title>Rome guide</title><style>p { color: red }</style></head><body>"
+        "<h1>Museums</h1><p>The Vatican <b>Museums</b> open at 9&nbsp;am.</p>"
+        "<script>track('view')</script><ul><li>Borghese Gallery</li><li>Capitoline &amp; Forum</li></ul>"
+        "</body></html>")
+
+
+class CountingLLM:
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+            return SimpleNamespace(content=f"summary {len(self.prompts)}")
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+def _pieces(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def test_html_is_reduced_to_text_blocks():
+    assert list(iter_page_chunks([PAGE], size=1000)) == [
+        "Rome guide\n\nMuseums\n\nThe Vatican Museums open at 9 am.\n\nBorghese Gallery\n\nCapitoline & Forum"]
+
+
+def test_chunks_are_bounded_and_independent_of_how_the_page_arrives():
+    page = "".join(f"<p>{'word ' * n}</p>" for n in (5, 40, 300, 2, 90))
+    expected = list(iter_page_chunks([page], size=200))
+    assert all(len(chunk) <= 200 for chunk in expected)
+    assert len(expected) > 3
+    for piece_size in (7, 64, 1000):
+        assert list(iter_page_chunks(_pieces(page, piece_size), size=200)) == expected
+        assert asyncio.run(_collect(aiter_page_chunks(_aiter(_pieces(page, piece_size)), size=200))) == expected
+
+
+def test_unchanged_chunks_and_pages_are_not_summarized_again():
+    llm = CountingLLM()
+    summarizer = PageSummarizer(llm=llm, chunk_size=60, parallelism=2)
+    page = _pieces(PAGE * 3, 50)
+
+    first = summarizer.summarize_stream("https://rome.example/guide", page, {})
+    calls = len(llm.prompts)
+    assert calls > summarizer.counts["chunks"]  # map steps plus at least one reduce
+
+    # Same content: every chunk is a hash hit and the page's reduce is skipped.
+    assert summarizer.summarize_stream("https://rome.example/guide", page, {}) == first
+    assert len(llm.prompts) == calls and summarizer.counts["unchanged"] == 1
+
+    # Same content on another URL: chunk summaries are reused, only the reduce runs.
+    asyncio.run(summarizer.asummarize_stream("https://mirror.example/guide", _aiter(page), {}))
+    reduces = llm.prompts[calls:]
+    assert reduces and all(p.startswith(browser_tools.REDUCE_PROMPT) for p in reduces)
+
+
+def test_pages_are_revalidated_with_their_etag(monkeypatch):
+    summarizer = PageSummarizer(llm=CountingLLM(), ttl=60)
+    monkeypatch.setattr(browser_tools, "BROWSER_SUMMARIZER", summarizer)
+    sent = []
+
+    def post(url, headers, data, stream):
+        sent.append(headers)
+        response = requests.Response()
+        response.status_code = 304
+        response.raw = io.BytesIO(b"")
+        return response
+
+    monkeypatch.setattr(browser_tools.http_client, "post", post)
+    summarizer.store("https://rome.example/", {"ETag": '"v1"', "Last-Modified": "Mon, 04 May 2026 08:00:00 GMT"},
+                     ["hash"], "Cached summary")
+
+    assert BrowserTool.scrape_and_summarize_website.invoke("https://rome.example/") == "Cached summary"
+    assert sent == []  # fresh: no request at all
+
+    summarizer.pages.set("https://rome.example/", summarizer.pages.get("https://rome.example/")[0], time.time() - 120)
+    assert BrowserTool.scrape_and_summarize_website.invoke("https://rome.example/") == "Cached summary"
+    assert sent[0]["If-None-Match"] == '"v1"'
+    assert sent[0]["If-Modified-Since"] == "Mon, 04 May 2026 08:00:00 GMT"
+    assert summarizer.counts["not_modified"] == 1
+    assert summarizer.cached("https://rome.example/") == ("Cached summary", {})  # 304 restarted the TTL
@@ -0,0 +1,89 @@
+# tests/test_cache.py
+
+import threading
+import time
+
+import pytest
+
+from tools.cache import MemoryCacheBackend, ResultCache, SQLiteCacheBackend, cache_key
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend_factory(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCacheBackend
+    return lambda max_entries: SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries)
+
+
+def test_least_recently_used_entry_is_evicted(backend_factory):
+    backend = backend_factory(2)
+    backend.set("a", {"v": 1}, time.time())
+    backend.set("b", {"v": 2}, time.time())
+    time.sleep(0.01)  # SQLite orders by last_access timestamps
+    assert backend.get("a")[0] == {"v": 1}
+    time.sleep(0.01)
+    backend.set("c", {"v": 3}, time.time())
+
+    assert backend.get("b") is None
+    assert backend.get("a")[0] == {"v": 1} and backend.get("c")[0] == {"v": 3}
+    assert len(backend) == 2 and backend.evictions == 1
+
+
+def test_fresh_stale_and_expired_entries(backend_factory):
+    cache = ResultCache(backend_factory(10), ttl=60, stale_ttl=60)
+    refreshed = threading.Event()
+
+    def fetch():
+        refreshed.set()
+        return {"v": "new"}
+
+    for params, age in (({"q": "fresh"}, 10), ({"q": "stale"}, 90), ({"q": "expired"}, 200)):
+        cache.backend.set(cache_key(params), {"v": "old"}, time.time() - age)
+
+    assert cache.get_or_fetch({"q": "fresh"}, fetch) == {"v": "old"}
+    assert not refreshed.is_set()
+    assert cache.get_or_fetch({"q": "expired"}, fetch) == {"v": "new"}  # fetched inline
+    refreshed.clear()
+    assert cache.get_or_fetch({"q": "stale"}, fetch) == {"v": "old"}  # served, refreshed behind
+    deadline = time.monotonic() + 2
+    while cache.refreshes == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get({"q": "stale"}) == {"v": "new"}
+    assert cache.stale_hits == 1 and cache.refreshes == 1
+
+
+def test_results_the_caller_rejects_are_not_cached(backend_factory):
+    cache = ResultCache(backend_factory(10))
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return {"error": "quota"}
+
+    for _ in range(2):
+        cache.get_or_fetch({"q": "x", "api_key": "k"}, fetch, should_cache=lambda v: "error" not in v)
+    assert len(fetches) == 2 and len(cache.backend) == 0
+
+
+def test_sqlite_entries_survive_a_new_instance_and_concurrent_use(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteCacheBackend(path).set("k", {"v": 1}, time.time())
+    backend = SQLiteCacheBackend(path, max_entries=50)
+    assert backend.get("k")[0] == {"v": 1}
+
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(50):
+                backend.set(f"{n}-{i}", i, time.time())
+                len(backend)
+        except Exception as e:  # sqlite3.ProgrammingError when the connection is used unlocked
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and len(backend) == 50
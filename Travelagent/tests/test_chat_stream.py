@@ -0,0 +1,89 @@
+# tests/test_chat_stream.py
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import api
+import app
+
+
+class Lines:
+    """The part of a requests.Response that iter_sse reads."""
+
+    def __init__(self, lines, status_code=200):
+        self.lines = list(lines)
+        self.status_code = status_code
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def test_iter_sse_joins_multiline_data_and_reads_the_end_marker():
+    stream = Lines([
+        ": keep-alive",
+        "event: agent",
+        'data: {"agent": "Weather",',
+        'data:  "output": "Sunny"}',
+        "",
+        "",
+        "event: token",
+        'data: {"text": "line one\\nline two"}',
+        "",
+        'data: ["no event name"]',
+        "",
+        "event: done",
+        'data: {"answer": "ok"}',  # the last event may end without a blank line
+    ])
+
+    assert list(app.iter_sse(stream)) == [
+        ("agent", {"agent": "Weather", "output": "Sunny"}),
+        ("token", {"text": "line one\nline two"}),
+        ("message", ["no event name"]),
+        ("done", {"answer": "ok"}),
+    ]
+
+
+class StreamingChatbot:
+    async def astream_agent(self, messages, thread_id):
+        yield {"event": "agent", "data": {"agent": "DestinationResearch", "output": "Museums\n<b>Rome</b>"}}
+        yield {"event": "token", "data": {"text": "Visit the\n"}}
+        yield {"event": "token", "data": {"text": "Vatican."}}
+        yield {"event": "done", "data": {"answer": "Visit the\nVatican."}}
+
+
+class Box:
+    def __init__(self, shown):
+        self.shown = shown
+
+    def markdown(self, text, **kwargs):
+        self.shown.append(("markdown", text))
+
+    def caption(self, text):
+        self.shown.append(("caption", text))
+
+
+def test_streamed_reply_is_rendered_up_to_the_done_event(monkeypatch):
+    client = TestClient(api.app)
+    monkeypatch.setattr(api.app.state, "agents", SimpleNamespace(chatbot=lambda memory: StreamingChatbot()),
+                        raising=False)
+
+    @contextmanager
+    def post(url, json, headers, stream):
+        with client.stream("POST", "/chat/stream", json=json, headers=headers) as resp:
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            yield Lines(list(resp.iter_lines()), resp.status_code)
+
+    shown, errors = [], []
+    monkeypatch.setattr(app.requests, "post", post)
+    monkeypatch.setattr(app, "st", SimpleNamespace(empty=lambda: Box(shown), error=errors.append))
+    app.stream_chat_reply("What should we see in Rome?", {})
+
+    assert shown == [
+        ("caption", "✅ DestinationResearch done"),
+        ("markdown", "Visit the\n▌"),
+        ("markdown", "Visit the\nVatican.▌"),
+        ("markdown", "Visit the\nVatican."),
+    ]
+    assert errors == []
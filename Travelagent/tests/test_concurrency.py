@@ -0,0 +1,131 @@
+# tests/test_concurrency.py
+
+import asyncio
+import time
+
+import pytest
+
+from agents.concurrency import AgentTimeout, StagePlan, arun_fanout, iter_fanout, run_fanout
+
+
+def _sleeper(seconds, result=None):
+    def fn():
+        time.sleep(seconds)
+        return result
+    return fn
+
+
+def _asleeper(seconds, result=None):
+    async def fn():
+        await asyncio.sleep(seconds)
+        return result
+    return fn
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+def test_slow_and_failing_tasks_do_not_hold_up_the_others():
+    start = time.monotonic()
+    order = [name for name, _ in iter_fanout([("slow", _sleeper(1.0)), ("fast", _sleeper(0.01, "ok")),
+                                              ("broken", _fail)], max_workers=3, timeout=0.2)]
+    results = run_fanout([("slow", _sleeper(1.0)), ("fast", _sleeper(0.01, "ok")), ("broken", _fail)],
+                         max_workers=3, timeout=0.2)
+
+    assert order[-1] == "slow"
+    assert list(results) == ["slow", "fast", "broken"]
+    assert results["fast"] == "ok"
+    assert isinstance(results["broken"], ValueError)
+    assert isinstance(results["slow"], AgentTimeout)
+    assert time.monotonic() - start < 1.0  # timed-out threads are abandoned, not joined
+
+
+def test_timeout_starts_when_a_queued_task_starts():
+    # One worker: the second task waits ~0.15s for the first, then has its own 0.2s.
+    results = run_fanout([("first", _sleeper(0.15, 1)), ("second", _sleeper(0.15, 2))],
+                         max_workers=1, timeout=0.2)
+    assert results == {"first": 1, "second": 2}
+
+
+def test_async_fanout_cancels_slow_tasks():
+    async def broken():
+        raise ValueError("boom")
+
+    start = time.monotonic()
+    results = asyncio.run(arun_fanout([("slow", _asleeper(5)), ("fast", _asleeper(0.01, "ok")),
+                                       ("broken", broken)], max_workers=2, timeout=0.1))
+    assert results["fast"] == "ok"
+    assert isinstance(results["slow"], AgentTimeout)
+    assert isinstance(results["broken"], ValueError)
+    assert time.monotonic() - start < 1.0
+
+
+def _plan(sleep, arrival=None):
+    """flights needs both airports; format is tolerant and sees whatever they produced."""
+    plan = StagePlan()
+    plan.add("departure", sleep(0.01, "BOS"))
+    plan.add("arrival", arrival or sleep(0.01, "FCO"))
+    plan.add("hotels", sleep(0.05, ["Hotel Roma"]))
+    plan.add("flights", lambda dep, arr: f"{dep}-{arr}", deps=("departure", "arrival"))
+    plan.add("format", lambda flights, hotels: (flights, hotels), deps=("flights", "hotels"), tolerant=True)
+    return plan
+
+
+def test_stages_receive_their_dependencies_results():
+    results, timings = _plan(_sleeper).run()
+    assert results["format"] == ("BOS-FCO", ["Hotel Roma"])
+    assert set(timings) == {"departure", "arrival", "hotels", "flights", "format", "total"}
+
+    results, _ = asyncio.run(_plan(_asleeper).arun())
+    assert results["format"] == ("BOS-FCO", ["Hotel Roma"])
+
+
+def test_failures_skip_dependents_unless_they_are_tolerant():
+    for run in (lambda plan: plan.run(), lambda plan: asyncio.run(plan.arun())):
+        results, _ = run(_plan(_sleeper, arrival=_fail))
+        assert isinstance(results["flights"], ValueError)  # skipped, inherits the error
+        flights, hotels = results["format"]  # tolerant: runs with the error in place
+        assert flights is results["arrival"] and hotels == ["Hotel Roma"]
+
+
+def test_a_stage_past_its_timeout_is_abandoned():
+    plan = StagePlan()
+    plan.add("slow", _sleeper(1.0), timeout=0.1)
+    plan.add("after", lambda slow: slow, deps=("slow",), tolerant=True)
+    start = time.monotonic()
+    results, _ = plan.run()
+    assert isinstance(results["slow"], AgentTimeout) and results["after"] is results["slow"]
+    assert time.monotonic() - start < 0.5
+
+    plan = StagePlan()
+    plan.add("slow", _asleeper(1.0), timeout=0.1)
+    results, _ = asyncio.run(plan.arun())
+    assert isinstance(results["slow"], AgentTimeout)
+
+
+def test_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="unknown stage 'departure'"):
+        StagePlan().add("flights", lambda: None, deps=("departure",))
+
+
+def _deadline_plan(sleep):
+    plan = StagePlan()
+    plan.add("quick", sleep(0.01, "done"))
+    plan.add("slow", sleep(1.0), timeout=5.0)  # the plan deadline wins over a looser stage timeout
+    plan.add("format", lambda quick, slow: (quick, slow), deps=("quick", "slow"), tolerant=True)
+    return plan
+
+
+def test_plan_deadline_times_out_running_stages_and_skips_later_ones():
+    runs = (lambda: _deadline_plan(_sleeper).run(deadline=0.2),
+            lambda: asyncio.run(_deadline_plan(_asleeper).arun(deadline=0.2)))
+    for run in runs:
+        start = time.monotonic()
+        results, timings = run()
+        assert time.monotonic() - start < 0.6
+        assert results["quick"] == "done"
+        assert isinstance(results["slow"], AgentTimeout)
+        assert isinstance(results["format"], AgentTimeout)
+        assert "not started before the deadline" in str(results["format"])
+        assert timings["total"] < 0.6
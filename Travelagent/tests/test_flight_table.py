@@ -0,0 +1,48 @@
+# tests/test_flight_table.py
+
+import numpy as np
+
+from tools.flight_table import FlightTable
+
+
+def _option(price, duration, departs, arrives="2026-11-01 14:00", legs=1):
+    segment = {"departure_airport": {"time": departs}, "arrival_airport": {"time": arrives}, "duration": duration}
+    return {"flights": [segment] * legs, "price": price, "total_duration": duration,
+            "carbon_emissions": {"this_flight": 400000}}
+
+
+def test_unparseable_times_become_nat():
+    table = FlightTable.from_options([_option(300, 200, "2026-11-01 8:15"), _option(250, 300, "soon"),
+                                      _option(200, 400, None)])
+    assert str(table.departure[0]) == "2026-11-01T08:15"
+    assert np.isnat(table.departure[1]) and np.isnat(table.departure[2])
+
+
+def test_time_filters_exclude_rows_without_a_time():
+    table = FlightTable.from_options([_option(300, 200, "2026-11-01 09:30"), _option(250, 300, "unknown")])
+    assert table.mask(depart_before="23:59").tolist() == [True, False]
+    assert table.mask(depart_after="00:00").tolist() == [True, False]
+
+
+def test_pareto_and_ranking():
+    table = FlightTable.from_options([
+        _option(500, 120, "2026-11-01 09:00"),
+        _option(300, 300, "2026-11-01 09:00"),
+        _option(450, 400, "2026-11-01 09:00", legs=2),  # dominated by the 300 option
+    ])
+    assert table.pareto().tolist() == [True, True, False]
+    assert table.order({"price": 1.0})[0] == 1
+    assert table.filter(max_stops=0, max_price=400).price.tolist() == [300.0]
+
+
+def test_exact_ties_share_their_place_on_the_frontier():
+    table = FlightTable.from_options([
+        _option(300, 300, "2026-11-01 09:00"),
+        _option(300, 300, "2026-11-01 18:00"),  # same price and duration: neither beats the other
+        _option(300, 350, "2026-11-01 09:00"),  # same price, slower: dominated
+        _option(500, 300, "2026-11-01 09:00"),  # same duration, pricier: dominated
+        _option(500, 300, "2026-11-01 11:00"),  # tied with a dominated option: dominated too
+        _option(200, 500, "2026-11-01 09:00"),
+    ])
+    assert table.pareto().tolist() == [True, True, False, False, False, True]
+    assert table.order({"price": 1.0, "duration": 1.0}).tolist()[:2] == [0, 1]  # ties keep row order
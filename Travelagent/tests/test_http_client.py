@@ -0,0 +1,47 @@
+# tests/test_http_client.py
+
+import asyncio
+
+import httpx
+import pytest
+
+from tools.http_client import HttpClient, HttpMetrics
+
+
+def _client(handler) -> HttpClient:
+    client = HttpClient(max_retries=0)
+    client.metrics = HttpMetrics()
+    client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_cancelled_requests_leave_the_in_flight_gauge():
+    async def slow(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200)
+
+    client = _client(slow)
+
+    async def stream():
+        async with client.astream("GET", "http://slow.test/"):
+            pass
+
+    for call in (client.aget("http://slow.test/"), stream()):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(call, 0.05))
+    hosts = client.metrics.snapshot()
+    assert hosts["slow.test"]["requests"] == 2
+    assert hosts["slow.test"]["in_flight"] == 0
+    assert hosts["slow.test"]["errors"] == 0
+
+
+def test_unexpected_errors_leave_the_in_flight_gauge(monkeypatch):
+    client = _client(lambda request: httpx.Response(200))
+
+    def broken(*args, **kwargs):
+        raise ValueError("bad header")
+
+    monkeypatch.setattr(client._session, "request", broken)
+    with pytest.raises(ValueError):
+        client.get("http://broken.test/")
+    assert client.metrics.snapshot()["broken.test"]["in_flight"] == 0
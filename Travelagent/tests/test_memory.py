@@ -0,0 +1,106 @@
+# tests/test_memory.py
+
+import sqlite3
+import threading
+import time
+
+from memory import SessionStore
+from memory_backends import InProcessBackend, SQLiteBackend
+from memory_compaction import approx_tokens
+
+
+def test_least_recently_used_sessions_are_evicted_over_the_cap():
+    store = SessionStore(max_sessions=2, sweep_interval=0)
+    for session_id in ("a", "b"):
+        store.get(session_id).add_user_message(f"hello from {session_id}")
+    store.get("a")  # a is now more recent than b
+    store.get("c")
+
+    assert len(store) == 2 and store.evictions == 1
+    assert store.get("b").history == []
+    assert store.get("a").history == []  # evicted in turn when b came back
+    assert store.stats()["sessions"] == 2
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(idle_ttl=0.05, sweep_interval=0)
+    store.get("idle").update_trip_data({"arrival_city": "Rome"})
+    time.sleep(0.1)
+    store.get("active")
+    assert len(store) == 1
+    assert store.get("idle").get_trip_data() == {}
+
+
+def test_history_is_capped_by_entries_and_bytes():
+    store = SessionStore(max_history=3, max_history_bytes=60)
+    memory = store.get("s")
+    for i in range(5):
+        memory.add_user_message(f"turn {i}")
+    assert memory.history == ["User: turn 2", "User: turn 3", "User: turn 4"]
+
+    memory.add_assistant_message("x" * 200)  # one oversized entry is truncated, not dropped
+    assert memory.history == ["Assistant: " + "x" * 49]
+    assert memory.size_bytes() <= 60
+
+
+def test_sqlite_sessions_persist_across_store_instances(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    first = SessionStore(SQLiteBackend(path)).get("s")
+    first.update_trip_data({"departure_city": "Boston", "arrival_city": "Rome"})
+    first.add_user_message("Flights to Rome in May?")
+    first.update_trip_data({"arrival_city": "Milan"})
+
+    # A second store (e.g. another uvicorn worker) sees the same session.
+    second = SessionStore(SQLiteBackend(path)).get("s")
+    assert second.history == ["User: Flights to Rome in May?"]
+    assert second.get_trip_data() == {"departure_city": "Boston", "arrival_city": "Milan"}
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_backend_takes_concurrent_writers(tmp_path):
+    store = SessionStore(SQLiteBackend(str(tmp_path / "memory.sqlite3")), max_history=100)
+    errors = []
+
+    def writer(n):
+        try:
+            memory = store.get("shared")
+            for i in range(20):
+                memory.add_user_message(f"{n}-{i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(store.get("shared").history) == 80
+
+
+def _long_session(backend):
+    store = SessionStore(backend, compact_window=4, summary_tokens=60)
+    memory = store.get("s")
+    memory.update_trip_data({"departure_city": "Boston", "arrival_city": "Rome"})
+    for i in range(30):
+        memory.add_user_message(f"Question {i} about <b>Rome</b>. It has a second sentence that gets dropped.")
+        memory.add_assistant_message(f"Answer {i} with plenty of detail about museums, food and transit.")
+    return memory
+
+
+def test_compaction_keeps_a_recent_window_and_a_bounded_summary(tmp_path):
+    for backend in (InProcessBackend(), SQLiteBackend(str(tmp_path / "memory.sqlite3"))):
+        memory = _long_session(backend)
+        assert [entry.split(" about")[0].split(" with")[0] for entry in memory.history] == [
+            "User: Question 28", "Assistant: Answer 28", "User: Question 29", "Assistant: Answer 29"]
+
+        summary = memory.get_summary()
+        assert approx_tokens(summary) <= 60
+        # The newest folded turns are kept, reduced to plain first sentences.
+        assert summary.splitlines()[-1] == "Assistant: Answer 27 with plenty of detail about museums, food and transit."
+        assert "<b>" not in summary and "second sentence" not in summary
+
+        context = memory.get_prompt_context(budget_tokens=120)
+        assert approx_tokens(context) <= 120
+        assert context.startswith("Known trip data: departure_city:Boston arrival_city:Rome")
+        assert "Answer 29" in context
@@ -0,0 +1,102 @@
+# tests/test_resilience.py
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.resilience import CircuitOpen, Upstream, upstream
+from tools.browser_tools import PageSummarizer
+from tools.cache import cache_key
+from tools.search_tools import SEARCH_CACHE, SearchTools
+from tools.serpapi_client import SERPAPI_CACHE, error_message, serpapi_search
+from tools.tool_registry import tool_registry
+from tools.weather_forecast import _provider_failed
+
+
+def _upstream(**overrides):
+    config = dict(rate=0, burst=1, max_concurrency=4, min_concurrency=1, target_latency=5.0,
+                  failure_threshold=3, reset_timeout=60.0, max_wait=0.1)
+    return Upstream("test", **{**config, **overrides})
+
+
+def test_returned_errors_count_as_failures_and_open_the_circuit():
+    upstream = _upstream()
+    failed = lambda data: error_message(data) is not None
+    for _ in range(3):
+        assert upstream.call(lambda: {"error": "Invalid API key"}, failed=failed) == {"error": "Invalid API key"}
+    assert upstream.snapshot()["errors"] == 3
+    assert upstream.breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        upstream.call(lambda: [], failed=failed)
+
+
+def test_async_guard_judges_results_too():
+    upstream = _upstream()
+    failed = lambda data: "organic" not in data
+
+    async def search(data):
+        return data
+
+    asyncio.run(upstream.acall(lambda: search({"organic": []}), failed=failed))
+    asyncio.run(upstream.acall(lambda: search({"message": "Unauthorized"}), failed=failed))
+    assert upstream.snapshot()["ok"] == 1
+    assert upstream.snapshot()["errors"] == 1
+
+
+def test_user_errors_are_not_upstream_failures():
+    assert _provider_failed({"cod": "500", "message": "Internal error"})
+    assert not _provider_failed({"cod": "404", "message": "city not found"})
+    assert error_message({"error": "Google Flights hasn't returned any results for this query."}) is None
+    assert error_message({"error": "Invalid API key."}) == "Invalid API key."
+
+
+def _open_circuit(name, monkeypatch):
+    breaker = upstream(name).breaker
+    monkeypatch.setattr(breaker, "state", "open")
+    monkeypatch.setattr(breaker, "opened_at", time.monotonic())
+
+
+def test_cache_hits_are_served_while_the_circuit_is_open(monkeypatch):
+    params = {"engine": "google_flights", "departure_id": "BOS", "arrival_id": "FCO", "api_key": "secret"}
+    SERPAPI_CACHE.put(params, {"best_flights": []})
+    SEARCH_CACHE.put({"q": "rome museums"}, {"organic": [{"title": "Vatican", "link": "https://v.va", "snippet": ""}]})
+    _open_circuit("serpapi", monkeypatch)
+    _open_circuit("serper", monkeypatch)
+
+    assert serpapi_search(params) == {"best_flights": []}
+    assert "Vatican" in tool_registry.invoke("search_internet", "Rome  Museums")
+    assert "Vatican" in asyncio.run(tool_registry.ainvoke("search_internet", "rome museums"))
+
+    with pytest.raises(CircuitOpen):
+        serpapi_search({**params, "arrival_id": "CDG"})
+    assert "serper circuit is open" in SearchTools.search_internet.invoke("paris museums")
+
+
+def test_stale_refreshes_go_through_the_guard(monkeypatch):
+    params = {"engine": "google_hotels", "q": "Lisbon", "check_in_date": "2026-05-01"}
+    SERPAPI_CACHE.backend.set(cache_key(params), {"properties": []}, time.time() - 3600)  # past its TTL, within stale_ttl
+    _open_circuit("serpapi", monkeypatch)
+    rejected = upstream("serpapi").counts["short_circuited"]
+
+    assert serpapi_search(params) == {"properties": []}  # stale, refreshed in the background
+    deadline = time.monotonic() + 2
+    while upstream("serpapi").counts["short_circuited"] == rejected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert upstream("serpapi").counts["short_circuited"] == rejected + 1
+
+
+def test_page_summaries_go_through_the_openai_guard():
+    class LLM:
+        def invoke(self, prompt):
+            return SimpleNamespace(content="summary")
+
+        async def ainvoke(self, prompt):
+            return SimpleNamespace(content="summary")
+
+    summarizer = PageSummarizer(llm=LLM())
+    calls = upstream("openai").counts["calls"]
+    assert summarizer._summarize("page text") == "summary"
+    assert asyncio.run(summarizer._asummarize("page text")) == "summary"
+    assert upstream("openai").counts["calls"] == calls + 2
@@ -0,0 +1,59 @@
+# tests/test_response_cache.py
+
+from types import SimpleNamespace
+
+from agents.multi_agents import ChatbotAgent, DestinationResearchAgent
+from agents.response_cache import LLMResponseCache
+from langchain_core.messages import HumanMessage
+from memory import SessionStore
+from tools import search_tools
+
+TRIP = {"departure_city": "Boston", "arrival_city": "Rome"}
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append("\n".join(m.content for m in messages))
+        return SimpleNamespace(content="The Vatican Museums and the Borghese Gallery.")
+
+
+def _chatbot(sessions, session_id, agent, cache):
+    memory = sessions.get(session_id)
+    memory.update_trip_data(TRIP)
+    router = SimpleNamespace(route=lambda query: SimpleNamespace(
+        agents=("DestinationResearch",), scores={}, fallback=False))
+    return ChatbotAgent({"DestinationResearch": agent}, memory, llm=object(), router=router,
+                        response_cache=cache)
+
+
+def test_sessions_with_different_histories_share_answers(monkeypatch):
+    monkeypatch.setattr(search_tools, "_search", lambda query: {"organic": []})
+    llm = RecordingLLM()
+    agent = DestinationResearchAgent(llm=llm)
+    cache = LLMResponseCache(similarity=0.6)
+    sessions = SessionStore()
+
+    first = _chatbot(sessions, "a", agent, cache)
+    first.memory.add_user_message("We land at 7am, is there a shuttle?")
+    first.memory.add_assistant_message("Yes, the Leonardo Express.")
+    answer = first.invoke_agent([HumanMessage(content="What are the best museums in Rome?")], "a")
+
+    second = _chatbot(sessions, "b", agent, cache)
+    second.memory.add_user_message("Is Trastevere a good area to stay?")
+    assert second.invoke_agent([HumanMessage(content="Best museums in Rome to visit?")], "b") == answer
+
+    assert len(llm.prompts) == 1 and cache.near_hits == 1
+    # The cacheable agent saw the trip and the question, not the session's history.
+    assert "rome" in llm.prompts[0].lower() and "shuttle" not in llm.prompts[0]
+
+
+def test_history_dependent_questions_bypass_the_cache():
+    cache = LLMResponseCache()
+    assert cache.prepare("DestinationResearch", "prompt", "Is the second one open late?", TRIP) is None
+    fresh = cache.prepare("DestinationResearch", "prompt", "Where should we eat?", TRIP)
+    cache.put(fresh, "Try Da Enzo.")
+    same = cache.prepare("DestinationResearch", "prompt", "where should we eat", {**TRIP, "adults": ""})
+    assert cache.get(same) == "Try Da Enzo."
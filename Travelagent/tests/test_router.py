@@ -0,0 +1,12 @@
+# tests/test_router.py
+
+from agents.router import QueryRouter, DEFAULT_INTENTS
+
+
+def test_number_placeholder_needs_a_number():
+    router = QueryRouter(DEFAULT_INTENTS)
+    assert router.route("plan a 3-day trip to Rome").matched.get("ItineraryPlanner") == ("# day",)
+    assert router.route("suggest a 4 day itinerary").agents == ("ItineraryPlanner",)
+    # A bare "day"/"days" is not "# day".
+    assert "ItineraryPlanner" not in router.route("What is the best day to visit the Louvre?").agents
+    assert router.route("How many days should I stay?").agents == ("Accommodation",)
@@ -0,0 +1,81 @@
+# tests/test_search_tools.py
+
+import asyncio
+from types import SimpleNamespace
+
+from langchain_core.messages import HumanMessage
+
+from agents.multi_agents import DestinationResearchAgent
+from memory import SESSIONS
+from tools import search_tools
+from tools.search_tools import asearch_many, search_many
+
+RESPONSES = {
+    "rome museums": {"organic": [
+        {"title": "Vatican Museums", "link": "https://www.museivaticani.va/en/?utm_source=ads#top", "snippet": "Sistine Chapel"},
+        {"title": "Borghese Gallery", "link": "https://galleriaborghese.it/", "snippet": "Bernini"},
+    ]},
+    "top attractions in rome": {"organic": [
+        {"title": "Colosseum", "link": "https://colosseo.it", "snippet": "Amphitheatre"},
+        {"title": "Vatican Museums (official)", "link": "HTTPS://WWW.MUSEIVATICANI.VA/en", "snippet": "Tickets"},
+        {"title": "Borghese", "link": "https://galleriaborghese.it", "snippet": ""},
+    ]},
+    "rome food": {"error": "quota exceeded"},
+}
+RESPONSES["museums rome"] = RESPONSES["rome museums"]
+
+
+def _stub_search(monkeypatch, searched=None):
+    def fake(query):
+        if searched is not None:
+            searched.append(query)
+        return RESPONSES[query]
+
+    async def afake(query):
+        return fake(query)
+
+    monkeypatch.setattr(search_tools, "_search", fake)
+    monkeypatch.setattr(search_tools, "_asearch", afake)
+
+
+def test_batch_dedups_urls_across_queries(monkeypatch):
+    _stub_search(monkeypatch)
+    batch = search_many(["Rome museums", "top attractions in Rome", "rome  MUSEUMS", "rome food"])
+
+    # Ranked by position, then query order; a URL seen again only adds its query.
+    assert [(r.title, r.position) for r in batch.results] == [
+        ("Vatican Museums", 1), ("Colosseum", 1), ("Borghese Gallery", 2)]
+    assert batch.results[0].queries == ["rome museums", "top attractions in rome"]
+    assert batch.results[2].queries == ["rome museums", "top attractions in rome"]
+    assert batch.failed_queries == ["rome food"]
+    assert asyncio.run(asearch_many(["rome museums", "top attractions in rome", "rome food"])) == batch
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append("\n".join(m.content for m in messages))
+        return SimpleNamespace(content="Start at the Vatican Museums.")
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+def test_destination_research_answers_from_one_search_batch(monkeypatch):
+    searched = []
+    _stub_search(monkeypatch, searched)
+    SESSIONS.get("research").update_trip_data({"arrival_city": "Rome"})
+    llm = RecordingLLM()
+    agent = DestinationResearchAgent(llm=llm)
+    messages = [HumanMessage(content="Known trip data: arrival_city:Rome\nUser: Museums")]
+
+    assert agent.invoke_agent(messages, "research") == "Start at the Vatican Museums."
+    assert asyncio.run(agent.ainvoke_agent(messages, "research")) == "Start at the Vatican Museums."
+
+    # The question (with the destination) and the attractions query, once per call.
+    assert sorted(searched) == ["museums rome"] * 2 + ["top attractions in rome"] * 2
+    assert llm.prompts[0] == llm.prompts[1]
+    assert llm.prompts[0].count("museivaticani") == 1
+    assert "Colosseum (https://colosseo.it): Amphitheatre" in llm.prompts[0]
@@ -0,0 +1,46 @@
+# tests/test_singleflight.py
+
+import asyncio
+
+import pytest
+
+from tools.singleflight import SingleFlight
+
+
+def test_leader_timeout_does_not_cancel_followers():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.3)
+        return "forecast"
+
+    async def main():
+        leader = asyncio.ensure_future(asyncio.wait_for(flight.ado("paris", fetch), 0.1))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(asyncio.wait_for(flight.ado("paris", fetch), 5))
+        with pytest.raises(asyncio.TimeoutError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "forecast"
+    assert len(calls) == 1
+    assert flight.stats()["saved"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_are_shared_and_counted_once():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise LookupError("no such city")
+
+    async def main():
+        return await asyncio.gather(flight.ado("x", fail), flight.ado("x", fail), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, LookupError) for r in results)
+    assert flight.stats()["errors"] == 1
+    assert flight.stats()["executions"] == 1
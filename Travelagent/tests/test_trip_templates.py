@@ -0,0 +1,70 @@
+# tests/test_trip_templates.py
+
+from agents.trip_result import FlightOption, HotelOption, TripResult
+from trip_templates import render_trip
+
+
+def _result(**fields) -> TripResult:
+    defaults = dict(
+        departure_city="Paris",
+        arrival_city="Tokyo",
+        flights=[FlightOption(airline="Air France", departure_time="2026-11-01 09:00",
+                              arrival_time="2026-11-02 05:30", duration=750, stops=1,
+                              airplane="Boeing 777", price=912.4, carbon_kg=640.2, pareto=True,
+                              airline_logo="https://example.com/af.png")],
+        hotels=[HotelOption(name="Park Hotel", description="Near Shiodome", rate_per_night="$180",
+                            thumbnail="https://example.com/park.jpg")],
+    )
+    return TripResult(**{**defaults, **fields})
+
+
+def test_summary_lists_every_option_and_missing_section():
+    result = _result(flights=[FlightOption(airline="ANA", duration=None, price=None)], hotels=[],
+                     missing={"hotels": "timeout"})
+
+    assert result.summary().splitlines() == [
+        "Trip options from Paris to Tokyo:",
+        "- Flight: ANA, departs , arrives , 0 stop(s), $N/A",
+        "- Hotels unavailable (timeout)",
+    ]
+    assert "(12h 30m)" in _result().summary()
+    assert "- Hotel: Park Hotel, $180 per night" in _result().summary()
+
+
+def test_render_trip_shows_both_sections():
+    html = render_trip(_result().model_dump())
+
+    assert "<h2>Flights from Paris to Tokyo</h2>" in html
+    assert "<h3>Option 1: Air France (nothing cheaper is faster)</h3>" in html
+    assert "<li><strong>Duration:</strong> 12h 30m</li>" in html
+    assert "<li><strong>Price:</strong> $912</li>" in html
+    assert '<img src="https://example.com/af.png" alt="Airline Logo" width="60">' in html
+    assert "<h2>Hotels in Tokyo</h2>" in html
+    assert "<li><strong>Rate per Night:</strong> $180</li>" in html
+
+
+def test_render_trip_explains_missing_and_empty_sections():
+    html = render_trip(_result(flights=[], missing={"flights": "timeout"}).model_dump())
+    assert "Flight results did not arrive in time" in html
+
+    html = render_trip(_result(hotels=[], missing={"hotels": "error"}).model_dump())
+    assert "Hotel results are unavailable right now" in html
+
+    html = render_trip(_result(flights=[], hotels=[]).model_dump())
+    assert "No flight data found." in html and "No hotel data found." in html
+
+
+def test_render_trip_escapes_provider_text():
+    result = _result(
+        arrival_city="Tokyo <Haneda>",
+        flights=[FlightOption(airline="A&B <script>", airline_logo='x" onerror="alert(1)')],
+        hotels=[HotelOption(name="Inn & Suites", description="<b>quiet</b>")],
+    )
+    html = render_trip(result.model_dump())
+
+    assert "Tokyo &lt;Haneda&gt;" in html
+    assert "A&amp;B &lt;script&gt;" in html
+    assert 'src="x&quot; onerror=&quot;alert(1)"' in html
+    assert "Inn &amp; Suites" in html
+    assert "&lt;b&gt;quiet&lt;/b&gt;" in html
+    assert "<script>" not in html and "<b>" not in html
@@ -0,0 +1,95 @@
+# tests/test_weather.py
+
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import tools.weather_forecast as weather_forecast
+from agents.multi_agents import WeatherAgent
+from tools.cache import MemoryCacheBackend, ResultCache
+from tools.weather_forecast import ForecastEngine
+
+TODAY = date(2026, 5, 4)
+
+
+def _forecast(name: str, start: float) -> dict:
+    """Five days of 3-hourly slots in OpenWeather's format, dry except for the second day."""
+    slots = [{"dt": int(start) + i * 3 * 3600,
+              "main": {"temp": 10 + i % 8, "humidity": 60},
+              "pop": 0.8 if 8 <= i < 16 else 0.1,
+              "weather": [{"description": "light rain" if 8 <= i < 16 else "clear sky"}]}
+             for i in range(40)]
+    return {"cod": "200", "city": {"name": name, "timezone": 0}, "list": slots}
+
+
+class FakeOpenWeather:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.queries = []
+
+    def get(self, url, params):
+        self.queries.append(params["q"])
+        time.sleep(self.delay)
+        if params["q"].lower() == "atlantis":
+            data = {"cod": "404", "message": "city not found"}
+        else:
+            # From midnight UTC, so the second day is exactly slots 8-15.
+            midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            data = _forecast(params["q"].title(), midnight.timestamp())
+        return SimpleNamespace(json=lambda: data)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    api = FakeOpenWeather(delay=0.05)
+    monkeypatch.setattr(weather_forecast, "http_client", api)
+    engine = ForecastEngine(ResultCache(MemoryCacheBackend(16), ttl=3600, stale_ttl=0, name="weather"))
+    engine.api = api
+    return engine
+
+
+def test_spellings_of_a_city_share_one_cache_entry(engine):
+    blocks = engine.blocks(["Paris", " paris ", "PARIS"])
+    assert list(blocks) == ["Paris"]
+    assert engine.blocks(["paris"])["paris"]["city"] == "Paris"
+    assert engine.api.queries == ["Paris"]
+
+
+def test_concurrent_misses_share_one_fetch(engine):
+    threads = [threading.Thread(target=engine.blocks, args=([city],)) for city in ("Rome", "rome", "ROME ")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(engine.api.queries) == 1
+    assert engine.stats()["fetches"] == 1
+
+
+def test_describe_answers_dates_from_the_cached_block(engine):
+    blocks = engine.blocks(["Oslo", "Atlantis"])
+    block = blocks["Oslo"]
+    days = sorted({s["date"] for s in block["slots"]})
+
+    assert "light rain" in ForecastEngine.describe("Oslo", block, date.fromisoformat(days[1]))
+    assert "Bring an umbrella." in ForecastEngine.describe("Oslo", block, date.fromisoformat(days[1]))
+    assert ForecastEngine.describe("Oslo", block).startswith("Current weather in Oslo: clear sky")
+    assert ForecastEngine.describe("Oslo", block, date(2030, 1, 1)).startswith(
+        f"No forecast for Oslo on 2030-01-01: forecasts only cover {days[0]} to {days[-1]}.")
+    assert ForecastEngine.describe("Atlantis", blocks["Atlantis"]) == (
+        "No weather forecast found for Atlantis; please check the city name.")
+    assert ForecastEngine.describe("Oslo", RuntimeError("timed out")) == "Could not fetch weather for Oslo: timed out"
+
+
+@pytest.mark.parametrize("outbound, expected", [
+    ((TODAY + timedelta(days=3)).isoformat(), (TODAY + timedelta(days=3)).isoformat()),
+    ((TODAY + timedelta(days=30)).isoformat(), ""),  # beyond the forecast: current conditions
+    ((TODAY - timedelta(days=1)).isoformat(), ""),
+    ("", ""),
+])
+def test_outbound_date_is_only_used_inside_the_forecast_window(outbound, expected):
+    trip = {"outbound_date": outbound}
+    assert WeatherAgent._resolve_date("what's the weather in rome", trip, today=TODAY) == expected
+    assert WeatherAgent._resolve_date("weather in rome tomorrow", trip, today=TODAY) == "2026-05-05"
@@ -0,0 +1,195 @@
+# tools/airport_index.py
+
+import csv
+import difflib
+import math
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+AIRPORTS_CSV = os.path.join(os.path.dirname(__file__), "data", "airports.csv")
+
+# Words that carry no signal when matching a place ("Heathrow Airport" == "Heathrow").
+_NOISE_WORDS = {"airport", "international", "intl", "airfield", "the"}
+_IATA_RE = re.compile(r"^[A-Z]{3}$")
+# Codes memoized from the LLM fallback; the least recently used are dropped past this.
+LEARNED_MAX_ENTRIES = int(os.environ.get("AIRPORT_LEARNED_MAX_ENTRIES", "256"))
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase, strip accents/punctuation and noise words; keep only the part before a comma."""
+    text = (text or "").split(",")[0]
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    text = text.replace("'", "").replace(".", "")
+    tokens = re.sub(r"[^a-z0-9]+", " ", text).split()
+    tokens = ["saint" if t == "st" else t for t in tokens if t not in _NOISE_WORDS]
+    return " ".join(tokens)
+
+
+@dataclass(frozen=True)
+class AirportMatch:
+    code: str                    # Airport code, or metro-area code for multi-airport cities
+    name: str
+    city: str
+    country: str
+    airports: Tuple[str, ...]    # Airport codes covered by `code`
+    match_type: str = "exact"    # iata | exact | prefix | fuzzy | learned
+
+    @property
+    def search_id(self) -> str:
+        """Value for SerpAPI's departure_id/arrival_id (comma-joined for metro areas)."""
+        return ",".join(self.airports)
+
+
+class AirportIndex:
+    """
+    In-memory airport lookup built from the bundled CSV.
+
+    Resolves an IATA code, a city name, an airport name or an alias with
+    exact, normalized, prefix and fuzzy matching. Cities served by several
+    airports resolve to their metro-area code (e.g. London -> LON).
+    """
+
+    def __init__(self, csv_path: str = AIRPORTS_CSV, fuzzy_cutoff: float = 0.8,
+                 learned_max_entries: int = LEARNED_MAX_ENTRIES):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.learned_max_entries = learned_max_entries
+        self._by_code: Dict[str, AirportMatch] = {}
+        self._by_key: Dict[str, AirportMatch] = {}
+        self._sorted_keys: List[str] = []
+        self._keys_by_length: Dict[int, List[str]] = {}
+        self._learned: "OrderedDict[str, AirportMatch]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load(csv_path)
+
+    def _load(self, csv_path: str):
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+        metros: Dict[str, List[dict]] = {}
+        for row in rows:
+            if row["metro"]:
+                metros.setdefault(row["metro"], []).append(row)
+
+        city_keys: Dict[str, AirportMatch] = {}
+        airport_keys: Dict[str, AirportMatch] = {}
+        for row in rows:
+            airport = AirportMatch(row["iata"], row["name"], row["city"], row["country"], (row["iata"],))
+            self._by_code[row["iata"]] = airport
+
+            # A city resolves to its metro area only if all of its airports share it.
+            city_target = airport
+            members = metros.get(row["metro"], [])
+            if len(members) > 1 and row["city"] == members[0]["city"]:
+                city_target = AirportMatch(row["metro"], f"{row['city']} (all airports)", row["city"],
+                                           row["country"], tuple(m["iata"] for m in members))
+            for key in [row["city"]] + row["city_aliases"].split("|"):
+                key = normalize_place(key)
+                if key:
+                    city_keys.setdefault(key, city_target)
+            for key in [row["name"]] + row["airport_aliases"].split("|"):
+                key = normalize_place(key)
+                if key:
+                    airport_keys.setdefault(key, airport)
+
+        for metro, members in metros.items():
+            if len(members) > 1 and metro not in self._by_code:
+                self._by_code[metro] = city_keys[normalize_place(members[0]["city"])]
+
+        # City names win over airport names that normalize to the same key.
+        self._by_key = {**airport_keys, **city_keys}
+        self._sorted_keys = sorted(self._by_key)
+        for key in self._sorted_keys:
+            self._keys_by_length.setdefault(len(key), []).append(key)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def lookup(self, query: str) -> Optional[AirportMatch]:
+        """Return the best match for `query`, or None if nothing is close enough."""
+        raw = (query or "").strip()
+        if _IATA_RE.match(raw) and raw in self._by_code:
+            return self._with_type(self._by_code[raw], "iata")
+
+        key = normalize_place(raw)
+        if not key:
+            return None
+        hit = self._by_key.get(key) or self._recall(key)
+        if hit:
+            return hit
+        if raw.upper() in self._by_code and len(raw) == 3:
+            return self._with_type(self._by_code[raw.upper()], "iata")
+
+        # Prefix: "san fran" -> "san francisco". It must name one place: "lond" may
+        # complete to London's airports as well as London itself, which covers them,
+        # but "san j" (San Jose or San Juan) is left to the caller's LLM fallback.
+        if len(key) >= 3:
+            i = bisect_left(self._sorted_keys, key)
+            matches = []
+            while i < len(self._sorted_keys) and self._sorted_keys[i].startswith(key):
+                matches.append(self._by_key[self._sorted_keys[i]])
+                i += 1
+            if matches:
+                widest = max(matches, key=lambda m: len(m.airports))
+                if any(not set(m.airports) <= set(widest.airports) for m in matches):
+                    return None
+                return self._with_type(widest, "prefix")
+
+        close = difflib.get_close_matches(key, self._fuzzy_candidates(key), n=1, cutoff=self.fuzzy_cutoff)
+        if close:
+            return self._with_type(self._by_key[close[0]], "fuzzy")
+        return None
+
+    def _fuzzy_candidates(self, key: str) -> List[str]:
+        """
+        Keys long enough and short enough to reach the cutoff. difflib's ratio
+        is at most 2 * min(len) / (len(a) + len(b)), so other lengths are skipped
+        without being compared.
+        """
+        c = self.fuzzy_cutoff
+        if c <= 0:
+            return self._sorted_keys
+        shortest = math.ceil(len(key) * c / (2 - c) - 1e-9)
+        longest = math.floor(len(key) * (2 - c) / c + 1e-9)
+        return [k for n in range(shortest, longest + 1) for k in self._keys_by_length.get(n, ())]
+
+    def learn(self, query: str, code: str) -> Optional[AirportMatch]:
+        """
+        Memoize an externally resolved code (e.g. from the LLM fallback) under
+        `query`. Learned entries only answer exact lookups, never prefix or
+        fuzzy ones, and at most `learned_max_entries` are kept (LRU).
+        """
+        key = normalize_place(query)
+        code = (code or "").strip().upper()
+        if not key or not _IATA_RE.match(code):
+            return None
+        known = self._by_code.get(code)
+        match = self._with_type(known, "learned") if known else AirportMatch(
+            code, query.strip(), query.strip(), "", (code,), "learned")
+        with self._lock:
+            self._learned[key] = match
+            self._learned.move_to_end(key)
+            while len(self._learned) > self.learned_max_entries:
+                self._learned.popitem(last=False)
+        return match
+
+    def _recall(self, key: str) -> Optional[AirportMatch]:
+        with self._lock:
+            match = self._learned.get(key)
+            if match:
+                self._learned.move_to_end(key)
+            return match
+
+    @staticmethod
+    def _with_type(match: AirportMatch, match_type: str) -> AirportMatch:
+        if match.match_type == match_type:
+            return match
+        return AirportMatch(match.code, match.name, match.city, match.country, match.airports, match_type)
+
+
+AIRPORT_INDEX = AirportIndex()
@@ -1,44 +1,378 @@
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import httpx
 import requests
 from langchain.tools import tool
-from unstructured.partition.html import partition_html
+from langchain_openai import ChatOpenAI
+from agents.resilience import UpstreamUnavailable, upstream
+from tools.cache import MemoryCacheBackend
+from tools.http_client import RETRYABLE_STATUS, http_client
+from observability import log_event, span
+
+CONTENT_URL = os.environ.get("BROWSER_CONTENT_URL", "http://localhost:3000/content")
+CONTENT_HEADERS = {"cache-control": "no-cache", "content-type": "application/json"}
+
+# Summarizer settings, all overridable from the environment:
+#   BROWSER_CHUNK_SIZE           characters of page text per map-step summary
+#   BROWSER_SUMMARY_PARALLELISM  chunk summaries in flight at once
+#   BROWSER_CACHE_TTL            seconds a page summary is served without revalidating
+#   BROWSER_CACHE_MAX_ENTRIES    LRU bound for page and chunk summaries
+CHUNK_SIZE = int(os.environ.get("BROWSER_CHUNK_SIZE", "8000"))
+SUMMARY_PARALLELISM = int(os.environ.get("BROWSER_SUMMARY_PARALLELISM", "4"))
+CACHE_TTL = float(os.environ.get("BROWSER_CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.environ.get("BROWSER_CACHE_MAX_ENTRIES", "256"))
+
+MAP_PROMPT = "Summarize the following content succinctly, focusing on the key points only:\n\n"
+REDUCE_PROMPT = ("These are summaries of consecutive parts of one web page. Combine them into a "
+                 "single succinct summary of the key points:\n\n")
+
+
+class _TextBlocks(HTMLParser):
+    """Incremental HTML-to-text: feed() pieces of a page, then take the finished text blocks."""
+
+    BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "table", "tr", "td", "th", "br", "section", "article",
+                  "header", "footer", "main", "aside", "blockquote", "pre", "title",
+                  "h1", "h2", "h3", "h4", "h5", "h6"}
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skipping = 0
+        self.blocks: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self._parts.append(data)
+
+    def _flush(self):
+        text = " ".join("".join(self._parts).split())
+        if text:
+            self.blocks.append(text)
+        self._parts = []
+
+    def take(self) -> List[str]:
+        blocks, self.blocks = self.blocks, []
+        return blocks
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _chunks(blocks: Iterable[str], size: int) -> Iterator[str]:
+    """Pack text blocks into chunks of at most `size` characters, splitting oversized blocks."""
+    current: List[str] = []
+    length = 0
+    for block in blocks:
+        for start in range(0, len(block), size):
+            piece = block[start:start + size]
+            if current and length + len(piece) + 2 > size:
+                yield "\n\n".join(current)
+                current, length = [], 0
+            current.append(piece)
+            length += len(piece) + 2
+    if current:
+        yield "\n\n".join(current)
+
+
+def iter_page_chunks(pieces: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Text chunks of a page streamed as `pieces` of HTML; only the current chunk is held."""
+    def blocks():
+        parser = _TextBlocks()
+        for piece in pieces:
+            parser.feed(piece)
+            yield from parser.take()
+        parser.close()
+        yield from parser.take()
+    return _chunks(blocks(), size)
+
+
+async def aiter_page_chunks(pieces: AsyncIterator[str], size: int = CHUNK_SIZE) -> AsyncIterator[str]:
+    parser = _TextBlocks()
+    current: List[str] = []
+    async for piece in pieces:
+        parser.feed(piece)
+        current.extend(parser.take())
+        # Hold back the last block: the next piece may still add to its chunk.
+        if sum(len(b) + 2 for b in current) > size:
+            *ready, last = list(_chunks(current, size))
+            for chunk in ready:
+                yield chunk
+            current = [last]
+    parser.close()
+    current.extend(parser.take())
+    for chunk in _chunks(current, size):
+        yield chunk
+
+
+def _browser_failed(response) -> bool:
+    return response.status_code in RETRYABLE_STATUS
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _batches(summaries: List[str], size: int) -> List[List[str]]:
+    """Group summaries so each reduce prompt stays within `size` characters."""
+    batches, current, length = [], [], 0
+    for summary in summaries:
+        if current and length + len(summary) > size:
+            batches.append(current)
+            current, length = [], 0
+        current.append(summary)
+        length += len(summary) + 2
+    return batches + ([current] if current else [])
+
+
+class PageSummarizer:
+    """
+    Map-reduce page summaries with two caches:
+
+      - chunk summaries by content hash, so unchanged parts of a page (or the
+        same text on another URL) are never summarized twice;
+      - page summaries by URL, served for `ttl` seconds, then revalidated:
+        the ETag / Last-Modified of the last fetch are sent along, a 304 keeps
+        the summary, and a page whose chunks all hash the same skips the
+        reduce step.
+
+    The page is streamed: HTML is parsed and chunked as it arrives, and each
+    chunk is summarized as soon as it is complete, at most `parallelism` at
+    a time, so the full text is never held in memory.
+    """
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None, chunk_size: int = CHUNK_SIZE,
+                 parallelism: int = SUMMARY_PARALLELISM, ttl: float = CACHE_TTL,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        self._llm = llm
+        self.chunk_size = chunk_size
+        self.parallelism = max(1, parallelism)
+        self.ttl = ttl
+        self.pages = MemoryCacheBackend(max_entries)
+        self.chunk_summaries = MemoryCacheBackend(max_entries * 8)
+        self.counts = {"fresh_hits": 0, "not_modified": 0, "unchanged": 0, "summarized": 0,
+                       "chunks": 0, "chunk_hits": 0}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="browser-summary")
+
+    @property
+    def llm(self) -> ChatOpenAI:
+        # Built on first use, so importing the tools doesn't need an OpenAI key.
+        if self._llm is None:
+            self._llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3, max_tokens=300)
+        return self._llm
+
+    @llm.setter
+    def llm(self, llm: ChatOpenAI):
+        self._llm = llm
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] += amount
+
+    # --- cache ------------------------------------------------------------
+
+    def cached(self, url: str):
+        """(fresh summary or None, conditional request headers for revalidation)."""
+        entry = self.pages.get(url)
+        if entry is None:
+            return None, {}
+        page, stored_at = entry
+        if time.time() - stored_at <= self.ttl:
+            self._count("fresh_hits")
+            return page["summary"], {}
+        headers = {}
+        if page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
+        return None, headers
+
+    def not_modified(self, url: str) -> Optional[str]:
+        entry = self.pages.get(url)
+        if entry is None:
+            return None
+        self._count("not_modified")
+        self.pages.set(url, entry[0], time.time())
+        return entry[0]["summary"]
+
+    def unchanged(self, url: str, chunk_hashes: List[str]) -> Optional[str]:
+        """The cached summary if the page's chunks all hash the same as last time."""
+        entry = self.pages.get(url)
+        if entry is not None and entry[0]["content_hash"] == _digest("".join(chunk_hashes)):
+            self._count("unchanged")
+            return entry[0]["summary"]
+        self._count("summarized")
+        return None
+
+    def store(self, url: str, response_headers, chunk_hashes: List[str], summary: str) -> str:
+        self.pages.set(url, {
+            "summary": summary,
+            "content_hash": _digest("".join(chunk_hashes)),
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+        }, time.time())
+        return summary
+
+    # --- sync map-reduce --------------------------------------------------
+
+    # Summaries share the agents' openai rate limit, circuit breaker and llm spans.
+    def _summarize(self, text: str, prompt: str = MAP_PROMPT) -> str:
+        with span("llm", type(self).__name__):
+            return upstream("openai").call(lambda: self.llm.invoke(prompt + text)).content
+
+    def _map_chunk(self, chunk: str, digest: str) -> str:
+        cached = self.chunk_summaries.get(digest)
+        if cached is not None:
+            self._count("chunk_hits")
+            return cached[0]
+        summary = self._summarize(chunk)
+        self.chunk_summaries.set(digest, summary, time.time())
+        return summary
+
+    def _reduce(self, summaries: List[str]) -> str:
+        while len(summaries) > 1:
+            batches = _batches(summaries, self.chunk_size)
+            summaries = list(self._pool.map(lambda b: self._summarize("\n\n".join(b), REDUCE_PROMPT), batches))
+        return summaries[0] if summaries else "No content found."
+
+    def summarize_stream(self, url: str, pieces: Iterable[str], response_headers) -> str:
+        hashes, summaries = [], []
+        pending = deque()
+        for chunk in iter_page_chunks(pieces, self.chunk_size):
+            digest = _digest(chunk)
+            hashes.append(digest)
+            self._count("chunks")
+            if len(pending) >= self.parallelism:
+                summaries.append(pending.popleft().result())
+            pending.append(self._pool.submit(self._map_chunk, chunk, digest))
+        summaries.extend(future.result() for future in pending)
+        summary = self.unchanged(url, hashes)
+        if summary is None:
+            summary = self._reduce(summaries)
+        return self.store(url, response_headers, hashes, summary)
+
+    # --- async map-reduce -------------------------------------------------
+
+    async def _asummarize(self, text: str, prompt: str = MAP_PROMPT) -> str:
+        with span("llm", type(self).__name__):
+            return (await upstream("openai").acall(lambda: self.llm.ainvoke(prompt + text))).content
+
+    async def _amap_chunk(self, chunk: str, digest: str) -> str:
+        cached = self.chunk_summaries.get(digest)
+        if cached is not None:
+            self._count("chunk_hits")
+            return cached[0]
+        summary = await self._asummarize(chunk)
+        self.chunk_summaries.set(digest, summary, time.time())
+        return summary
+
+    async def _areduce(self, summaries: List[str]) -> str:
+        while len(summaries) > 1:
+            batches = _batches(summaries, self.chunk_size)
+            summaries = list(await asyncio.gather(
+                *(self._asummarize("\n\n".join(b), REDUCE_PROMPT) for b in batches)))
+        return summaries[0] if summaries else "No content found."
+
+    async def asummarize_stream(self, url: str, pieces: AsyncIterator[str], response_headers) -> str:
+        hashes, summaries = [], []
+        pending = deque()
+        try:
+            async for chunk in aiter_page_chunks(pieces, self.chunk_size):
+                digest = _digest(chunk)
+                hashes.append(digest)
+                self._count("chunks")
+                if len(pending) >= self.parallelism:
+                    summaries.append(await pending.popleft())
+                pending.append(asyncio.ensure_future(self._amap_chunk(chunk, digest)))
+            while pending:
+                summaries.append(await pending.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+        summary = self.unchanged(url, hashes)
+        if summary is None:
+            summary = await self._areduce(summaries)
+        return self.store(url, response_headers, hashes, summary)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counts, "pages": len(self.pages), "chunk_entries": len(self.chunk_summaries)}
+
+
+BROWSER_SUMMARIZER = PageSummarizer()
+
 
 class BrowserTool:
     @tool("Scrape website content")
     def scrape_and_summarize_website(website: str) -> str:
         """
-        Scrape the website content from the given URL and summarize it using a mock LLM.
+        Scrape the website content from the given URL and summarize it.
         """
-        url = "http://localhost:3000/content"
-        payload = json.dumps({"url": website})
-        headers = {"cache-control": "no-cache", "content-type": "application/json"}
+        summary, conditional = BROWSER_SUMMARIZER.cached(website)
+        if summary is not None:
+            return summary
 
+        # Only the POST is guarded: a cached summary is served even while the browser upstream is down.
+        payload = json.dumps({"url": website})
         try:
-            response = requests.post(url, headers=headers, data=payload)
-            response.raise_for_status()
-            content = response.text
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching content: {e}")
+            response = upstream("browser").call(
+                lambda: http_client.post(CONTENT_URL, headers={**CONTENT_HEADERS, **conditional},
+                                         data=payload, stream=True),
+                failed=_browser_failed)
+            with response:
+                if response.status_code == 304:
+                    return BROWSER_SUMMARIZER.not_modified(website) or "Failed to fetch content"
+                response.raise_for_status()
+                response.encoding = response.encoding or "utf-8"
+                pieces = response.iter_content(chunk_size=16384, decode_unicode=True)
+                return BROWSER_SUMMARIZER.summarize_stream(website, pieces, response.headers)
+        except (requests.exceptions.RequestException, UpstreamUnavailable) as e:
+            log_event("browser.fetch_error", sample_rate=1.0, level=logging.WARNING, url=website, error=str(e))
             return "Failed to fetch content"
 
-        # Partition the HTML content into elements.
-        elements = partition_html(text=content)
-        text_content = "\n\n".join(str(el) for el in elements)
-
-        # Break the text into manageable chunks.
-        chunk_size = 8000
-        text_chunks = [text_content[i:i+chunk_size] for i in range(0, len(text_content), chunk_size)]
-
-        # Use our mock LLM for summarization.
-        summarizer = MockLLM(model_name="mock-model", temperature=0.3)
+    @staticmethod
+    async def ascrape_and_summarize_website(website: str) -> str:
+        """Async variant: stream the page with the shared pooled client and summarize it as it arrives."""
+        summary, conditional = BROWSER_SUMMARIZER.cached(website)
+        if summary is not None:
+            return summary
 
-        summaries = []
-        for chunk in text_chunks:
-            prompt = (
-                "Summarize the following content succinctly, focusing on the key points only:\n\n"
-                f"{chunk}"
-            )
-            response = summarizer.invoke(prompt)
-            summaries.append(response.content)
-
-        return "\n\n".join(summaries)
+        try:
+            async with AsyncExitStack() as stack:
+                response = await upstream("browser").acall(
+                    lambda: stack.enter_async_context(http_client.astream(
+                        "POST", CONTENT_URL, headers={**CONTENT_HEADERS, **conditional},
+                        content=json.dumps({"url": website}))),
+                    failed=_browser_failed)
+                if response.status_code == 304:
+                    return BROWSER_SUMMARIZER.not_modified(website) or "Failed to fetch content"
+                response.raise_for_status()
+                return await BROWSER_SUMMARIZER.asummarize_stream(website, response.aiter_text(), response.headers)
+        except (httpx.HTTPError, UpstreamUnavailable) as e:
+            log_event("browser.fetch_error", sample_rate=1.0, level=logging.WARNING, url=website, error=str(e))
+            return "Failed to fetch content"
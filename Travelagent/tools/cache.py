@@ -0,0 +1,252 @@
+# tools/cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from observability import span
+
+
+def cache_key(params: Dict[str, Any], exclude: Iterable[str] = ("api_key",)) -> str:
+    """
+    Stable key for a set of query params. Excluded keys and None values are
+    dropped, strings are trimmed and case-folded, and key order is ignored.
+    """
+    skip = set(exclude)
+    normalized = {}
+    for k, v in params.items():
+        if k in skip or v is None:
+            continue
+        normalized[k] = v.strip().casefold() if isinstance(v, str) else v
+    blob = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Storage for cache entries: key -> (value, stored_at)."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, stored_at: float):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU backend bounded to `max_entries`."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._data[key] = (value, stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    SQLite-backed LRU, so cached results survive restarts and can be shared
+    by several worker processes. Values must be JSON-serializable.
+    """
+
+    def __init__(self, path: str = "tool_cache.sqlite3", max_entries: int = 5000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache(last_access)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), stored_at, time.time()),
+            )
+            overflow = self._rows() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN"
+                    " (SELECT key FROM cache ORDER BY last_access LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def _rows(self) -> int:
+        # Caller holds the lock: the connection is shared by every thread.
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._rows()
+
+
+class ResultCache:
+    """
+    TTL cache in front of an expensive fetch, with stale-while-revalidate:
+
+      age <= ttl               -> fresh hit
+      age <= ttl + stale_ttl   -> stale hit, refreshed in the background
+      otherwise                -> miss, fetched inline
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 900, stale_ttl: float = 3600,
+                 name: str = "cache", exclude: Iterable[str] = ("api_key",)):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.exclude = tuple(exclude)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"{name}-refresh")
+
+    def get_or_fetch(self, params: Dict[str, Any], fetch: Callable[[], Any],
+                     ttl: Optional[float] = None,
+                     should_cache: Callable[[Any], bool] = lambda value: True) -> Any:
+        """Return the cached value for `params`, calling `fetch()` on a miss."""
+        ttl = self.ttl if ttl is None else ttl
+        key = cache_key(params, self.exclude)
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age <= ttl:
+                self._count("hits")
+                return value
+            if age <= ttl + self.stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(key, fetch, should_cache)
+                return value
+
+        self._count("misses")
+        value = fetch()
+        if should_cache(value):
+            self.backend.set(key, value, time.time())
+        return value
+
+    def get(self, params: Dict[str, Any], ttl: Optional[float] = None) -> Optional[Any]:
+        """Fresh cached value for `params`, or None. For callers that batch their own fetches."""
+        ttl = self.ttl if ttl is None else ttl
+        entry = self.backend.get(cache_key(params, self.exclude))
+        if entry is not None and time.time() - entry[1] <= ttl:
+            self._count("hits")
+            return entry[0]
+        self._count("misses")
+        return None
+
+    def put(self, params: Dict[str, Any], value: Any):
+        self.backend.set(cache_key(params, self.exclude), value, time.time())
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _refresh_in_background(self, key, fetch, should_cache):
+        """
+        Re-run `fetch` off the request path. Callers put their upstream guard
+        inside `fetch`, so refreshes share its rate limit and circuit breaker.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _refresh():
+            try:
+                with span("refresh", self.name):
+                    value = fetch()
+                if should_cache(value):
+                    self.backend.set(key, value, time.time())
+                self._count("refreshes")
+            except Exception:
+                self._count("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(_refresh)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "evictions": getattr(self.backend, "evictions", 0),
+        }
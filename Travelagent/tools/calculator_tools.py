@@ -18,3 +18,8 @@ class CalculatorTools:
             return eval(operation)
         except Exception as e:
             return f"Error in calculation: {e}"
+
+    @staticmethod
+    async def acalculate(operation: str):
+        """Async variant of calculate; pure CPU and fast, so it runs inline."""
+        return CalculatorTools.calculate.func(operation)
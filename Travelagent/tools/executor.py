@@ -0,0 +1,22 @@
+# tools/executor.py
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Bounded pool for legacy blocking calls (SerpAPI's GoogleSearch, sync LangChain tools)
+# made from async code, so they never run on the event loop itself.
+BLOCKING_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("BLOCKING_POOL_SIZE", "32")),
+    thread_name_prefix="blocking",
+)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking callable on the bounded executor and await its result."""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the request's trace id) over to the worker thread.
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(BLOCKING_EXECUTOR, functools.partial(ctx.run, fn, *args, **kwargs))
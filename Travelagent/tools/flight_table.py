@@ -0,0 +1,157 @@
+# tools/flight_table.py
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Lower is better for every column. Missing values score as the worst option.
+DEFAULT_WEIGHTS = {"price": 0.5, "duration": 0.3, "stops": 0.15, "carbon": 0.05}
+NUMERIC_COLUMNS = ("price", "duration", "stops", "carbon")
+
+
+def _time(segment: dict, end: str) -> np.datetime64:
+    # SerpAPI times look like "2025-03-15 08:15". Anything numpy can't parse
+    # (e.g. "2025-03-15 8:15") becomes NaT rather than failing the whole table.
+    value = (segment.get(end) or {}).get("time")
+    if not isinstance(value, str):
+        return np.datetime64("NaT", "m")
+    day, _, clock = value.strip().partition(" ")
+    hours, _, minutes = clock.partition(":")
+    try:
+        return np.datetime64(f"{day}T{int(hours):02d}:{int(minutes):02d}", "m") if clock else np.datetime64(day, "m")
+    except ValueError:
+        return np.datetime64("NaT", "m")
+
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+class FlightTable:
+    """
+    Every flight option of a SerpAPI google_flights response as NumPy
+    columns: price, total duration (minutes, layovers included), stops,
+    departure / arrival time and carbon (grams). Filtering, scoring and the
+    price/duration Pareto frontier are array operations over all rows;
+    `options` keeps the raw itineraries in row order.
+    """
+
+    def __init__(self, options: List[dict], price, duration, stops, departure, arrival, carbon):
+        self.options = options
+        self.price = price
+        self.duration = duration
+        self.stops = stops
+        self.departure = departure
+        self.arrival = arrival
+        self.carbon = carbon
+
+    @classmethod
+    def from_options(cls, options: Sequence[dict]) -> "FlightTable":
+        """Build the table from SerpAPI options, keeping their order (flights_finder lists best_flights first)."""
+        options = [o for o in options if o.get("flights")]
+        price, duration, stops, departure, arrival, carbon = [], [], [], [], [], []
+        for option in options:
+            segments = option["flights"]
+            price.append(_number(option.get("price")))
+            duration.append(_number(option.get("total_duration")
+                                    or sum(s.get("duration", 0) for s in segments) or None))
+            stops.append(len(segments) - 1)
+            departure.append(_time(segments[0], "departure_airport"))
+            arrival.append(_time(segments[-1], "arrival_airport"))
+            carbon.append(_number((option.get("carbon_emissions") or {}).get("this_flight")))
+        return cls(
+            options,
+            price=np.array(price, dtype=float),
+            duration=np.array(duration, dtype=float),
+            stops=np.array(stops, dtype=float),
+            departure=np.array(departure, dtype="datetime64[m]"),
+            arrival=np.array(arrival, dtype="datetime64[m]"),
+            carbon=np.array(carbon, dtype=float),
+        )
+
+    def __len__(self):
+        return len(self.options)
+
+    def take(self, rows) -> "FlightTable":
+        """Subset (or reorder) by an index or boolean array."""
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=int)
+        return FlightTable(
+            [self.options[i] for i in rows],
+            self.price[rows], self.duration[rows], self.stops[rows],
+            self.departure[rows], self.arrival[rows], self.carbon[rows],
+        )
+
+    @staticmethod
+    def _minute_of_day(times) -> np.ndarray:
+        # NaT becomes NaN, which fails every comparison in mask().
+        minutes = (times - times.astype("datetime64[D]")).astype(float)
+        minutes[np.isnat(times)] = np.nan
+        return minutes
+
+    def mask(self, max_price: Optional[float] = None, max_duration: Optional[float] = None,
+             max_stops: Optional[int] = None, max_carbon: Optional[float] = None,
+             depart_after: Optional[str] = None, depart_before: Optional[str] = None,
+             arrive_before: Optional[str] = None) -> np.ndarray:
+        """
+        Rows meeting every given criterion. Times are "HH:MM" in the
+        airport's local time; rows missing a filtered value are excluded.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        for column, limit in ((self.price, max_price), (self.duration, max_duration),
+                              (self.stops, max_stops), (self.carbon, max_carbon)):
+            if limit is not None:
+                keep &= column <= limit  # NaN compares False
+        for times, bound, after in ((self.departure, depart_after, True),
+                                    (self.departure, depart_before, False),
+                                    (self.arrival, arrive_before, False)):
+            if bound:
+                hours, minutes = bound.split(":")
+                minute = self._minute_of_day(times)
+                limit = int(hours) * 60 + int(minutes)
+                keep &= ~np.isnat(times) & ((minute >= limit) if after else (minute <= limit))
+        return keep
+
+    def filter(self, **criteria) -> "FlightTable":
+        return self.take(self.mask(**criteria))
+
+    def score(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Weighted sum of min-max normalized columns; lower is better."""
+        weights = weights or DEFAULT_WEIGHTS
+        total = np.zeros(len(self))
+        for name, weight in weights.items():
+            if name not in NUMERIC_COLUMNS:
+                raise ValueError(f"Unknown flight column: {name}")
+            column = getattr(self, name)
+            low, high = (np.nanmin(column), np.nanmax(column)) if np.isfinite(column).any() else (0.0, 0.0)
+            spread = high - low
+            normalized = (column - low) / spread if spread > 0 else np.zeros(len(self))
+            total += weight * np.nan_to_num(normalized, nan=1.0)
+        return total
+
+    def order(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Row indices from best to worst score. Ties keep the row order."""
+        return np.argsort(self.score(weights), kind="stable")
+
+    def rank(self, weights: Optional[Dict[str, float]] = None) -> "FlightTable":
+        return self.take(self.order(weights))
+
+    def pareto(self) -> np.ndarray:
+        """
+        Boolean mask of options no other option beats on both price and
+        duration. Sorted by price, an option is on the frontier when it is
+        faster than everything cheaper, so one cumulative minimum finds them.
+        Options that tie exactly on both don't beat each other, so they are
+        on or off the frontier together.
+        """
+        on_frontier = np.zeros(len(self), dtype=bool)
+        valid = np.flatnonzero(np.isfinite(self.price) & np.isfinite(self.duration))
+        if not len(valid):
+            return on_frontier
+        order = valid[np.lexsort((self.duration[valid], self.price[valid]))]
+        prices, durations = self.price[order], self.duration[order]
+        fastest_before = np.concatenate(([np.inf], np.minimum.accumulate(durations)[:-1]))
+        # Rows equal to the previous (price, duration) form one group; the first row of each decides it.
+        group = np.cumsum(np.concatenate(([True], (prices[1:] != prices[:-1]) | (durations[1:] != durations[:-1]))))
+        leads = np.concatenate(([0], np.flatnonzero(np.diff(group)) + 1))
+        on_frontier[order] = (durations < fastest_before)[leads][group - 1]
+        return on_frontier
@@ -1,8 +1,13 @@
+import logging
 import os
+import time
 from typing import Optional
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from serpapi import GoogleSearch  # Use GoogleSearch from the serpapi package
+from tools.executor import run_blocking
+from tools.cache import cache_key
+from tools.serpapi_client import raise_for_error, serpapi_search
+from observability import log_event
 
 class FlightsInput(BaseModel):
     departure_airport: Optional[str] = Field(description="Departure airport code (IATA)")
@@ -19,7 +24,11 @@ class FlightsInputSchema(BaseModel):
 
 @tool(args_schema=FlightsInputSchema)
 def flights_finder(params: FlightsInput):
-    """Find flights using the Google Flights engine via SerpAPI."""
+    """
+    Find flights using the Google Flights engine via SerpAPI. Returns every
+    option, "best_flights" first and then "other_flights", for ranking with
+    tools.flight_table.FlightTable.
+    """
     
     query_params = {
         "api_key": os.environ.get("SERPAPI_API_KEY"),
@@ -37,13 +46,20 @@ def flights_finder(params: FlightsInput):
         "infants_on_lap": params.infants_on_lap,
     }
 
-    print("\n🔥 DEBUG: Calling SerpAPI with params:", query_params)
-    
+    start = time.perf_counter()
     try:
-        search = GoogleSearch(query_params)  # Create a GoogleSearch instance
-        results = search.get_dict().get("best_flights", [])
-        print("\n✅ DEBUG: SerpAPI Response:", results)
-        return results
+        data = serpapi_search(query_params)
+        raise_for_error(data)
+        results = (data.get("best_flights") or []) + (data.get("other_flights") or [])
     except Exception as e:
-        print("\n❌ DEBUG: SerpAPI Error:", str(e))
+        log_event("serpapi.error", sample_rate=1.0, level=logging.WARNING, engine="google_flights",
+                  query=cache_key(query_params), error=str(e))
         return {"error": str(e)}
+    log_event("serpapi.search", engine="google_flights", query=cache_key(query_params),
+              results=len(results), seconds=round(time.perf_counter() - start, 4))
+    return results
+
+
+async def aflights_finder(params: FlightsInput):
+    """Async variant of flights_finder; SerpAPI's client is blocking, so it runs on the bounded executor."""
+    return await run_blocking(flights_finder.func, params)
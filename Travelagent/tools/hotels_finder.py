@@ -1,8 +1,13 @@
+import logging
 import os
+import time
 from typing import Optional
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from serpapi import GoogleSearch  # Use GoogleSearch from the serpapi package
+from tools.executor import run_blocking
+from tools.cache import cache_key
+from tools.serpapi_client import raise_for_error, serpapi_search
+from observability import log_event
 
 class HotelsInput(BaseModel):
     q: str = Field(description='City or location for the hotel search')
@@ -35,13 +40,20 @@ def hotels_finder(params: HotelsInput):
         "hotel_class": params.hotel_class
     }
 
-    print("\n🔥 DEBUG: Calling SerpAPI with params:", query_params)
-    
+    start = time.perf_counter()
     try:
-        search = GoogleSearch(query_params)  # Create a GoogleSearch instance
-        results = search.get_dict().get("properties", [])[:5]
-        print("\n✅ DEBUG: SerpAPI Response:", results)
-        return results
+        data = serpapi_search(query_params)
+        raise_for_error(data)
+        results = data.get("properties", [])[:5]
     except Exception as e:
-        print("\n❌ DEBUG: SerpAPI Error:", str(e))
+        log_event("serpapi.error", sample_rate=1.0, level=logging.WARNING, engine="google_hotels",
+                  query=cache_key(query_params), error=str(e))
         return {"error": str(e)}
+    log_event("serpapi.search", engine="google_hotels", query=cache_key(query_params),
+              results=len(results), seconds=round(time.perf_counter() - start, 4))
+    return results
+
+
+async def ahotels_finder(params: HotelsInput):
+    """Async variant of hotels_finder; SerpAPI's client is blocking, so it runs on the bounded executor."""
+    return await run_blocking(hotels_finder.func, params)
@@ -0,0 +1,252 @@
+# tools/http_client.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Tunables, overridable from the environment.
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "15"))
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "20"))     # Connections kept per host
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+BACKOFF_BASE = float(os.environ.get("HTTP_BACKOFF_BASE", "0.25"))
+BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", "4"))
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# POST is retried too: the tools only POST idempotent search/scrape queries.
+RETRYABLE_METHODS = {"GET", "HEAD", "OPTIONS", "POST"}
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+class HttpMetrics:
+    """Per-host request, retry, error and in-flight counters shared by both clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hosts: Dict[str, Dict[str, float]] = {}
+
+    def _host(self, host: str) -> Dict[str, float]:
+        if host not in self.hosts:
+            self.hosts[host] = {"requests": 0, "retries": 0, "errors": 0,
+                                "in_flight": 0, "peak_in_flight": 0, "total_seconds": 0.0}
+        return self.hosts[host]
+
+    def start(self, host: str):
+        with self._lock:
+            h = self._host(host)
+            h["requests"] += 1
+            h["in_flight"] += 1
+            h["peak_in_flight"] = max(h["peak_in_flight"], h["in_flight"])
+
+    def finish(self, host: str, seconds: float, error: bool):
+        with self._lock:
+            h = self._host(host)
+            h["in_flight"] -= 1
+            h["total_seconds"] += seconds
+            if error:
+                h["errors"] += 1
+
+    def retry(self, host: str):
+        with self._lock:
+            self._host(host)["retries"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {host: dict(values) for host, values in self.hosts.items()}
+
+
+HTTP_METRICS = HttpMetrics()
+
+
+class HttpClient:
+    """
+    Pooled HTTP client for the tools, with a sync (requests) and an async
+    (httpx) side that share one configuration:
+
+    - per-host keep-alive connection pools (POOL_MAXSIZE per host)
+    - connect and read timeouts on every request
+    - jittered exponential-backoff retries on connection errors, timeouts
+      and retryable status codes (429/5xx), honouring Retry-After
+    - pool usage metrics in HTTP_METRICS
+    """
+
+    def __init__(self, connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 pool_maxsize: int = POOL_MAXSIZE, max_retries: int = MAX_RETRIES):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.metrics = HTTP_METRICS
+        self._session = self._build_session()
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        # pool_connections = number of hosts to keep pools for; pool_maxsize = connections per host.
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.pool_maxsize, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    # --- sync -------------------------------------------------------------
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            self.metrics.start(host)
+            failed = False
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                failed = True
+                if not self._can_retry(method, attempt):
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                failed = response.status_code in RETRYABLE_STATUS
+                if not failed or not self._can_retry(method, attempt):
+                    return response
+                delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+                response.close()
+            finally:
+                # Runs on every exit, cancellation included, so in_flight can't drift upward.
+                self.metrics.finish(host, time.monotonic() - start, error=failed)
+            self.metrics.retry(host)
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    # --- async ------------------------------------------------------------
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_maxsize * 8,
+                                    max_keepalive_connections=self.pool_maxsize,
+                                    keepalive_expiry=30),
+            )
+        return self._async_client
+
+    async def arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = urlsplit(url).netloc
+        client = self._get_async_client()
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            self.metrics.start(host)
+            failed = False
+            try:
+                response = await client.request(method, url, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException):
+                failed = True
+                if not self._can_retry(method, attempt):
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                failed = response.status_code in RETRYABLE_STATUS
+                if not failed or not self._can_retry(method, attempt):
+                    return response
+                delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+                await response.aclose()
+            finally:
+                self.metrics.finish(host, time.monotonic() - start, error=failed)
+            self.metrics.retry(host)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @asynccontextmanager
+    async def astream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Like arequest(), but yields the response before its body is read, for
+        incremental reading (response.aiter_text()). Only getting the response
+        headers is retried; the response is closed on exit.
+        """
+        host = urlsplit(url).netloc
+        client = self._get_async_client()
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            self.metrics.start(host)
+            failed = False
+            try:
+                response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+            except (httpx.TransportError, httpx.TimeoutException):
+                failed = True
+                if not self._can_retry(method, attempt):
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                failed = response.status_code in RETRYABLE_STATUS
+                if not failed or not self._can_retry(method, attempt):
+                    break
+                delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+                await response.aclose()
+            finally:
+                self.metrics.finish(host, time.monotonic() - start, error=failed)
+            self.metrics.retry(host)
+            await asyncio.sleep(delay)
+            attempt += 1
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("POST", url, **kwargs)
+
+    # --- lifecycle / metrics ---------------------------------------------
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def close(self):
+        self._session.close()
+
+    def stats(self) -> Dict:
+        return {
+            "pool_maxsize_per_host": self.pool_maxsize,
+            "hosts": self.metrics.snapshot(),
+        }
+
+    def _can_retry(self, method: str, attempt: int) -> bool:
+        return method.upper() in RETRYABLE_METHODS and attempt < self.max_retries
+
+
+# Shared by every tool in tools/.
+http_client = HttpClient()
+
+
+async def aclose_async_client():
+    await http_client.aclose()
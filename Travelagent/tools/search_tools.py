@@ -1,13 +1,185 @@
+import asyncio
 import json
-import requests
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from langchain.tools import tool
 import os
 from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
+from pydantic import BaseModel, Field
+from agents.resilience import upstream
+from tools.cache import MemoryCacheBackend, ResultCache
+from tools.http_client import http_client
+from tools.singleflight import SingleFlight
+from observability import log_event
 
 # Use Streamlit secrets if available; otherwise, fall back to the environment variable.
 SERPER_API = st.secrets.get("SERPER_API_KEY") if "SERPER_API_KEY" in st.secrets else os.getenv("SERPER_API_KEY")
+SERPER_URL = os.environ.get("SERPER_URL", "https://google.serper.dev/search")
+TOP_RESULTS_TO_RETURN = 4
+MAX_BATCH_QUERIES = 8
+
+# Serper responses by normalized query (SEARCH_CACHE_TTL seconds, SEARCH_CACHE_MAX_ENTRIES entries).
+SEARCH_CACHE = ResultCache(
+    MemoryCacheBackend(int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "512"))),
+    ttl=float(os.environ.get("SEARCH_CACHE_TTL", "3600")),
+    stale_ttl=0,
+    name="search",
+)
+# Identical queries in flight at the same time (sync or async) share one request.
+SEARCH_FLIGHT = SingleFlight("search")
+# Batch queries run side by side over the shared connection pool.
+_BATCH_POOL = ThreadPoolExecutor(max_workers=MAX_BATCH_QUERIES, thread_name_prefix="search-batch")
+
+
+def search_stats() -> dict:
+    return {**SEARCH_CACHE.stats(), "fetches": SEARCH_FLIGHT.executions, "shared_fetches": SEARCH_FLIGHT.shared}
+
+
+def _serper_headers() -> dict:
+    return {
+        'X-API-KEY': SERPER_API,
+        'content-type': 'application/json'
+    }
+
+
+def _format_results(data: dict) -> str:
+    if 'organic' not in data:
+        return "Sorry, no results found. Please check your SERPER API key."
+    else:
+        results = data['organic']
+        strings = []
+        for result in results[:TOP_RESULTS_TO_RETURN]:
+            try:
+                strings.append('\n'.join([
+                    f"Title: {result['title']}",
+                    f"Link: {result['link']}",
+                    f"Snippet: {result['snippet']}",
+                    "-----------------"
+                ]))
+            except KeyError:
+                continue
+        return "\n".join(strings)
+
+
+class SearchResult(BaseModel):
+    title: str
+    link: str
+    snippet: str = ""
+    position: int = Field(description="Rank within the query that found it first, from 1")
+    queries: List[str] = Field(description="Every query in the batch that returned this URL")
+
+
+class SearchBatch(BaseModel):
+    results: List[SearchResult]
+    failed_queries: List[str] = Field([], description="Queries whose search failed and were left out")
+
+
+class SearchBatchInput(BaseModel):
+    queries: List[str] = Field(description=f"Related search queries, up to {MAX_BATCH_QUERIES}")
+    max_results_per_query: Optional[int] = Field(TOP_RESULTS_TO_RETURN, description="Organic results kept per query")
+
+
+def _normalize_query(query: str) -> str:
+    # Serper results don't depend on case or spacing, so neither do cache keys and batch dedup.
+    return " ".join(str(query).casefold().split())
+
+
+def _normalize_url(url: str) -> str:
+    """Dedup key for a result link: no fragment, tracking params or trailing slash; host case-folded."""
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
+
+
+def _cacheable(data) -> bool:
+    return isinstance(data, dict) and "organic" in data
+
+
+def _failed(data) -> bool:
+    return not _cacheable(data)
+
+
+def _search(query: str) -> dict:
+    query = _normalize_query(query)
+
+    def fetch():
+        return upstream("serper").call(
+            lambda: http_client.post(SERPER_URL, headers=_serper_headers(), data=json.dumps({"q": query})).json(),
+            failed=_failed)
+
+    return SEARCH_CACHE.get_or_fetch({"q": query}, lambda: SEARCH_FLIGHT.do(query, fetch), should_cache=_cacheable)
+
+
+async def _asearch(query: str) -> dict:
+    query = _normalize_query(query)
+    cached = SEARCH_CACHE.get({"q": query})
+    if cached is not None:
+        return cached
+
+    async def post():
+        response = await http_client.apost(SERPER_URL, headers=_serper_headers(), content=json.dumps({"q": query}))
+        return response.json()
+
+    async def fetch():
+        data = await upstream("serper").acall(post, failed=_failed)
+        if _cacheable(data):
+            SEARCH_CACHE.put({"q": query}, data)
+        return data
+
+    return await SEARCH_FLIGHT.ado(query, fetch)
+
+
+def _merge(queries: List[str], responses: List, max_results: int) -> SearchBatch:
+    """
+    Organic results of every query, deduplicated by URL, ordered by rank so
+    each query's top hits come first. Failed queries are logged and listed
+    in `failed_queries`.
+    """
+    found: Dict[str, SearchResult] = {}
+    ranked = []
+    failed = []
+    for index, (query, data) in enumerate(zip(queries, responses)):
+        if isinstance(data, Exception) or not _cacheable(data):
+            log_event("search.error", sample_rate=1.0, level=logging.WARNING, query=query,
+                      error=str(data) if isinstance(data, Exception) else str(data)[:200])
+            failed.append(query)
+            continue
+        for position, item in enumerate(data["organic"][:max_results], start=1):
+            if not item.get("link") or not item.get("title"):
+                continue
+            key = _normalize_url(item["link"])
+            if key in found:
+                if query not in found[key].queries:
+                    found[key].queries.append(query)
+                continue
+            found[key] = SearchResult(title=item["title"], link=item["link"], snippet=item.get("snippet", ""),
+                                      position=position, queries=[query])
+            ranked.append((position, index, key))
+    return SearchBatch(results=[found[key] for _, _, key in sorted(ranked)], failed_queries=failed)
+
+
+def search_many(queries: List[str], max_results_per_query: int = TOP_RESULTS_TO_RETURN) -> SearchBatch:
+    """Run related queries concurrently (cached per normalized query) and merge their results."""
+    queries = list(dict.fromkeys(_normalize_query(q) for q in queries if str(q).strip()))[:MAX_BATCH_QUERIES]
+    futures = [_BATCH_POOL.submit(_search, q) for q in queries]
+    responses = []
+    for future in futures:
+        try:
+            responses.append(future.result())
+        except Exception as e:
+            responses.append(e)
+    return _merge(queries, responses, max_results_per_query)
+
+
+async def asearch_many(queries: List[str], max_results_per_query: int = TOP_RESULTS_TO_RETURN) -> SearchBatch:
+    queries = list(dict.fromkeys(_normalize_query(q) for q in queries if str(q).strip()))[:MAX_BATCH_QUERIES]
+    responses = await asyncio.gather(*(_asearch(q) for q in queries), return_exceptions=True)
+    return _merge(queries, list(responses), max_results_per_query)
+
 
 class SearchTools:
     @tool("Search the internet")
@@ -15,32 +187,32 @@ class SearchTools:
         """
         Search the internet for a given query and return relevant results.
         """
-        top_result_to_return = 4
-        url = "https://google.serper.dev/search"
-        payload = json.dumps({"q": query})
-        headers = {
-            'X-API-KEY': SERPER_API,
-            'content-type': 'application/json'
-        }
         try:
-            response = requests.post(url, headers=headers, data=payload)
-            data = response.json()
+            data = _search(query)
         except Exception as e:
             return f"Error fetching search results: {e}"
-        
-        if 'organic' not in data:
-            return "Sorry, no results found. Please check your SERPER API key."
-        else:
-            results = data['organic']
-            strings = []
-            for result in results[:top_result_to_return]:
-                try:
-                    strings.append('\n'.join([
-                        f"Title: {result['title']}",
-                        f"Link: {result['link']}",
-                        f"Snippet: {result['snippet']}",
-                        "-----------------"
-                    ]))
-                except KeyError:
-                    continue
-            return "\n".join(strings)
+        return _format_results(data)
+
+    @staticmethod
+    async def asearch_internet(query: str) -> str:
+        """Async variant of search_internet using the shared pooled HTTP client."""
+        try:
+            data = await _asearch(query)
+        except Exception as e:
+            return f"Error fetching search results: {e}"
+        return _format_results(data)
+
+    @tool("Search the internet for several queries", args_schema=SearchBatchInput)
+    def search_internet_batch(queries: List[str], max_results_per_query: int = TOP_RESULTS_TO_RETURN):
+        """
+        Run several related searches at once (e.g. attractions, transit and
+        neighborhoods of one city). Returns {"results": [...], "failed_queries": [...]}
+        with one result per distinct URL: its title, link, snippet, rank and
+        the queries that found it.
+        """
+        return search_many(queries, max_results_per_query or TOP_RESULTS_TO_RETURN).model_dump()
+
+    @staticmethod
+    async def asearch_internet_batch(queries: List[str], max_results_per_query: int = TOP_RESULTS_TO_RETURN):
+        """Async variant of search_internet_batch."""
+        return (await asearch_many(queries, max_results_per_query or TOP_RESULTS_TO_RETURN)).model_dump()
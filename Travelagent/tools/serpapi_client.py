@@ -0,0 +1,79 @@
+# tools/serpapi_client.py
+
+import os
+from typing import Optional
+from serpapi import GoogleSearch  # Use GoogleSearch from the serpapi package
+from agents.resilience import upstream
+from tools.cache import MemoryCacheBackend, ResultCache, SQLiteCacheBackend
+
+# Cache settings, all overridable from the environment:
+#   SERPAPI_CACHE_BACKEND      memory (default) | sqlite
+#   SERPAPI_CACHE_PATH         SQLite file for the sqlite backend
+#   SERPAPI_CACHE_MAX_ENTRIES  LRU bound
+#   SERPAPI_CACHE_TTL          default freshness window in seconds
+#   SERPAPI_CACHE_STALE_TTL    extra window served stale while refreshing
+#   SERPAPI_CACHE_TTL_<ENGINE> per-engine TTL, e.g. SERPAPI_CACHE_TTL_GOOGLE_FLIGHTS
+ENGINE_TTLS = {
+    "google_flights": 600,
+    "google_hotels": 1800,
+}
+
+
+def _build_cache() -> ResultCache:
+    max_entries = int(os.environ.get("SERPAPI_CACHE_MAX_ENTRIES", "512"))
+    if os.environ.get("SERPAPI_CACHE_BACKEND", "memory").lower() == "sqlite":
+        backend = SQLiteCacheBackend(os.environ.get("SERPAPI_CACHE_PATH", "serpapi_cache.sqlite3"), max_entries)
+    else:
+        backend = MemoryCacheBackend(max_entries)
+    return ResultCache(
+        backend,
+        ttl=float(os.environ.get("SERPAPI_CACHE_TTL", "900")),
+        stale_ttl=float(os.environ.get("SERPAPI_CACHE_STALE_TTL", "3600")),
+        name="serpapi",
+    )
+
+
+SERPAPI_CACHE = _build_cache()
+
+
+class SerpAPIError(Exception):
+    """An error body from SerpAPI, e.g. an invalid key or an exhausted quota."""
+
+
+def error_message(data) -> Optional[str]:
+    """SerpAPI's error for a response, or None."""
+    # SerpAPI also reports "no results" through `error`; that is an empty answer, not a failure.
+    error = data.get("error") if isinstance(data, dict) else f"Unexpected SerpAPI response: {data!r}"
+    return error if error and "hasn't returned any results" not in error else None
+
+
+def raise_for_error(data: dict):
+    error = error_message(data)
+    if error:
+        raise SerpAPIError(error)
+
+
+def _engine_ttl(engine: str):
+    override = os.environ.get(f"SERPAPI_CACHE_TTL_{engine.upper()}")
+    if override:
+        return float(override)
+    return ENGINE_TTLS.get(engine)
+
+
+def serpapi_search(query_params: dict) -> dict:
+    """
+    Run a SerpAPI search through the shared result cache. The cache key is the
+    normalized params minus `api_key`; error responses are never cached.
+    Only cache misses and background refreshes go through the serpapi
+    upstream guard, so cached results are served even while it is open.
+    """
+    def fetch():
+        return upstream("serpapi").call(lambda: GoogleSearch(query_params).get_dict(),
+                                        failed=lambda data: error_message(data) is not None)
+
+    return SERPAPI_CACHE.get_or_fetch(
+        query_params,
+        fetch,
+        ttl=_engine_ttl(query_params.get("engine", "")),
+        should_cache=lambda result: isinstance(result, dict) and "error" not in result,
+    )
@@ -0,0 +1,97 @@
+# tools/singleflight.py
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls: while a call for `key` is in flight,
+    later callers wait for it and share its result (or its exception) instead
+    of issuing their own upstream request.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self.calls = 0        # Total calls seen
+        self.executions = 0   # Calls that actually went upstream
+        self.shared = 0       # Calls served by someone else's in-flight request
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Call] = {}
+        self._ainflight: Dict[Any, asyncio.Task] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() once per key across concurrent threads."""
+        with self._lock:
+            self.calls += 1
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    self.errors += 1
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of do(); coalesces callers on the same event loop. The
+        call runs as its own task, so a caller that is cancelled or times out
+        only stops waiting; everyone else still gets the result.
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            self.calls += 1
+            task = self._ainflight.get(loop_key)
+            if task is None:
+                task = self._ainflight[loop_key] = loop.create_task(fn())
+                task.add_done_callback(lambda t: self._afinished(loop_key, t))
+                self.executions += 1
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def _afinished(self, loop_key, task: asyncio.Task):
+        with self._lock:
+            if self._ainflight.get(loop_key) is task:
+                del self._ainflight[loop_key]
+            # exception() also marks it retrieved when every caller has given up.
+            if not task.cancelled() and task.exception() is not None:
+                self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "executions": self.executions,
+            "saved": self.shared,
+            "errors": self.errors,
+            "in_flight": len(self._inflight) + len(self._ainflight),
+        }
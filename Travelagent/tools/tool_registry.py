@@ -1,22 +1,49 @@
 from tools.search_tools import SearchTools
 from tools.browser_tools import BrowserTool
 from tools.calculator_tools import CalculatorTools
-from tools.flights_finder import flights_finder
-from tools.hotels_finder import hotels_finder
-from tools.weather_finder import weather_finder
+from tools.flights_finder import flights_finder, aflights_finder
+from tools.hotels_finder import hotels_finder, ahotels_finder
+from tools.weather_finder import weather_finder, aweather_finder
+from tools.cache import cache_key
+from tools.executor import run_blocking
+from tools.singleflight import SingleFlight
+
+
+def _plain(value):
+    """Turn tool input (which may hold pydantic models) into plain data for keying."""
+    if hasattr(value, "model_dump"):
+        return _plain(value.model_dump())
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
 
 
 class ToolRegistry:
     def __init__(self):
         self.tools = {}
+        self.async_tools = {}
+        self.single_flight = SingleFlight("tools")
         self.register_all_tools()
 
     def register_all_tools(self):
         self.tools["search_internet"] = SearchTools.search_internet
+        self.tools["search_internet_batch"] = SearchTools.search_internet_batch
         self.tools["scrape_and_summarize_website"] = BrowserTool.scrape_and_summarize_website
         self.tools["calculate"] = CalculatorTools.calculate
         self.tools["flights_finder"] = flights_finder
         self.tools["hotels_finder"] = hotels_finder
+        self.tools["weather_finder"] = weather_finder
+
+        # Native async variants, used by ainvoke() instead of a thread hop.
+        self.async_tools["search_internet"] = SearchTools.asearch_internet
+        self.async_tools["search_internet_batch"] = SearchTools.asearch_internet_batch
+        self.async_tools["scrape_and_summarize_website"] = BrowserTool.ascrape_and_summarize_website
+        self.async_tools["calculate"] = CalculatorTools.acalculate
+        self.async_tools["flights_finder"] = aflights_finder
+        self.async_tools["hotels_finder"] = ahotels_finder
+        self.async_tools["weather_finder"] = aweather_finder
 
     def get_tool(self, name: str):
         return self.tools.get(name)
@@ -24,4 +51,35 @@ class ToolRegistry:
     def list_tools(self):
         return list(self.tools.keys())
 
-tool_registry = ToolRegistry()
\ No newline at end of file
+    def _call_key(self, name: str, tool_input) -> str:
+        return cache_key({"tool": name, "input": _plain(tool_input)}, exclude=())
+
+    def invoke(self, name: str, tool_input):
+        """
+        Invoke a tool by name. Concurrent calls with the same normalized input
+        share a single tool call and its result or error.
+        """
+        tool = self.tools[name]
+        return self.single_flight.do(self._call_key(name, tool_input), lambda: tool.invoke(tool_input))
+
+    async def ainvoke(self, name: str, tool_input):
+        """
+        Async variant of invoke(). Uses the tool's native async variant when
+        there is one; otherwise runs the sync tool on the bounded executor.
+        """
+        tool = self.tools[name]
+        afn = self.async_tools.get(name)
+
+        def call():
+            if afn is None:
+                return run_blocking(tool.invoke, tool_input)
+            if isinstance(tool_input, dict):
+                return afn(**tool_input)
+            return afn(tool_input)
+
+        return await self.single_flight.ado(self._call_key(name, tool_input), call)
+
+    def stats(self):
+        return self.single_flight.stats()
+
+tool_registry = ToolRegistry()
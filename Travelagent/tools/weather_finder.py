@@ -1,41 +1,36 @@
 # tools/weather_finder.py
 
-import os
-import requests
 from langchain_core.tools import tool
+from tools.weather_forecast import WEATHER
+
+
+def _cities(city: str):
+    return [c.strip() for c in city.split(";") if c.strip()]
 
-OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY")
 
 @tool("weather_finder")
 def weather_finder(city: str, date_str: str = "") -> str:
     """
-    Fetch real-time weather info for 'city' from OpenWeatherMap.
-    date_str can be used for short forecast logic if you want to handle near-future dates.
-    If the user requests a far-future date (e.g. 2025), real data won't exist.
+    Weather for 'city' from the cached OpenWeatherMap 5-day forecast.
+    Several cities can be given separated by ';' and are fetched together.
+    date_str (YYYY-MM-DD) picks a day inside the forecast window; without
+    it, the current conditions and today's outlook are returned.
     """
-
-    if not city:
+    cities = _cities(city)
+    if not cities:
         return "No city provided."
+    try:
+        return WEATHER.forecast(cities, date_str)
+    except Exception as e:
+        return f"Error calling weather API: {e}"
 
-    # Basic example: current weather
-    # If you want to handle near-future forecast, you can adapt the endpoint:
-    #   https://api.openweathermap.org/data/2.5/forecast
-    # or 16-day forecast, etc. 
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {
-        "q": city,
-        "appid": OPENWEATHER_API_KEY,
-        "units": "metric"
-    }
 
+async def aweather_finder(city: str, date_str: str = "") -> str:
+    """Async variant of weather_finder using the shared pooled HTTP client."""
+    cities = _cities(city)
+    if not cities:
+        return "No city provided."
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
-        if "main" in data:
-            desc = data["weather"][0]["description"]
-            temp = data["main"]["temp"]
-            return f"Current weather in {city}: {desc}, {temp}°C."
-        else:
-            return f"Could not fetch weather for {city}. Response: {data}"
+        return await WEATHER.aforecast(cities, date_str)
     except Exception as e:
         return f"Error calling weather API: {e}"
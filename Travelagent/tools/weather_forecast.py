@@ -0,0 +1,190 @@
+# tools/weather_forecast.py
+
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from agents.resilience import upstream
+from tools.cache import MemoryCacheBackend, ResultCache
+from tools.http_client import http_client
+from tools.singleflight import SingleFlight
+
+OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY")
+# 5 day / 3 hour forecast. OpenWeather recomputes it every 3 hours, so a block
+# is cached for that long (WEATHER_CACHE_TTL).
+FORECAST_URL = os.environ.get("OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/forecast")
+FORECAST_DAYS = 5  # Days ahead (today included) the forecast covers
+RAIN_LIKELY = 0.5  # Probability of precipitation at which we suggest an umbrella
+
+
+def _city_key(city: str) -> str:
+    return " ".join(city.casefold().split())
+
+
+def _forecast_params(city: str) -> dict:
+    return {"q": city, "appid": OPENWEATHER_API_KEY, "units": "metric"}
+
+
+def _provider_failed(data: dict) -> bool:
+    # A 404 is an unknown city (the user's input), not OpenWeather failing.
+    return not data.get("list") and str(data.get("cod")) != "404"
+
+
+def _to_block(city: str, data: dict) -> dict:
+    """Keep only what answers need: local timestamps, temperature, rain chance and description."""
+    offset = data.get("city", {}).get("timezone", 0)
+    slots = []
+    for item in data.get("list", []):
+        local = datetime.fromtimestamp(item["dt"] + offset, tz=timezone.utc)
+        slots.append({
+            "dt": item["dt"],
+            "date": local.date().isoformat(),
+            "time": local.strftime("%H:%M"),
+            "temp": item["main"]["temp"],
+            "humidity": item["main"].get("humidity"),
+            "pop": item.get("pop", 0.0),
+            "description": item["weather"][0]["description"] if item.get("weather") else "",
+        })
+    return {"city": data.get("city", {}).get("name") or city, "slots": slots}
+
+
+def _day_summary(slots: List[dict]) -> dict:
+    descriptions = Counter(s["description"] for s in slots if s["description"])
+    return {
+        "low": min(s["temp"] for s in slots),
+        "high": max(s["temp"] for s in slots),
+        "pop": max(s["pop"] for s in slots),
+        "description": descriptions.most_common(1)[0][0] if descriptions else "no description",
+    }
+
+
+def parse_date(date_str: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(date_str.strip()[:10]) if date_str else None
+    except ValueError:
+        return None
+
+
+class ForecastEngine:
+    """
+    Per-city forecast blocks from OpenWeather's 5 day / 3 hour endpoint,
+    cached for the provider's update cadence. Any question about a date
+    inside a cached block is answered locally; several cities missing from
+    the cache are fetched together in one concurrent refresh.
+    """
+
+    def __init__(self, cache: ResultCache, max_parallel: int = 4):
+        self.cache = cache
+        self.single_flight = SingleFlight("weather")
+        self._pool = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="weather-refresh")
+
+    def _fetch(self, city: str) -> dict:
+        def call():
+            data = upstream("openweather").call(
+                lambda: http_client.get(FORECAST_URL, params=_forecast_params(city)).json(),
+                failed=_provider_failed)
+            return self._store(city, data)
+        return self.single_flight.do(_city_key(city), call)
+
+    async def _afetch(self, city: str) -> dict:
+        async def get():
+            return (await http_client.aget(FORECAST_URL, params=_forecast_params(city))).json()
+
+        async def call():
+            return self._store(city, await upstream("openweather").acall(get, failed=_provider_failed))
+        return await self.single_flight.ado(_city_key(city), call)
+
+    def _store(self, city: str, data: dict) -> dict:
+        if not data.get("list"):
+            # A 404 is an unknown city (the user's input); anything else is the provider failing.
+            if str(data.get("cod")) == "404":
+                raise LookupError(f"No forecast for {city}: {data.get('message', 'city not found')}")
+            raise RuntimeError(f"OpenWeather error for {city}: {data.get('message', data)}")
+        block = _to_block(city, data)
+        self.cache.put({"city": _city_key(city)}, block)
+        return block
+
+    @staticmethod
+    def _distinct(cities: List[str]) -> List[str]:
+        """First spelling of each city, so "Paris; paris" is looked up once."""
+        seen = {}
+        for city in cities:
+            seen.setdefault(_city_key(city), city)
+        return list(seen.values())
+
+    def blocks(self, cities: List[str]) -> Dict[str, object]:
+        """city -> forecast block (or the exception that prevented fetching it)."""
+        result = {city: self.cache.get({"city": _city_key(city)}) for city in self._distinct(cities)}
+        missing = [city for city, block in result.items() if block is None]
+        futures = {city: self._pool.submit(self._fetch, city) for city in missing[1:]}
+        # The first miss is fetched on this thread; the rest alongside it.
+        for city in missing:
+            try:
+                result[city] = futures[city].result() if city in futures else self._fetch(city)
+            except Exception as e:
+                result[city] = e
+        return result
+
+    async def ablocks(self, cities: List[str]) -> Dict[str, object]:
+        result = {city: self.cache.get({"city": _city_key(city)}) for city in self._distinct(cities)}
+        missing = [city for city, block in result.items() if block is None]
+        fetched = await asyncio.gather(*(self._afetch(city) for city in missing), return_exceptions=True)
+        result.update(zip(missing, fetched))
+        return result
+
+    @staticmethod
+    def describe(city: str, block, on: Optional[date] = None) -> str:
+        """Answer for `city` on date `on` (or right now) from a cached block."""
+        if isinstance(block, LookupError):
+            return f"No weather forecast found for {city}; please check the city name."
+        if isinstance(block, Exception):
+            return f"Could not fetch weather for {city}: {block}"
+        slots = block["slots"]
+        name = block["city"]
+        days = sorted({s["date"] for s in slots})
+
+        if on is None:
+            now = min(slots, key=lambda s: abs(s["dt"] - time.time()))
+            today = _day_summary([s for s in slots if s["date"] == now["date"]])
+            text = (f"Current weather in {name}: {now['description']}, {now['temp']}°C. "
+                    f"Today {today['low']:.0f}–{today['high']:.0f}°C, "
+                    f"{today['pop']:.0%} chance of rain.")
+            return text + (" Bring an umbrella." if today["pop"] >= RAIN_LIKELY else "")
+
+        day = on.isoformat()
+        if day not in days:
+            return (f"No forecast for {name} on {day}: forecasts only cover {days[0]} to {days[-1]}. "
+                    + ForecastEngine.describe(city, block))
+        summary = _day_summary([s for s in slots if s["date"] == day])
+        text = (f"Forecast for {name} on {day}: {summary['description']}, "
+                f"{summary['low']:.0f}–{summary['high']:.0f}°C, {summary['pop']:.0%} chance of rain.")
+        return text + (" Bring an umbrella." if summary["pop"] >= RAIN_LIKELY else "")
+
+    def forecast(self, cities: List[str], date_str: str = "") -> str:
+        on = parse_date(date_str)
+        return "\n".join(self.describe(city, block, on) for city, block in self.blocks(cities).items())
+
+    async def aforecast(self, cities: List[str], date_str: str = "") -> str:
+        on = parse_date(date_str)
+        return "\n".join(self.describe(city, block, on) for city, block in (await self.ablocks(cities)).items())
+
+    def stats(self):
+        return {**self.cache.stats(), "fetches": self.single_flight.executions,
+                "shared_fetches": self.single_flight.shared}
+
+
+def _build_engine() -> ForecastEngine:
+    cache = ResultCache(
+        MemoryCacheBackend(int(os.environ.get("WEATHER_CACHE_MAX_ENTRIES", "256"))),
+        ttl=float(os.environ.get("WEATHER_CACHE_TTL", str(3 * 3600))),
+        stale_ttl=0,
+        name="weather",
+    )
+    return ForecastEngine(cache)
+
+
+WEATHER = _build_engine()
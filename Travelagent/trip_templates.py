@@ -0,0 +1,104 @@
+# trip_templates.py
+
+"""
+HTML for a trip result (the JSON form of agents.trip_result.TripResult).
+Shared by the Streamlit client and TripPlannerAgent's chat answer, so the
+markup lives in one place. Templates are compiled once at import, and each
+section is built with a single join.
+"""
+
+from html import escape
+from string import Template
+
+FLIGHTS_HEADER = Template("<h2>Flights from $departure_city to $arrival_city</h2>")
+FLIGHT = Template("""
+<div style="border:1px solid #ddd; padding:10px; margin:10px 0;">
+  <h3>Option $number: $airline$badge</h3>
+  <ul>
+    <li><strong>Departure:</strong> $departure_time</li>
+    <li><strong>Arrival:</strong> $arrival_time</li>
+    <li><strong>Duration:</strong> $duration</li>
+    <li><strong>Stops:</strong> $stops</li>
+    <li><strong>Aircraft:</strong> $airplane</li>
+    <li><strong>Price:</strong> $price</li>
+    <li><strong>Airline Logo:</strong> $logo</li>
+  </ul>
+</div>""")
+PARETO_BADGE = " (nothing cheaper is faster)"
+LOGO = Template('<img src="$src" alt="Airline Logo" width="60">')
+
+HOTELS_HEADER = Template("<h2>Hotels in $arrival_city</h2>")
+HOTEL = Template("""
+<div style="border:1px solid #ddd; padding:10px; margin:10px 0;">
+  <h3>Option $number: $name</h3>
+  <ul>
+    <li><strong>Description:</strong> $description</li>
+    <li><strong>Rate per Night:</strong> $rate</li>
+    <li><strong>Hotel Image:</strong> $image</li>
+  </ul>
+</div>""")
+IMAGE = Template('<img src="$src" alt="Hotel Image" width="100">')
+
+NOTICE = Template("<p>$text</p>")
+MISSING = {
+    "timeout": Template("<p>$section results did not arrive in time. Please try again.</p>"),
+    "error": Template("<p>$section results are unavailable right now.</p>"),
+}
+
+
+def _duration(minutes) -> str:
+    return f"{minutes // 60}h {minutes % 60}m" if minutes else "N/A"
+
+
+def _notice(section: str, reason: str) -> str:
+    return MISSING.get(reason, MISSING["error"]).substitute(section=section)
+
+
+def render_flights(result: dict) -> str:
+    if "flights" in result.get("missing", {}):
+        return _notice("Flight", result["missing"]["flights"])
+    flights = result.get("flights") or []
+    if not flights:
+        return NOTICE.substitute(text="No flight data found.")
+    parts = [FLIGHTS_HEADER.substitute(departure_city=escape(result["departure_city"]),
+                                       arrival_city=escape(result["arrival_city"]))]
+    parts.extend(
+        FLIGHT.substitute(
+            number=i,
+            airline=escape(f["airline"]),
+            badge=PARETO_BADGE if f.get("pareto") else "",
+            departure_time=escape(f.get("departure_time") or ""),
+            arrival_time=escape(f.get("arrival_time") or ""),
+            duration=_duration(f.get("duration")),
+            stops=f.get("stops", 0),
+            airplane=escape(f.get("airplane") or ""),
+            price=f"${f['price']:.0f}" if f.get("price") is not None else "N/A",
+            logo=LOGO.substitute(src=escape(f["airline_logo"])) if f.get("airline_logo") else "N/A",
+        )
+        for i, f in enumerate(flights, start=1)
+    )
+    return "".join(parts)
+
+
+def render_hotels(result: dict) -> str:
+    if "hotels" in result.get("missing", {}):
+        return _notice("Hotel", result["missing"]["hotels"])
+    hotels = result.get("hotels") or []
+    if not hotels:
+        return NOTICE.substitute(text="No hotel data found.")
+    parts = [HOTELS_HEADER.substitute(arrival_city=escape(result["arrival_city"]))]
+    parts.extend(
+        HOTEL.substitute(
+            number=i,
+            name=escape(h["name"]),
+            description=escape(h.get("description") or ""),
+            rate=escape(h.get("rate_per_night") or "N/A"),
+            image=IMAGE.substitute(src=escape(h["thumbnail"])) if h.get("thumbnail") else "No image",
+        )
+        for i, h in enumerate(hotels, start=1)
+    )
+    return "".join(parts)
+
+
+def render_trip(result: dict) -> str:
+    return f"<div>{render_flights(result)}{render_hotels(result)}</div>"